@@ -0,0 +1,85 @@
+"""
+Benchmark: backends de la capa de texto (PyMuPDF, PDFMiner, pdfplumber)
+
+Extrae la capa de texto de los PDFs de data/pdfs con cada backend instalado
+y reporta páginas/segundo y similitud del texto respecto al backend de
+referencia (PDFMiner, el que usaba el pipeline originalmente). La similitud
+es el Jaccard ponderado de las palabras de cada documento: no penaliza que
+un backend ordene distinto los bloques, sí que pierda o invente texto.
+
+Uso:
+    python benchmarks/bench_backends.py
+    python benchmarks/bench_backends.py --limite 10 --referencia pymupdf
+"""
+
+import argparse
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from backends_pdf import BACKENDS
+from config import PDF_DIR
+
+
+def similitud(texto_a, texto_b):
+    """Jaccard ponderado entre las bolsas de palabras de dos textos (0 a 1)"""
+    palabras_a = Counter(texto_a.split())
+    palabras_b = Counter(texto_b.split())
+    union = sum((palabras_a | palabras_b).values())
+    return sum((palabras_a & palabras_b).values()) / union if union else 1.0
+
+
+def medir(nombre, pdfs):
+    """Extraer todos los PDFs con un backend y devolver (segundos, páginas, textos por PDF)"""
+    funcion = BACKENDS[nombre][1]
+    textos = {}
+    paginas = 0
+    inicio = time.perf_counter()
+    for pdf in pdfs:
+        try:
+            capa = list(funcion(pdf))
+        except Exception as e:
+            print(f"   ⚠️  {nombre} falló en {pdf.name}: {e}")
+            continue
+        paginas += len(capa)
+        textos[pdf.name] = "\f".join(texto for _, texto, _ in capa)
+    return time.perf_counter() - inicio, paginas, textos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdfs", type=Path, default=PDF_DIR, help="Directorio con PDFs")
+    parser.add_argument("--limite", type=int, default=None, help="Usar solo los N primeros PDFs")
+    parser.add_argument("--referencia", default="pdfminer", choices=sorted(BACKENDS),
+                        help="Backend contra el que se mide la similitud")
+    args = parser.parse_args()
+
+    pdfs = sorted(args.pdfs.glob("*.pdf"))[:args.limite]
+    disponibles = [nombre for nombre, (disponible, _) in BACKENDS.items() if disponible]
+
+    print("="*60)
+    print("⏱️  BENCHMARK DE BACKENDS DE PDF")
+    print("="*60)
+    print(f"PDFs: {len(pdfs)} | Backends: {', '.join(disponibles)} | Referencia: {args.referencia}")
+
+    resultados = {nombre: medir(nombre, pdfs) for nombre in disponibles}
+    referencia = resultados.get(args.referencia)
+
+    print(f"\n{'Backend':<12} {'Tiempo':>9} {'Páginas':>8} {'Pág/s':>8} {'Similitud':>10}")
+    for nombre, (duracion, paginas, textos) in resultados.items():
+        if referencia:
+            comunes = [pdf for pdf in textos if pdf in referencia[2]]
+            valores = [similitud(textos[pdf], referencia[2][pdf]) for pdf in comunes]
+            texto_similitud = f"{sum(valores) / len(valores):.3f}" if valores else "-"
+        else:
+            texto_similitud = "-"
+        print(f"{nombre:<12} {duracion:>8.2f}s {paginas:>8} {paginas / duracion:>8.1f} {texto_similitud:>10}")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
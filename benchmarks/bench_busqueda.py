@@ -0,0 +1,93 @@
+"""
+Benchmark: índice de búsqueda local (construcción, actualización y consultas)
+
+Construye el índice invertido desde cero con los JSON de data/json_output en
+un directorio temporal, mide una actualización sin cambios (el caso de cada
+apertura de consulta_mongodb.py) y la latencia de una serie de consultas
+BM25, incluida una frase, y de los extractos resaltados de sus resultados.
+
+Uso:
+    python benchmarks/bench_busqueda.py
+    python benchmarks/bench_busqueda.py --repeticiones 200 --consulta "salud pública"
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from config import JSON_OUTPUT_DIR
+from indice_busqueda import IndiceBusqueda
+
+CONSULTAS = [
+    "salud",
+    "resolución ministerio",
+    "vacunación covid",
+    "sistema general de seguridad social",
+    '"protección social"',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", type=Path, default=JSON_OUTPUT_DIR, help="Directorio con los JSON extraídos")
+    parser.add_argument("--repeticiones", type=int, default=100, help="Veces que se ejecuta cada consulta")
+    parser.add_argument("--consulta", action="append", help="Consulta a medir (se puede repetir)")
+    args = parser.parse_args()
+
+    json_files = sorted(args.json.glob("minsalud_texto_*.json"))
+    consultas = args.consulta or CONSULTAS
+
+    print("="*60)
+    print("⏱️  BENCHMARK DEL ÍNDICE DE BÚSQUEDA LOCAL")
+    print("="*60)
+    print(f"JSON: {len(json_files)} | Repeticiones por consulta: {args.repeticiones}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = Path(tmp) / "indice.sqlite3"
+        indice = IndiceBusqueda(ruta)
+
+        inicio = time.perf_counter()
+        indice.actualizar(json_files)
+        construccion = time.perf_counter() - inicio
+        resumen = indice.estadisticas()
+
+        inicio = time.perf_counter()
+        totales = indice.actualizar(json_files)
+        actualizacion = time.perf_counter() - inicio
+        assert totales['sin_cambios'] == len(json_files)
+
+        indice.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        tamano = ruta.stat().st_size
+        print(f"\n📚 {resumen['documentos']} documentos, {resumen['terminos']:,} términos, "
+              f"{resumen['postings']:,} postings, {tamano / 1024 / 1024:.1f} MB en disco")
+        print(f"🏗️  Construcción: {construccion:.2f} s ({resumen['documentos'] / construccion:.1f} docs/s)")
+        print(f"♻️  Actualización sin cambios: {actualizacion * 1000:.1f} ms")
+
+        print(f"\n{'Consulta':<40} {'Resultados':>10} {'Mediana':>10} {'p95':>10} {'Extractos':>10}")
+        for consulta in consultas:
+            tiempos = []
+            tiempos_extractos = []
+            for _ in range(args.repeticiones):
+                inicio = time.perf_counter()
+                resultados = indice.buscar(consulta, 10)
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+                inicio = time.perf_counter()
+                for resultado in resultados:
+                    indice.extractos(resultado['doc_id'], consulta)
+                tiempos_extractos.append((time.perf_counter() - inicio) * 1000)
+            tiempos.sort()
+            p95 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+            print(f"{consulta:<40} {len(resultados):>10} {statistics.median(tiempos):>8.2f}ms {p95:>8.2f}ms "
+                  f"{statistics.median(tiempos_extractos):>8.2f}ms")
+        indice.cerrar()
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark: crawling secuencial vs. asyncio contra un servidor local
+
+Uso:
+    python benchmarks/bench_crawl.py
+    python benchmarks/bench_crawl.py --paginas 60 --latencia 0.1
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from servidor_stub import SitioStub, ValidadorLocal, scraper_contra_stub
+
+
+def medir(sitio, modo_async, destino, min_interval, max_por_minuto):
+    """Ejecutar un crawl completo y devolver (segundos, links)"""
+    validador = ValidadorLocal(min_interval=min_interval, max_por_minuto=max_por_minuto)
+    with scraper_contra_stub(sitio, destino, validador=validador) as scraper:
+        inicio = time.perf_counter()
+        scraper.crawl_sitio_web(modo_async=modo_async)
+        duracion = time.perf_counter() - inicio
+
+    with open(destino, 'r', encoding='utf-8') as f:
+        links = json.load(f)['links']
+    return duracion, links
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paginas", type=int, default=40)
+    parser.add_argument("--latencia", type=float, default=0.1, help="Latencia del servidor (s)")
+    parser.add_argument("--min-interval", type=float, default=0.0)
+    parser.add_argument("--max-por-minuto", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print("="*60)
+    print("⏱️  BENCHMARK DE CRAWLING: SECUENCIAL vs ASYNC")
+    print("="*60)
+    print(f"Páginas: {args.paginas} | Latencia: {args.latencia}s | "
+          f"Intervalo mínimo: {args.min_interval}s | Máx/minuto: {args.max_por_minuto}")
+
+    with SitioStub(paginas=args.paginas, latencia=args.latencia) as sitio, \
+            tempfile.TemporaryDirectory() as tmp:
+        t_serial, links_serial = medir(sitio, False, Path(tmp) / "serial.json",
+                                       args.min_interval, args.max_por_minuto)
+        t_async, links_async = medir(sitio, True, Path(tmp) / "async.json",
+                                     args.min_interval, args.max_por_minuto)
+
+    print(f"\n🐢 Secuencial: {t_serial:.2f}s ({len(links_serial)} links)")
+    print(f"⚡ Async:      {t_async:.2f}s ({len(links_async)} links)")
+    print(f"🚀 Aceleración: {t_serial / t_async:.1f}x")
+    print(f"✅ Mismo resultado: {links_serial == links_async}")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark: extracción de texto de PDFs en serie vs. pool de procesos
+
+Extrae el texto de los PDFs de data/pdfs (o del directorio indicado) con
+distinto número de procesos y reporta tiempo y aceleración respecto a 1.
+Los JSON se escriben en un directorio temporal; data/ no se modifica.
+
+Con el backend PDFMiner el agrupamiento de cajas de texto se desempata por
+id() de objeto, así que el orden de algunas cajas puede variar según el
+estado del proceso.
+Por eso "mismo resultado" compara nombres de JSON, archivo de origen y las
+palabras de cada texto; los textos idénticos byte a byte se reportan aparte.
+
+Uso:
+    python benchmarks/bench_extraccion.py
+    python benchmarks/bench_extraccion.py --workers 1 2 4 --limite 20
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import scraper as scraper_mod
+from config import PDF_DIR
+
+
+def medir(pdf_dir, workers, destino):
+    """Extraer todos los PDFs con `workers` procesos y devolver (segundos, textos, errores)"""
+    destino.mkdir()
+    with mock.patch.multiple(
+        scraper_mod,
+        PDF_DIR=pdf_dir,
+        JSON_OUTPUT_DIR=destino,
+        MANIFEST_PATH=destino / "manifiesto.sqlite3",
+    ):
+        scraper = scraper_mod.MinSaludScraper()
+        scraper.logger.setLevel("WARNING")
+        inicio = time.perf_counter()
+        scraper.procesar_pdfs_texto(forzar=True, workers=workers)
+        duracion = time.perf_counter() - inicio
+
+    textos = {}
+    for json_path in sorted(destino.glob("*.json")):
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        textos[json_path.name] = (data['file'], data['text'])
+    return duracion, textos, scraper.estadisticas['errores']
+
+
+def palabras(textos):
+    """Resultado comparable sin depender del orden de las cajas de texto"""
+    return {nombre: (archivo, sorted(texto.split())) for nombre, (archivo, texto) in textos.items()}
+
+
+def main():
+    nucleos = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdfs", type=Path, default=PDF_DIR, help="Directorio con PDFs")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, nucleos} | {n for n in (2, 4, 8, 16) if n < nucleos}),
+                        help="Números de procesos a medir")
+    parser.add_argument("--limite", type=int, default=None, help="Usar solo los N primeros PDFs")
+    args = parser.parse_args()
+
+    pdfs = sorted(args.pdfs.glob("*.pdf"))[:args.limite]
+    tamano = sum(p.stat().st_size for p in pdfs)
+
+    print("="*60)
+    print("⏱️  BENCHMARK DE EXTRACCIÓN DE TEXTO POR NÚMERO DE PROCESOS")
+    print("="*60)
+    print(f"PDFs: {len(pdfs)} ({tamano / 1024 / 1024:.1f} MB) | Núcleos: {nucleos}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        entrada = tmp / "pdfs"
+        entrada.mkdir()
+        for pdf in pdfs:
+            os.symlink(pdf.resolve(), entrada / pdf.name)
+
+        base = None
+        for workers in args.workers:
+            duracion, textos, errores = medir(entrada, workers, tmp / f"salida_{workers}")
+            if base is None:
+                base = (duracion, textos)
+            print(f"\n⚙️  {workers} proceso(s): {duracion:.2f}s "
+                  f"({len(pdfs) / duracion:.1f} PDFs/s, {len(textos)} textos, {len(errores)} errores)")
+            identicos = sum(textos.get(nombre) == valor for nombre, valor in base[1].items())
+            print(f"   🚀 Aceleración: {base[0] / duracion:.2f}x | "
+                  f"✅ Mismo resultado: {palabras(textos) == palabras(base[1])} | "
+                  f"Idénticos byte a byte: {identicos}/{len(base[1])}")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
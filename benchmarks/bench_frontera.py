@@ -0,0 +1,123 @@
+"""
+Benchmark: estructuras de la frontera del crawler con grafos sintéticos
+
+Simula un crawl completo sin HTTP (extraer_hipervinculos devuelve links de
+un grafo en memoria) y mide cómo escala el tiempo con el número de links.
+La implementación anterior (lista + pop(0) + any()) se mide solo en los
+tamaños pequeños porque es cuadrática.
+
+Uso:
+    python benchmarks/bench_frontera.py
+    python benchmarks/bench_frontera.py --max-links 200000
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import scraper as scraper_mod
+
+LINKS_POR_PAGINA = 20  # 1 de cada 4 links es ASPX; cada página re-enlaza la raíz
+
+
+def grafo_sintetico(total_links):
+    """Crear un grafo {url_pagina: [links]} con `total_links` links distintos"""
+    base = "https://www.minsalud.gov.co/Normativa/"
+    # Cada página aporta 15 PDFs nuevos y una página ASPX nueva
+    paginas = max(1, total_links // (LINKS_POR_PAGINA - LINKS_POR_PAGINA // 4 + 1))
+    grafo = {}
+    for p in range(paginas):
+        links = [{'url': f"{base}Paginas/p0.aspx", 'type': 'ASPX'}]
+        for k in range(LINKS_POR_PAGINA):
+            n = p * LINKS_POR_PAGINA + k
+            if k % 4 == 0:
+                links.append({'url': f"{base}Paginas/p{(n // 4) % paginas}.aspx", 'type': 'ASPX'})
+            else:
+                links.append({'url': f"{base}Documents/doc-{n}.pdf", 'type': 'PDF'})
+        grafo[f"{base}Paginas/p{p}.aspx"] = links
+    return grafo, f"{base}Paginas/p0.aspx"
+
+
+def crawl_lista_original(grafo, url_inicial):
+    """Algoritmo anterior: lista con pop(0) y búsqueda lineal de duplicados"""
+    visitados = set()
+    todos = []
+    cola = [{'url': url_inicial, 'type': 'ASPX'}]
+    while cola:
+        pagina = cola.pop(0)
+        url = pagina['url']
+        if url not in visitados and pagina['type'] == 'ASPX':
+            visitados.add(url)
+            for link in grafo.get(url, []):
+                if link['url'] not in visitados:
+                    if not any(l['url'] == link['url'] for l in todos):
+                        todos.append(link)
+                    if link['type'] == 'ASPX':
+                        cola.append(link)
+    return todos
+
+
+def crawl_frontera(scraper, grafo, url_inicial):
+    """Crawl real de MinSaludScraper con extraer_hipervinculos simulado"""
+    scraper.todos_los_links = []
+    scraper.extraer_hipervinculos = lambda url: grafo.get(url, [])
+    with mock.patch.object(scraper_mod, 'URL_INICIAL', url_inicial):
+        scraper.crawl_sitio_web()
+    return scraper.todos_los_links
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-links", type=int, default=100_000)
+    parser.add_argument("--max-links-original", type=int, default=12_500,
+                        help="Tamaño máximo para medir el algoritmo cuadrático anterior")
+    args = parser.parse_args()
+
+    tamanos = []
+    n = args.max_links
+    while n >= 5_000:
+        tamanos.append(n)
+        n //= 2
+    tamanos.reverse()
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            mock.patch.object(scraper_mod, 'LINKS_JSON_PATH', Path(tmp) / "links.json"), \
+            mock.patch.object(scraper_mod, 'CRAWL_STATE_PATH', Path(tmp) / "estado.sqlite3"):
+        scraper = scraper_mod.MinSaludScraper()
+        scraper.ethical_validator = None
+        logging.getLogger().setLevel(logging.WARNING)
+
+        print("="*60)
+        print("⏱️  BENCHMARK DE FRONTERA (grafo sintético, sin HTTP)")
+        print("="*60)
+        print(f"{'links':>10} {'frontera (s)':>14} {'µs/link':>9} {'original (s)':>14}")
+
+        for total in tamanos:
+            grafo, inicio_url = grafo_sintetico(total)
+
+            inicio = time.perf_counter()
+            links = crawl_frontera(scraper, grafo, inicio_url)
+            t_nuevo = time.perf_counter() - inicio
+
+            original = "-"
+            if total <= args.max_links_original:
+                inicio = time.perf_counter()
+                esperados = crawl_lista_original(grafo, inicio_url)
+                original = f"{time.perf_counter() - inicio:.2f}"
+                assert esperados == links, "La frontera cambió el resultado del crawl"
+
+            print(f"{len(links):>10} {t_nuevo:>14.3f} {t_nuevo / len(links) * 1e6:>9.2f} {original:>14}")
+
+    print("="*60)
+    print("💡 Escalado lineal: µs/link se mantiene constante al duplicar los links")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: escáner de datos personales (validate_data_privacy)
+
+Compara, sobre los textos de data/json_output, el método anterior (un
+re.search por patrón con IGNORECASE, recompilando en cada llamada) con el
+escáner compilado de una sola pasada, que además cuenta y ubica todas las
+coincidencias, y el enmascarado que aplica el pipeline antes de guardar
+cada texto. También mide el escaneo por trozos de un texto grande armado
+repitiendo el corpus.
+
+Uso:
+    python benchmarks/bench_pii.py
+    python benchmarks/bench_pii.py --repeticiones 20 --megas 200
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from config import JSON_OUTPUT_DIR, PII_CATEGORIAS_REDACCION
+from escaner_pii import CATEGORIAS_PII, coincidencias, coincidencias_en_trozos, escanear, enmascarar
+
+PATRONES = [rf'\b{patron}\b' for patron in CATEGORIAS_PII.values()]
+
+
+def por_patron(texto):
+    """Método anterior: una búsqueda por patrón, solo informa si hay alguna coincidencia"""
+    return [patron for patron in PATRONES if re.search(patron, texto, re.IGNORECASE)]
+
+
+def por_patron_completo(texto):
+    """Método anterior llevado a contar todas las coincidencias (una pasada por patrón)"""
+    return {patron: len(re.findall(patron, texto, re.IGNORECASE)) for patron in PATRONES}
+
+
+def medir(funcion, textos, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        re.purge()  # La caché de re oculta el costo de compilar en cada llamada
+        inicio = time.perf_counter()
+        for texto in textos:
+            funcion(texto)
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", type=Path, default=JSON_OUTPUT_DIR, help="Directorio con los JSON extraídos")
+    parser.add_argument("--repeticiones", type=int, default=10, help="Repeticiones sobre el corpus")
+    parser.add_argument("--megas", type=int, default=50, help="Tamaño del texto grande escaneado por trozos (MB)")
+    args = parser.parse_args()
+
+    textos = []
+    for ruta in sorted(args.json.glob("minsalud_texto_*.json")):
+        textos.append(json.loads(ruta.read_text(encoding='utf-8')).get('text') or "")
+    megas = sum(len(t.encode('utf-8')) for t in textos) / 1024 / 1024
+
+    print("="*60)
+    print("⏱️  BENCHMARK DEL ESCÁNER DE DATOS PERSONALES")
+    print("="*60)
+    print(f"Textos: {len(textos)} ({megas:.1f} MB) | Repeticiones: {args.repeticiones}")
+
+    resumen_corpus = escanear("\n".join(textos))
+    print(f"\n🔎 Coincidencias en el corpus: {resumen_corpus['total']} "
+          f"({', '.join(f'{c}: {n}' for c, n in resumen_corpus['conteos'].items())})")
+
+    print(f"\n{'Método':<45} {'Tiempo':>10} {'MB/s':>10}")
+    for nombre, funcion in [
+        ("re.search por patrón (solo existencia)", por_patron),
+        ("re.findall por patrón (conteos)", por_patron_completo),
+        ("Escáner compilado (conteos y posiciones)", escanear),
+        ("Enmascarado (redacción del pipeline)", lambda texto: enmascarar(texto, PII_CATEGORIAS_REDACCION)),
+    ]:
+        segundos = medir(funcion, textos, args.repeticiones)
+        print(f"{nombre:<45} {segundos * 1000:>8.1f}ms {megas / segundos:>10.1f}")
+
+    # Texto grande por trozos de 1 MB: la memoria queda acotada por el trozo
+    corpus = "\n".join(textos)
+    copias = max(1, int(args.megas / max(megas, 1e-9)))
+    tamano = 1 << 20
+    inicio = time.perf_counter()
+    total = 0
+    for _ in range(copias):
+        for _ in coincidencias_en_trozos(corpus[i:i + tamano] for i in range(0, len(corpus), tamano)):
+            total += 1
+    segundos = time.perf_counter() - inicio
+    print(f"{'Por trozos de 1 MB (' + f'{megas * copias:.0f} MB)':<45} {segundos * 1000:>8.1f}ms "
+          f"{megas * copias / segundos:>10.1f}")
+    assert total == copias * sum(1 for _ in coincidencias(corpus))
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Servidor HTTP local que simula el árbol de Normativa de MinSalud
+Se usa en benchmarks y pruebas para no depender del sitio real
+"""
+
+import hashlib
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from ethical_compliance import EthicalScrapingValidator
+
+
+class SitioStub:
+    """
+    Sitio sintético: cada página ASPX enlaza a `hijos` páginas nuevas y a
+    `pdfs_por_pagina` PDFs, hasta completar `paginas` páginas en total.
+    Cada respuesta tarda `latencia` segundos; con `capacidad` el servidor
+    se satura: con más de `capacidad` peticiones en curso la latencia crece
+    en proporción.
+
+    Las respuestas llevan ETag y Last-Modified y se responde 304 a las
+    peticiones condicionales cuyo validador coincide. Cambiar `version`
+    modifica el contenido de todas las páginas y PDFs. Mientras `rechazos`
+    sea positivo, cada petición de página o PDF lo descuenta y recibe un
+    429 (con la cabecera Retry-After si `retry_after` no es None). Con
+    `robots` se sirve ese texto como /robots.txt (si no, 404).
+    """
+
+    def __init__(self, paginas=30, hijos=3, pdfs_por_pagina=2, latencia=0.05, capacidad=None):
+        self.paginas = paginas
+        self.hijos = hijos
+        self.pdfs_por_pagina = pdfs_por_pagina
+        self.latencia = latencia
+        self.capacidad = capacidad
+        self.version = 1
+        self.rechazos = 0
+        self.retry_after = None
+        self.robots = None
+        self.respuestas_429 = 0
+        self.agentes = set()
+        self.peticiones = 0
+        self.respuestas_304 = 0
+        self.bytes_enviados = 0
+        self.en_curso = 0
+        self.max_en_curso = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def dominio_base(self):
+        return f"{self.base}/Normativa/"
+
+    @property
+    def url_inicial(self):
+        return f"{self.base}/Normativa/Paginas/p0.aspx"
+
+    def html_pagina(self, indice):
+        """Generar el HTML de la página `indice`"""
+        enlaces = []
+        for j in range(1, self.hijos + 1):
+            hijo = indice * self.hijos + j
+            if hijo < self.paginas:
+                enlaces.append(f'<a href="/Normativa/Paginas/p{hijo}.aspx">Página {hijo}</a>')
+        # Enlace de regreso a la raíz (ya visitada)
+        enlaces.append('<a href="/Normativa/Paginas/p0.aspx">Inicio</a>')
+        for k in range(self.pdfs_por_pagina):
+            enlaces.append(f'<a href="../Documents/doc-{indice}-{k}.pdf">PDF {k}</a>')
+        enlaces.append('<a href="https://otro-sitio.example/x.pdf">Externo</a>')
+        cuerpo = "\n".join(enlaces)
+        return (
+            f'<html><body><!-- v{self.version} -->'
+            f'<div class="container_blanco">{cuerpo}</div></body></html>'
+        )
+
+    def contenido_pdf(self, nombre):
+        """Bytes del PDF sintético `nombre`"""
+        return f"%PDF-1.4\n% {nombre} v{self.version}\n".encode('utf-8') + b"0" * 4096
+
+    def _crear_handler(self):
+        sitio = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with sitio._lock:
+                    sitio.peticiones += 1
+                    sitio.en_curso += 1
+                    sitio.max_en_curso = max(sitio.max_en_curso, sitio.en_curso)
+                    sitio.agentes.add(self.headers.get('User-Agent'))
+                    latencia = sitio.latencia
+                    if sitio.capacidad and sitio.en_curso > sitio.capacidad:
+                        latencia *= sitio.en_curso / sitio.capacidad
+                try:
+                    time.sleep(latencia)
+                    self._responder()
+                finally:
+                    with sitio._lock:
+                        sitio.en_curso -= 1
+
+            def _enviar(self, cuerpo, tipo):
+                etag = '"' + hashlib.md5(cuerpo).hexdigest() + '"'
+                modificado = formatdate(1_700_000_000 + sitio.version, usegmt=True)
+                if self.headers.get('If-None-Match') == etag:
+                    with sitio._lock:
+                        sitio.respuestas_304 += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', tipo)
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', modificado)
+                self.end_headers()
+                self.wfile.write(cuerpo)
+                with sitio._lock:
+                    sitio.bytes_enviados += len(cuerpo)
+
+            def _rechazar(self):
+                """Responder 429 si quedan rechazos por consumir"""
+                with sitio._lock:
+                    if sitio.rechazos <= 0:
+                        return False
+                    sitio.rechazos -= 1
+                    sitio.respuestas_429 += 1
+                self.send_response(429)
+                if sitio.retry_after is not None:
+                    self.send_header('Retry-After', str(sitio.retry_after))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return True
+
+            def _responder(self):
+                ruta = self.path.split('?', 1)[0]
+                if ruta.startswith('/Normativa/') and self._rechazar():
+                    return
+
+                if ruta == '/robots.txt' and sitio.robots is not None:
+                    self._enviar(sitio.robots.encode('utf-8'), 'text/plain; charset=utf-8')
+                    return
+
+                if ruta.startswith('/Normativa/Paginas/p') and ruta.endswith('.aspx'):
+                    indice = int(ruta[len('/Normativa/Paginas/p'):-len('.aspx')])
+                    if indice < sitio.paginas:
+                        cuerpo = sitio.html_pagina(indice).encode('utf-8')
+                        self._enviar(cuerpo, 'text/html; charset=utf-8')
+                        return
+
+                if ruta.startswith('/Normativa/Documents/') and ruta.endswith('.pdf'):
+                    self._enviar(sitio.contenido_pdf(ruta.rsplit('/', 1)[-1]), 'application/pdf')
+                    return
+
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._crear_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class ValidadorLocal(EthicalScrapingValidator):
+    """Validador ético que admite el servidor local y límites configurables"""
+
+    ALLOWED_DOMAINS = ['127.0.0.1']
+    ROBOTS_CACHE_PATH = None  # Caché de robots.txt solo en memoria
+
+    def __init__(self, min_interval=0.0, max_por_minuto=10_000):
+        # Antes de inicializar: el limitador de tasa se crea con estos valores
+        self.MIN_REQUEST_INTERVAL = min_interval
+        self.MAX_REQUESTS_PER_MINUTE = max_por_minuto
+        super().__init__()
+
+    def log_scraping_activity(self, url, action, status):
+        # No ensuciar logs/ethical_audit.log con tráfico sintético
+        pass
+
+
+@contextmanager
+def scraper_contra_stub(sitio, links_json_path, validador=None):
+    """
+    Crear un MinSaludScraper apuntando al sitio local.
+
+    Parchea las constantes de configuración usadas por el módulo scraper
+    (URL inicial, dominio base y rutas de datos). El estado del
+    crawling, la caché HTTP y los PDFs se guardan junto al JSON de links.
+    """
+    import scraper as scraper_mod
+
+    links_json_path = Path(links_json_path)
+    pdf_dir = links_json_path.parent / "pdfs"
+    pdf_dir.mkdir(exist_ok=True)
+    with mock.patch.multiple(
+        scraper_mod,
+        URL_INICIAL=sitio.url_inicial,
+        DOMINIO_BASE=sitio.dominio_base,
+        LINKS_JSON_PATH=links_json_path,
+        CRAWL_STATE_PATH=links_json_path.with_suffix('.estado.sqlite3'),
+        HTTP_CACHE_PATH=links_json_path.with_suffix('.http.sqlite3'),
+        PDF_DIR=pdf_dir,
+    ):
+        instancia = scraper_mod.MinSaludScraper()
+        instancia.ethical_validator = validador or ValidadorLocal()
+        yield instancia
@@ -19,6 +19,13 @@ PDF_DIR = DATA_DIR / "pdfs"
 JSON_OUTPUT_DIR = DATA_DIR / "json_output"
 LOGS_DIR = BASE_DIR / "logs"
 LINKS_JSON_PATH = DATA_DIR / "Links_MinSalud.json"
+CRAWL_STATE_PATH = DATA_DIR / "crawl_estado.sqlite3"  # Checkpoint para reanudar el crawling
+HTTP_CACHE_PATH = DATA_DIR / "http_cache.sqlite3"  # Validadores ETag / Last-Modified
+MANIFEST_PATH = DATA_DIR / "manifiesto_pipeline.sqlite3"  # Hashes de entradas por etapa
+JSONL_OUTPUT_PATH = JSON_OUTPUT_DIR / "minsalud_textos.jsonl"  # Salida JSONL (terminar en .gz o .zst para comprimir)
+RASTER_CACHE_DIR = DATA_DIR / "cache_paginas"  # Páginas rasterizadas para OCR (PNG + índice)
+OCR_CACHE_PATH = DATA_DIR / "cache_ocr.sqlite3"  # Texto OCR por hash de página y configuración
+SEARCH_INDEX_PATH = DATA_DIR / "indice_busqueda.sqlite3"  # Índice invertido local (búsqueda sin MongoDB)
 
 # URLs del sitio web de MinSalud
 URL_INICIAL = "https://www.minsalud.gov.co/Normativa/Paginas/normativa.aspx"
@@ -29,27 +36,58 @@ if USE_ENV:
     MONGO_URI = env_config("MONGO_URI", default="mongodb://localhost:27017/")
     DB_NAME = env_config("MONGO_DB_NAME", default="minsalud_db")
     COLLECTION_NAME = env_config("MONGO_COLLECTION_NAME", default="normativa")
+    FRAGMENTOS_COLLECTION_NAME = env_config("MONGO_FRAGMENTOS_COLLECTION_NAME", default=f"{COLLECTION_NAME}_fragmentos")
 else:
     MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
     DB_NAME = os.getenv("MONGO_DB_NAME", "minsalud_db")
     COLLECTION_NAME = os.getenv("MONGO_COLLECTION_NAME", "normativa")
+    FRAGMENTOS_COLLECTION_NAME = os.getenv("MONGO_FRAGMENTOS_COLLECTION_NAME", f"{COLLECTION_NAME}_fragmentos")
+
+# Modelo fragmentado: el texto va en documentos de FRAGMENTOS_COLLECTION_NAME
+# (páginas completas hasta MONGO_FRAGMENTO_MAX_CARACTERES) y el documento de
+# COLLECTION_NAME queda sin texto; evita el límite de 16 MB por documento
+MONGO_FRAGMENTOS = False
+MONGO_FRAGMENTO_MAX_CARACTERES = 50000
+MONGO_PREVIEW_CARACTERES = 200  # Vista previa guardada con cada documento para listarlos sin leer el texto
+
+# Búsqueda de texto en consulta_mongodb.py: "mongodb" ($text) o "local" (índice SEARCH_INDEX_PATH)
+BUSQUEDA_BACKEND = "mongodb"
+
+# Backend de la capa de texto de los PDFs: "pymupdf" (rápido), "pdfminer" o "pdfplumber"
+PDF_BACKEND = "pymupdf"
+PDF_BACKENDS_RESPALDO = ["pdfminer", "pdfplumber"]  # Si el principal no está instalado o falla
 
 # Configuración de OCR
 TESSERACT_LANG = "spa"  # Idioma español
 OCR_CONFIG = "--oem 3 --psm 6"
+OCR_DPI = 200  # Resolución de rasterizado de cada página
+RASTER_CACHE_MAX_MB = 2048  # Tamaño máximo de la caché de páginas rasterizadas (0 = desactivada)
+OCR_CACHE_MAX_MB = 256  # Tamaño máximo del texto en la caché de OCR (0 = desactivada)
+OCR_WORKERS = 0  # Páginas OCR en paralelo (0 = todos los núcleos); acota también las imágenes en memoria
+OCR_MIN_CARACTERES_PAGINA = 20  # Páginas con menos texto se consideran vacías y van a OCR
+OCR_COBERTURA_IMAGEN = 0.8  # Fracción de la página cubierta por imágenes para considerarla escaneada...
+OCR_MAX_CARACTERES_PAGINA_IMAGEN = 200  # ...si además su capa de texto es más corta que esto
 
 # Configuración de solicitudes HTTP
 REQUEST_TIMEOUT = 30
 RETRY_ATTEMPTS = 3
-DELAY_BETWEEN_REQUESTS = 1  # segundos
+RETRY_BACKOFF = 2.0  # segundos antes del primer reintento ante 429/503 (se duplica en cada intento)
 
 # Configuración de procesamiento
 CHUNK_SIZE = 8192  # Para descargas de archivos
+ETAPA_TEXTO = "texto"  # Nombre de la etapa de extracción en el manifiesto
+OUTPUT_FORMAT = "json"  # "json" (un archivo por PDF) o "jsonl" (JSONL_OUTPUT_PATH, solo anexar)
 MAX_WORKERS = 4  # Para procesamiento paralelo
+EXTRACTION_WORKERS = 1  # Procesos para extraer texto de PDFs (1 = en serie, 0 = todos los núcleos)
+
+# Redacción de datos personales (Ley 1581 de 2012) en el texto extraído, antes de guardarlo
+PII_REDACCION = True
+PII_CATEGORIAS_REDACCION = ["cedula", "telefono", "email"]  # Categorías de src/escaner_pii.py a enmascarar
 
 # Configuración de logging
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+AUDIT_LOG_BACKUPS = 20  # Archivos rotados de logs/ethical_audit.log que se conservan (50 MB cada uno)
 
 # Extensiones de archivos soportadas
 ALLOWED_EXTENSIONS = {
@@ -1,13 +1,38 @@
 """
 Script para consultar documentos en MongoDB Atlas
 Permite ver y buscar documentos de MinSalud
+
+Uso:
+    python consulta_mongodb.py                  # Búsqueda según BUSQUEDA_BACKEND
+    python consulta_mongodb.py --backend local  # Búsqueda en el índice local, sin MongoDB
 """
 
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
 from pymongo import MongoClient
-from config import MONGO_URI, DB_NAME, COLLECTION_NAME
+from config import (
+    MONGO_URI, DB_NAME, COLLECTION_NAME, FRAGMENTOS_COLLECTION_NAME, MONGO_FRAGMENTOS,
+    BUSQUEDA_BACKEND, SEARCH_INDEX_PATH
+)
+from indice_busqueda import IndiceBusqueda, resaltar
 from datetime import datetime
 import json
 
+# Campos que se leen al listar: nunca el texto, solo su tamaño y la vista previa
+PROYECCION_LISTADO = {
+    '_id': 0, 'file': 1, 'file_key': 1, 'timestamp': 1, 'method': 1, 'char_count': 1, 'preview': 1
+}
+# Campos que muestra ver_documento_completo (el texto se lee aparte)
+PROYECCION_DOCUMENTO = {
+    'file': 1, 'file_key': 1, 'timestamp': 1, 'method': 1, '_uploaded_at': 1,
+    '_source_file': 1, 'char_count': 1, 'chunk_count': 1
+}
+
 def conectar_mongodb():
     """Conectar a MongoDB Atlas"""
     try:
@@ -23,13 +48,54 @@ def conectar_mongodb():
         print(f"❌ Error conectando a MongoDB: {e}")
         return None
 
+def coleccion_fragmentos(collection):
+    """Colección con los fragmentos de texto de los documentos cargados con MONGO_FRAGMENTOS"""
+    return collection.database[FRAGMENTOS_COLLECTION_NAME]
+
+def tiene_indice_texto(coleccion):
+    """La colección tiene un índice de texto (sin él, $text falla)"""
+    return any(
+        tipo == 'text'
+        for indice in coleccion.index_information().values()
+        for _, tipo in indice['key']
+    )
+
+def texto_documento(collection, doc, paginas=None):
+    """
+    Texto de un documento, completo o solo de un rango de páginas.
+    
+    Si el documento está fragmentado solo se leen de la colección de
+    fragmentos los que cubren las páginas pedidas; si no, el texto se lee
+    del propio documento cuando `doc` se obtuvo sin él.
+    
+    Args:
+        paginas (tuple, optional): (primera, última) página, empezando en 1
+    """
+    if 'text' not in doc and 'chunk_count' not in doc:
+        doc = collection.find_one({'_id': doc['_id']}, {'text': 1}) or {'text': ''}
+    if 'text' in doc:
+        texto = doc['text'] or ''
+        if paginas:
+            primera, ultima = paginas
+            texto = "\f".join(texto.split("\f")[primera - 1:ultima])
+        return texto
+    
+    filtro = {'file_key': doc['file_key']}
+    if paginas:
+        primera, ultima = paginas
+        filtro.update(page_end={'$gte': primera}, page_start={'$lte': ultima})
+    fragmentos = coleccion_fragmentos(collection).find(
+        filtro, {'_id': 0, 'text': 1}
+    ).sort('chunk', 1)
+    return "".join(fragmento['text'] for fragmento in fragmentos)
+
 def mostrar_estadisticas(collection):
     """Mostrar estadísticas de la colección"""
     print("="*60)
     print("📊 ESTADÍSTICAS DE LA COLECCIÓN")
     print("="*60)
     
-    total = collection.count_documents({})
+    total = collection.estimated_document_count()
     print(f"📁 Total de documentos: {total}")
     
     # Contar por método de extracción
@@ -44,23 +110,86 @@ def mostrar_estadisticas(collection):
     
     print("="*60 + "\n")
 
-def listar_documentos(collection, limit=10):
-    """Listar documentos con información resumida"""
+def pagina_documentos(collection, limit=10, despues_de=None):
+    """
+    Una página del listado de documentos, ordenado por (file_key, _id).
+    
+    La paginación es por rango (posterior al último de la página anterior)
+    en vez de skip(), así que cada página usa el índice (file_key, _id) y
+    cuesta lo mismo sin importar cuántas haya antes. El _id desempata los
+    documentos con la misma file_key, que así no se saltan entre páginas.
+    Solo se leen los campos de PROYECCION_LISTADO (más el _id).
+    
+    Args:
+        limit (int): Documentos por página
+        despues_de (tuple, optional): (file_key, _id) del último documento de la página anterior
+    """
+    filtro = {}
+    if despues_de is not None:
+        clave, id_ultimo = despues_de
+        filtro = {'$or': [
+            {'file_key': {'$gt': clave}},
+            {'file_key': clave, '_id': {'$gt': id_ultimo}},
+        ]}
+    proyeccion = dict(PROYECCION_LISTADO, _id=1)
+    cursor = collection.find(filtro, proyeccion).sort([('file_key', 1), ('_id', 1)]).limit(limit)
+    return list(cursor)
+
+def listar_documentos(collection, limit=10, despues_de=None, numero_inicial=1):
+    """
+    Listar una página de documentos con información resumida
+    
+    Returns:
+        tuple: (file_key, _id) para pedir la página siguiente, o None si no hay más
+    """
     print("="*60)
-    print(f"📋 LISTA DE DOCUMENTOS (primeros {limit})")
+    print(f"📋 LISTA DE DOCUMENTOS ({numero_inicial} a {numero_inicial + limit - 1})")
     print("="*60)
     
-    documentos = collection.find().limit(limit)
+    documentos = pagina_documentos(collection, limit, despues_de)
     
-    for i, doc in enumerate(documentos, 1):
+    for i, doc in enumerate(documentos, numero_inicial):
         print(f"\n{i}. {doc.get('file', 'Sin nombre')}")
         print(f"   📅 Fecha: {doc.get('timestamp', 'N/A')}")
         print(f"   🔧 Método: {doc.get('method', 'N/A')}")
-        print(f"   📝 Tamaño texto: {len(doc.get('text', ''))} caracteres")
-        texto_preview = doc.get('text', '')[:100].replace('\n', ' ')
-        print(f"   📖 Preview: {texto_preview}...")
+        print(f"   📝 Tamaño texto: {doc.get('char_count', 'N/A')} caracteres")
+        print(f"   📖 Preview: {doc.get('preview', 'N/A')}...")
+    
+    if not documentos:
+        print("\n❌ No hay más documentos")
     
     print("\n" + "="*60 + "\n")
+    if len(documentos) < limit:
+        return None
+    return documentos[-1]['file_key'], documentos[-1]['_id']
+
+def pipeline_busqueda(termino, limite=5, margen=50):
+    """
+    Aggregation de búsqueda de texto completo que devuelve solo metadata y
+    el contexto del término (`margen` caracteres a cada lado), calculado en
+    el servidor: el texto de los documentos no viaja por la red.
+    """
+    return [
+        {"$match": {"$text": {"$search": termino}}},
+        {"$sort": {"score": {"$meta": "textScore"}}},
+        {"$limit": limite},
+        {"$project": {
+            "_id": 0, "file": 1, "timestamp": 1, "chunk": 1, "page_start": 1, "page_end": 1,
+            "score": {"$meta": "textScore"},
+            "contexto": {"$let": {
+                "vars": {"pos": {"$indexOfCP": [{"$toLower": "$text"}, termino.lower()]}},
+                "in": {"$cond": [
+                    {"$gte": ["$$pos", 0]},
+                    {"$substrCP": [
+                        "$text",
+                        {"$max": [0, {"$subtract": ["$$pos", margen]}]},
+                        {"$add": [{"$min": ["$$pos", margen]}, len(termino) + margen]}
+                    ]},
+                    None
+                ]}
+            }}
+        }}
+    ]
 
 def buscar_por_texto(collection, termino):
     """Buscar documentos por texto"""
@@ -68,28 +197,30 @@ def buscar_por_texto(collection, termino):
     print(f"🔍 BÚSQUEDA: '{termino}'")
     print("="*60)
     
-    # Búsqueda de texto completo
-    resultados = collection.find(
-        {"$text": {"$search": termino}},
-        {"score": {"$meta": "textScore"}}
-    ).sort([("score", {"$meta": "textScore"})]).limit(5)
+    # Búsqueda de texto completo en los documentos con texto y, si la base
+    # se cargó con fragmentos, también en ellos
+    colecciones = [collection]
+    fragmentos = coleccion_fragmentos(collection)
+    if MONGO_FRAGMENTOS or tiene_indice_texto(fragmentos):
+        colecciones.append(fragmentos)
+    resultados = []
+    for coleccion in colecciones:
+        resultados.extend(coleccion.aggregate(pipeline_busqueda(termino)))
+    resultados.sort(key=lambda doc: doc.get('score', 0), reverse=True)
     
     count = 0
-    for doc in resultados:
+    for doc in resultados[:5]:
         count += 1
         print(f"\n{count}. {doc.get('file', 'Sin nombre')}")
         print(f"   📊 Relevancia: {doc.get('score', 0):.2f}")
-        print(f"   📅 Fecha: {doc.get('timestamp', 'N/A')}")
-        
-        # Encontrar contexto del término
-        texto = doc.get('text', '')
-        termino_lower = termino.lower()
-        pos = texto.lower().find(termino_lower)
+        if 'chunk' in doc:
+            print(f"   📑 Páginas: {doc['page_start']}-{doc['page_end']}")
+        else:
+            print(f"   📅 Fecha: {doc.get('timestamp', 'N/A')}")
         
-        if pos != -1:
-            inicio = max(0, pos - 50)
-            fin = min(len(texto), pos + len(termino) + 50)
-            contexto = texto[inicio:fin].replace('\n', ' ')
+        # Contexto del término, recortado en el servidor
+        if doc.get('contexto'):
+            contexto = doc['contexto'].replace('\n', ' ')
             print(f"   📖 Contexto: ...{contexto}...")
     
     if count == 0:
@@ -97,13 +228,45 @@ def buscar_por_texto(collection, termino):
     
     print("\n" + "="*60 + "\n")
 
-def ver_documento_completo(collection, nombre_archivo):
-    """Ver un documento completo por nombre de archivo"""
+def abrir_indice_local():
+    """Abrir el índice de búsqueda local y ponerlo al día con los textos extraídos"""
+    indice = IndiceBusqueda(SEARCH_INDEX_PATH)
+    totales = indice.actualizar_desde_salida()
+    if totales['nuevos'] or totales['actualizados'] or totales['eliminados']:
+        print(f"🔎 Índice local actualizado: {totales['nuevos']} nuevos, "
+              f"{totales['actualizados']} actualizados, {totales['eliminados']} eliminados")
+    return indice
+
+def buscar_local(indice, termino, limite=5):
+    """Buscar en el índice invertido local (BM25); "entre comillas" busca la frase exacta"""
+    print("="*60)
+    print(f"🔍 BÚSQUEDA LOCAL: '{termino}'")
+    print("="*60)
+    
+    inicio = time.perf_counter()
+    resultados = indice.buscar(termino, limite)
+    duracion = time.perf_counter() - inicio
+    
+    for count, resultado in enumerate(resultados, 1):
+        print(f"\n{count}. {resultado['file'] or resultado['clave']}")
+        print(f"   📊 Relevancia (BM25): {resultado['score']:.2f}")
+        # Extractos resaltados a partir de las ubicaciones guardadas en el índice
+        for extracto in indice.extractos(resultado['doc_id'], termino):
+            print(f"   📖 ...{resaltar(extracto)}...")
+    
+    if not resultados:
+        print("❌ No se encontraron resultados")
+    
+    print(f"\n⏱️  Búsqueda en {duracion * 1000:.1f} ms")
+    print("="*60 + "\n")
+
+def ver_documento_completo(collection, nombre_archivo, paginas=None):
+    """Ver un documento completo (o un rango de páginas) por nombre de archivo"""
     print("="*60)
     print(f"📄 DOCUMENTO COMPLETO")
     print("="*60)
     
-    doc = collection.find_one({"file": nombre_archivo})
+    doc = collection.find_one({"file": nombre_archivo}, PROYECCION_DOCUMENTO)
     
     if doc:
         print(f"\n📁 Archivo: {doc.get('file', 'N/A')}")
@@ -111,20 +274,29 @@ def ver_documento_completo(collection, nombre_archivo):
         print(f"🔧 Método: {doc.get('method', 'N/A')}")
         print(f"📤 Subido: {doc.get('_uploaded_at', 'N/A')}")
         print(f"📂 Origen: {doc.get('_source_file', 'N/A')}")
+        if paginas:
+            print(f"📑 Páginas: {paginas[0]}-{paginas[1]}")
         print(f"\n{'='*60}")
         print("📝 CONTENIDO:")
         print(f"{'='*60}\n")
-        print(doc.get('text', 'Sin contenido'))
+        print(texto_documento(collection, doc, paginas) or 'Sin contenido')
     else:
         print(f"❌ No se encontró el documento: {nombre_archivo}")
     
     print("\n" + "="*60 + "\n")
 
-def menu_interactivo():
-    """Menú interactivo para consultas"""
+def menu_interactivo(backend=BUSQUEDA_BACKEND):
+    """
+    Menú interactivo para consultas
+    
+    Args:
+        backend (str): Búsqueda de texto con "mongodb" ($text) o "local" (índice
+            invertido); con "local" la búsqueda funciona sin conexión a MongoDB
+    """
     collection = conectar_mongodb()
+    indice = None
     
-    if not collection:
+    if collection is None and backend != "local":
         return
     
     while True:
@@ -140,21 +312,32 @@ def menu_interactivo():
         
         opcion = input("\n👉 Selecciona una opción (1-5): ").strip()
         
-        if opcion == "1":
+        if opcion in ("1", "2", "4") and collection is None:
+            print("❌ Esta opción requiere conexión a MongoDB")
+        
+        elif opcion == "1":
             mostrar_estadisticas(collection)
         
         elif opcion == "2":
             try:
-                limit = input("¿Cuántos documentos mostrar? (default: 10): ").strip()
+                limit = input("¿Cuántos documentos por página? (default: 10): ").strip()
                 limit = int(limit) if limit else 10
-                listar_documentos(collection, limit)
             except ValueError:
                 print("❌ Número inválido, usando 10")
-                listar_documentos(collection, 10)
+                limit = 10
+            siguiente = listar_documentos(collection, limit)
+            numero = 1 + limit
+            while siguiente and input("➡️  ¿Ver la página siguiente? (s/N): ").strip().lower() == "s":
+                siguiente = listar_documentos(collection, limit, siguiente, numero)
+                numero += limit
         
         elif opcion == "3":
             termino = input("🔍 Ingresa término de búsqueda: ").strip()
-            if termino:
+            if termino and backend == "local":
+                if indice is None:
+                    indice = abrir_indice_local()
+                buscar_local(indice, termino)
+            elif termino:
                 buscar_por_texto(collection, termino)
             else:
                 print("❌ Debes ingresar un término")
@@ -162,17 +345,31 @@ def menu_interactivo():
         elif opcion == "4":
             nombre = input("📁 Ingresa nombre del archivo: ").strip()
             if nombre:
-                ver_documento_completo(collection, nombre)
+                rango = input("📑 Páginas (ej. 3-5, vacío = todas): ").strip()
+                try:
+                    primera, _, ultima = rango.partition("-")
+                    paginas = (int(primera), int(ultima or primera)) if rango else None
+                except ValueError:
+                    print("❌ Rango inválido, mostrando todas las páginas")
+                    paginas = None
+                ver_documento_completo(collection, nombre, paginas)
             else:
                 print("❌ Debes ingresar un nombre de archivo")
         
         elif opcion == "5":
             print("\n👋 ¡Hasta luego!\n")
+            if indice is not None:
+                indice.cerrar()
             break
         
         else:
             print("❌ Opción inválida")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["mongodb", "local"], default=BUSQUEDA_BACKEND,
+                        help="Motor de búsqueda de texto")
+    args = parser.parse_args()
+    
     # Modo interactivo por defecto
-    menu_interactivo()
+    menu_interactivo(args.backend)
@@ -17,14 +17,23 @@ Autor: MinSalud Scraper Team
 Fecha: Octubre 2025
 """
 
-import time
 import logging
+import threading
 from datetime import datetime, timedelta
 from urllib.parse import urlparse
-from typing import Dict, List, Optional
+from typing import Dict, Optional
 import requests
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+from escaner_pii import CATEGORIAS_PII, escanear
+from limitador import LimitadorHosts, host_de
+from robots import CacheRobots, ReglasRobots
+from auditoria import RegistroAuditoria
+from concurrencia import ESTADOS_SOBRECARGA, segundos_retry_after
+from config import AUDIT_LOG_BACKUPS
+
 # Configurar logger
 logger = logging.getLogger(__name__)
 
@@ -46,6 +55,22 @@ class EthicalScrapingValidator:
     MIN_REQUEST_INTERVAL = 2.0  # segundos entre peticiones
     MAX_REQUESTS_PER_MINUTE = 20
     MAX_CONCURRENT_CONNECTIONS = 5
+    # Ritmo adaptativo: los límites anteriores son el techo; ante 429/503 el
+    # ritmo del host se multiplica por RATE_BACKOFF_FACTOR y cada respuesta
+    # sana recupera RATE_RECOVERY_STEP del techo
+    RATE_BACKOFF_FACTOR = 0.5
+    RATE_RECOVERY_STEP = 0.1
+    MIN_RATE_FRACTION = 1 / 16
+    # robots.txt compilados por sitio, compartidos entre ejecuciones
+    ROBOTS_CACHE_PATH: Optional[Path] = Path(__file__).parent / "data" / "robots_cache.sqlite3"
+    ROBOTS_CACHE_TTL = timedelta(hours=24)
+    ROBOTS_RETRY_TTL = timedelta(minutes=10)  # Si no se pudo obtener el robots.txt
+    # Auditoría (JSON Lines); al superar AUDIT_LOG_MAX_BYTES se rota y se
+    # conservan los AUDIT_LOG_BACKUPS archivos rotados más recientes
+    AUDIT_LOG_PATH = Path(__file__).parent / "logs" / "ethical_audit.log"
+    AUDIT_LOG_MAX_BYTES = 50 * 1024 * 1024
+    AUDIT_LOG_BACKUPS = AUDIT_LOG_BACKUPS
+    AUDIT_FSYNC_INTERVAL = 1.0  # segundos
     USER_AGENT = "MinSaludScraper/1.0 (Educational/Research; +https://github.com/minsalud-scraper; contact@minsalud-scraper.edu.co)"
     
     # Lista blanca de dominios permitidos (sitios gubernamentales públicos)
@@ -56,20 +81,26 @@ class EthicalScrapingValidator:
         'www.datos.gov.co'
     ]
     
-    # Patrones prohibidos (datos personales, credenciales, etc.)
-    PROHIBITED_PATTERNS = [
-        r'\b\d{8,10}\b',  # Números de cédula
-        r'\b[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}\b',  # Emails (solo si son personales)
-        r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',  # Números de teléfono
-        r'\bpassword\b',  # Contraseñas
-        r'\btoken\b',  # Tokens de autenticación
-    ]
+    # Patrones prohibidos (datos personales, credenciales, etc.), definidos
+    # por categoría en escaner_pii y compilados allí en una sola expresión
+    PROHIBITED_PATTERNS = [rf'\b{pattern}\b' for pattern in CATEGORIAS_PII.values()]
     
     def __init__(self):
         """Inicializar validador ético"""
-        self.request_history: List[datetime] = []
-        self.robots_cache: Dict[str, Dict] = {}
-        self.last_request_time: Optional[datetime] = None
+        self.robots_cache = CacheRobots(self.ROBOTS_CACHE_PATH, self.USER_AGENT)
+        self._robots_aplicados: Dict[str, ReglasRobots] = {}
+        self._robots_lock = threading.Lock()
+        self._session: Optional[requests.Session] = None
+        self.audit_log = RegistroAuditoria(
+            self.AUDIT_LOG_PATH,
+            max_bytes=self.AUDIT_LOG_MAX_BYTES,
+            respaldos=self.AUDIT_LOG_BACKUPS,
+            intervalo_fsync=self.AUDIT_FSYNC_INTERVAL
+        )
+        self.limiter = self._crear_limitador()
+        self.rate_fractions: Dict[str, float] = {}
+        self._rate_lock = threading.Lock()
+        self.last_privacy_scan: Optional[Dict] = None
         
         logger.info("🛡️ Módulo de Ética y Cumplimiento Legal inicializado")
     
@@ -100,12 +131,20 @@ class EthicalScrapingValidator:
         logger.info(f"✅ Dominio permitido: {domain}")
         return True
     
-    def check_robots_txt(self, url: str) -> bool:
+    def check_robots_txt(self, url: str, session: Optional[requests.Session] = None) -> bool:
         """
         Verificar y respetar el archivo robots.txt del sitio.
         
+        El robots.txt de cada sitio se descarga una vez, se compila (regla
+        más larga, comodines `*` y `$`, Allow) y se guarda por
+        ROBOTS_CACHE_TTL en ROBOTS_CACHE_PATH, de modo que verificar cada
+        página no hace peticiones. Su Crawl-delay se agrega como límite de
+        tasa del host.
+        
         Args:
             url: URL del sitio
+            session: Sesión HTTP con la que descargar el robots.txt (para
+                reutilizar su pool de conexiones)
             
         Returns:
             True si está permitido el scraping
@@ -114,111 +153,156 @@ class EthicalScrapingValidator:
         base_url = f"{parsed.scheme}://{parsed.netloc}"
         
         # Verificar caché
-        if base_url in self.robots_cache:
-            cached = self.robots_cache[base_url]
-            if cached['timestamp'] > datetime.now() - timedelta(hours=24):
-                return cached['allowed']
+        reglas = self.robots_cache.obtener(base_url)
+        if reglas is None:
+            with self._robots_lock:
+                reglas = self.robots_cache.obtener(base_url)
+                if reglas is None:
+                    reglas = self._descargar_robots_txt(base_url, session)
+        if self._robots_aplicados.get(base_url) is not reglas:
+            self._aplicar_crawl_delay(base_url, reglas)
+        
+        allowed = reglas.permite(url)
+        if not allowed:
+            logger.warning(f"⚠️ robots.txt NO permite el acceso a {url}")
+        return allowed
+    
+    def _descargar_robots_txt(self, base_url: str, session: Optional[requests.Session]) -> ReglasRobots:
+        """
+        Descargar, compilar y guardar en caché el robots.txt de un sitio.
         
-        # Obtener robots.txt
+        Un robots.txt inexistente (4xx) permite todo. Si no se puede obtener
+        (error de red o 5xx) también se permite, pero solo por
+        ROBOTS_RETRY_TTL, y se vuelve a intentar después.
+        """
         robots_url = f"{base_url}/robots.txt"
+        session = session or self._robots_session()
         
         try:
-            response = requests.get(robots_url, timeout=10)
-            
-            if response.status_code == 404:
-                logger.info(f"ℹ️ No existe robots.txt en {base_url}")
-                self.robots_cache[base_url] = {
-                    'allowed': True,
-                    'timestamp': datetime.now()
-                }
-                return True
-            
-            # Analizar robots.txt
-            allowed = self._parse_robots_txt(response.text, url)
-            
-            self.robots_cache[base_url] = {
-                'allowed': allowed,
-                'timestamp': datetime.now()
-            }
-            
-            if allowed:
-                logger.info(f"✅ robots.txt permite el acceso a {url}")
-            else:
-                logger.warning(f"⚠️ robots.txt NO permite el acceso a {url}")
-            
-            return allowed
-            
-        except Exception as e:
+            self.rate_limit(robots_url)
+            response = session.get(robots_url, timeout=10, headers=self.get_ethical_headers())
+        except requests.exceptions.RequestException as e:
             logger.warning(f"⚠️ No se pudo verificar robots.txt: {e}")
             # En caso de error, permitir pero registrar
-            return True
-    
-    def _parse_robots_txt(self, content: str, url: str) -> bool:
-        """
-        Analizar contenido de robots.txt.
+            return self.robots_cache.guardar(base_url, None, self.ROBOTS_RETRY_TTL.total_seconds())
         
-        Args:
-            content: Contenido del archivo robots.txt
-            url: URL a verificar
-            
-        Returns:
-            True si está permitido
-        """
-        # Implementación simplificada
-        # En producción, usar biblioteca como robotparser
+        if response.status_code >= 500:
+            logger.warning(f"⚠️ No se pudo verificar robots.txt: HTTP {response.status_code} en {robots_url}")
+            return self.robots_cache.guardar(base_url, None, self.ROBOTS_RETRY_TTL.total_seconds())
         
-        lines = content.lower().split('\n')
-        user_agent_match = False
+        if response.status_code >= 400:
+            logger.info(f"ℹ️ No existe robots.txt en {base_url}")
+            contenido = ''
+        else:
+            contenido = response.text
         
-        for line in lines:
-            line = line.strip()
-            
-            if line.startswith('user-agent:'):
-                agent = line.split(':', 1)[1].strip()
-                if agent == '*' or 'minsalud' in agent.lower():
-                    user_agent_match = True
-            
-            elif user_agent_match and line.startswith('disallow:'):
-                path = line.split(':', 1)[1].strip()
-                if path and path in url:
-                    return False
+        reglas = self.robots_cache.guardar(base_url, contenido, self.ROBOTS_CACHE_TTL.total_seconds())
+        logger.info(f"✅ robots.txt de {base_url}: {len(reglas.reglas)} reglas")
+        return reglas
+    
+    def _robots_session(self) -> requests.Session:
+        """Sesión propia para descargar robots.txt cuando no se recibe una"""
+        if self._session is None:
+            self._session = requests.Session()
+        return self._session
+    
+    def _aplicar_crawl_delay(self, base_url: str, reglas: ReglasRobots) -> None:
+        """Agregar (o quitar) el Crawl-delay del sitio como límite de tasa del host"""
+        anterior = self._robots_aplicados.get(base_url)
+        self._robots_aplicados[base_url] = reglas
+        if reglas.crawl_delay:
+            self.limiter.fijar_limite(base_url, 'crawl_delay', 1.0 / reglas.crawl_delay)
+            logger.info(f"🐢 Crawl-delay de {base_url}: {reglas.crawl_delay:g}s entre peticiones")
+        elif anterior is not None and anterior.crawl_delay:
+            self.limiter.fijar_limite(base_url, 'crawl_delay', None)
+    
+    def _crear_limitador(self) -> LimitadorHosts:
+        """
+        Límites de tasa por host según MIN_REQUEST_INTERVAL y MAX_REQUESTS_PER_MINUTE.
         
-        return True
+        Ambos son cubetas de capacidad 1, es decir, un ritmo sin ráfagas: así
+        ninguna ventana de un minuto supera MAX_REQUESTS_PER_MINUTE peticiones.
+        """
+        limites = {}
+        if self.MIN_REQUEST_INTERVAL > 0:
+            limites['intervalo'] = (1.0 / self.MIN_REQUEST_INTERVAL, 1)
+        if self.MAX_REQUESTS_PER_MINUTE > 0:
+            limites['por_minuto'] = (self.MAX_REQUESTS_PER_MINUTE / 60.0, 1)
+        return LimitadorHosts(limites)
     
-    def rate_limit(self) -> None:
+    def rate_limit(self, url: Optional[str] = None) -> None:
         """
         Implementar límite de tasa de peticiones.
         
-        Espera el tiempo necesario para respetar los límites:
+        Espera el tiempo necesario para respetar los límites del host de la
+        URL (cada host tiene los suyos):
         - Mínimo 2 segundos entre peticiones
         - Máximo 20 peticiones por minuto
+        
+        Es seguro llamarlo desde varios hilos: el turno se reserva de forma
+        atómica y solo espera el hilo que llama.
+        
+        Args:
+            url: URL (o host) de la petición; sin URL se usa un límite común
         """
-        now = datetime.now()
-        
-        # Limpiar historial antiguo (más de 1 minuto)
-        self.request_history = [
-            req_time for req_time in self.request_history
-            if now - req_time < timedelta(minutes=1)
-        ]
-        
-        # Verificar límite por minuto
-        if len(self.request_history) >= self.MAX_REQUESTS_PER_MINUTE:
-            wait_time = 60 - (now - self.request_history[0]).total_seconds()
-            if wait_time > 0:
-                logger.info(f"⏸️ Límite de tasa alcanzado. Esperando {wait_time:.1f}s...")
-                time.sleep(wait_time)
-        
-        # Verificar intervalo mínimo
-        if self.last_request_time:
-            elapsed = (now - self.last_request_time).total_seconds()
-            if elapsed < self.MIN_REQUEST_INTERVAL:
-                wait_time = self.MIN_REQUEST_INTERVAL - elapsed
-                logger.debug(f"⏱️ Esperando {wait_time:.1f}s (intervalo mínimo)...")
-                time.sleep(wait_time)
-        
-        # Registrar petición
-        self.request_history.append(datetime.now())
-        self.last_request_time = datetime.now()
+        wait_time = self.limiter.reservar(url)
+        if wait_time > 0:
+            logger.debug(f"⏱️ Esperando {wait_time:.1f}s (límite de tasa)...")
+            self.limiter.dormir(wait_time)
+    
+    async def rate_limit_async(self, url: Optional[str] = None) -> None:
+        """
+        Versión asyncio de rate_limit.
+        
+        Reserva el turno de forma atómica y espera con asyncio.sleep, sin
+        bloquear las demás peticiones en vuelo.
+        """
+        wait_time = self.limiter.reservar(url)
+        if wait_time > 0:
+            logger.debug(f"⏱️ Esperando {wait_time:.1f}s (límite de tasa)...")
+            await self.limiter.dormir_async(wait_time)
+    
+    def record_response(self, url: str, status_code: int, retry_after: Optional[str] = None) -> float:
+        """
+        Adaptar el ritmo del host a la respuesta del servidor.
+        
+        Ante 429/503 el ritmo del host baja a la mitad (límite 'adaptativo'
+        del limitador) y una cabecera Retry-After pausa el host; cada
+        respuesta sana recupera una fracción del ritmo hasta volver al techo
+        del host: el más estricto de sus límites (MIN_REQUEST_INTERVAL,
+        MAX_REQUESTS_PER_MINUTE y su Crawl-delay), que nunca se supera.
+        
+        Args:
+            url: URL de la petición
+            status_code: Código HTTP de la respuesta
+            retry_after: Valor de la cabecera Retry-After, si la hay
+            
+        Returns:
+            Segundos de pausa impuestos por Retry-After (0 si no hay)
+        """
+        host = host_de(url)
+        sobrecarga = status_code in ESTADOS_SOBRECARGA
+        with self._rate_lock:
+            fraccion = self.rate_fractions.get(host, 1.0)
+            if sobrecarga:
+                nueva = max(self.MIN_RATE_FRACTION, fraccion * self.RATE_BACKOFF_FACTOR)
+            else:
+                nueva = min(1.0, fraccion + self.RATE_RECOVERY_STEP)
+            self.rate_fractions[host] = nueva
+        
+        techo = self.limiter.tasa_efectiva(url, excepto=('adaptativo',))
+        if techo and nueva != fraccion:
+            self.limiter.fijar_limite(url, 'adaptativo', techo * nueva if nueva < 1.0 else None)
+            if sobrecarga:
+                logger.warning(
+                    f"🐢 HTTP {status_code} de {host}: ritmo reducido a {techo * nueva * 60:.1f} peticiones/min"
+                )
+        
+        pausa = segundos_retry_after(retry_after) if sobrecarga else 0.0
+        if pausa > 0:
+            logger.warning(f"⏸️ {host} pidió esperar {pausa:.0f}s (Retry-After)")
+            self.limiter.pausar(url, pausa)
+        return pausa
     
     def get_ethical_headers(self) -> Dict[str, str]:
         """
@@ -241,7 +325,10 @@ class EthicalScrapingValidator:
         """
         Validar que no se estén capturando datos personales.
         
-        Según Ley 1581 de 2012 (Protección de Datos Personales)
+        Según Ley 1581 de 2012 (Protección de Datos Personales). El texto se
+        recorre una sola vez con todas las categorías de PROHIBITED_PATTERNS;
+        el detalle (conteos y posiciones por categoría) queda en
+        self.last_privacy_scan.
         
         Args:
             text: Texto a validar
@@ -249,14 +336,14 @@ class EthicalScrapingValidator:
         Returns:
             True si no contiene datos personales sensibles
         """
-        import re
+        scan = escanear(text, max_posiciones=10)
+        self.last_privacy_scan = scan
         
-        # Verificar patrones prohibidos
-        for pattern in self.PROHIBITED_PATTERNS:
-            if re.search(pattern, text, re.IGNORECASE):
-                logger.warning(f"⚠️ Posible dato personal detectado (patrón: {pattern[:20]}...)")
-                logger.warning("   Verificar cumplimiento con Ley 1581 de 2012")
-                # No bloqueamos, solo advertimos
+        if scan['total']:
+            detected = ", ".join(f"{category}: {count}" for category, count in scan['conteos'].items() if count)
+            logger.warning(f"⚠️ Posibles datos personales detectados ({detected})")
+            logger.warning("   Verificar cumplimiento con Ley 1581 de 2012")
+            # No bloqueamos, solo advertimos
         
         return True
     
@@ -264,27 +351,33 @@ class EthicalScrapingValidator:
         """
         Registrar actividad de scraping para auditoría.
         
+        El evento se encola y un hilo en segundo plano lo escribe como una
+        línea JSON en AUDIT_LOG_PATH (por lotes, con fsync periódico y
+        rotación por tamaño); el costo en el crawling es mínimo.
+        
         Args:
             url: URL accedida
             action: Acción realizada
             status: Estado de la operación
         """
-        log_entry = {
-            'timestamp': datetime.now().isoformat(),
+        self.audit_log.registrar({
             'url': url,
             'action': action,
             'status': status,
             'user_agent': self.USER_AGENT
-        }
-        
-        # Guardar en archivo de auditoría
-        audit_file = Path('logs/ethical_audit.log')
-        audit_file.parent.mkdir(exist_ok=True)
+        })
+    
+    def flush_audit_log(self, timeout: Optional[float] = None) -> bool:
+        """
+        Esperar a que la auditoría registrada esté escrita en disco.
         
-        with open(audit_file, 'a', encoding='utf-8') as f:
-            f.write(f"{log_entry}\n")
+        Al terminar el proceso se vacía automáticamente; esto sirve para
+        leer el archivo mientras el scraper sigue en marcha.
         
-        logger.debug(f"📝 Actividad registrada: {action} - {status}")
+        Returns:
+            False si no terminó dentro de `timeout`
+        """
+        return self.audit_log.vaciar(timeout)
     
     def generate_compliance_report(self) -> str:
         """
@@ -303,6 +396,7 @@ Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 CONFIGURACIÓN ÉTICA:
 - Intervalo mínimo entre peticiones: {self.MIN_REQUEST_INTERVAL}s
 - Máximo peticiones por minuto: {self.MAX_REQUESTS_PER_MINUTE}
+- Ritmo adaptativo ante 429/503 y Retry-After: ACTIVO
 - User-Agent identificable: {self.USER_AGENT}
 - Verificación robots.txt: ACTIVA
 - Control de datos personales: ACTIVO
@@ -328,7 +422,9 @@ NORMATIVA CUMPLIDA:
      - Auditoría de actividades
 
 ESTADÍSTICAS:
-- Peticiones en última hora: {len(self.request_history)}
+- Peticiones con límite de tasa: {self.limiter.adquisiciones} ({len(self.limiter)} hosts)
+- Hosts con ritmo reducido: {sum(1 for f in self.rate_fractions.values() if f < 1.0)}
+- Eventos de auditoría escritos: {self.audit_log.escritos} ({self.audit_log.rotaciones} rotaciones)
 - Dominios en caché robots.txt: {len(self.robots_cache)}
 
 PROPÓSITO DEL SCRAPING:
@@ -8,6 +8,11 @@ Uso:
     python main.py --only-download    # Solo descargar PDFs
     python main.py --only-text        # Solo extraer texto
     python main.py --only-mongo       # Solo cargar a MongoDB
+    python main.py --only-index       # Solo actualizar el índice de búsqueda local
+    python main.py --async-crawl      # Crawling con varias peticiones en vuelo
+    python main.py --reiniciar-crawl  # Ignorar el checkpoint y empezar de cero
+    python main.py --forzar           # Reprocesar textos y cargas aunque no cambien
+    python main.py --only-text --workers 4  # Extraer texto con 4 procesos
     python main.py --help             # Mostrar ayuda
 """
 
@@ -46,6 +51,32 @@ def main():
         action="store_true", 
         help="Solo cargar archivos JSON existentes a MongoDB"
     )
+    parser.add_argument(
+        "--only-index", 
+        action="store_true", 
+        help="Solo actualizar el índice de búsqueda local con los textos extraídos"
+    )
+    parser.add_argument(
+        "--async-crawl", 
+        action="store_true", 
+        help="Usar el motor de crawling asyncio (peticiones concurrentes acotadas)"
+    )
+    parser.add_argument(
+        "--reiniciar-crawl", 
+        action="store_true", 
+        help="Descartar el crawling interrumpido guardado y empezar desde URL_INICIAL"
+    )
+    parser.add_argument(
+        "--forzar", 
+        action="store_true", 
+        help="Ignorar el manifiesto y reprocesar todos los PDFs y JSON"
+    )
+    parser.add_argument(
+        "--workers", 
+        type=int, 
+        default=None, 
+        help="Procesos para extraer texto de PDFs (0 = todos los núcleos)"
+    )
     parser.add_argument(
         "--config-check", 
         action="store_true", 
@@ -70,7 +101,10 @@ def main():
             scraper.verificar_conexion_mongodb()
         elif args.only_crawl:
             print("🕷️  Ejecutando solo crawling...")
-            scraper.crawl_sitio_web()
+            scraper.crawl_sitio_web(
+                modo_async=args.async_crawl,
+                reanudar=not args.reiniciar_crawl
+            )
         elif args.only_download:
             print("📥 Ejecutando solo descarga de PDFs...")
             # Cargar links desde JSON existente
@@ -78,14 +112,22 @@ def main():
             scraper.descargar_pdfs_paralelo()
         elif args.only_text:
             print("📝 Ejecutando solo extracción de texto...")
-            scraper.procesar_pdfs_texto()
+            scraper.procesar_pdfs_texto(forzar=args.forzar, workers=args.workers)
         elif args.only_mongo:
             print("🗄️  Ejecutando solo carga a MongoDB...")
-            scraper.cargar_a_mongodb()
+            scraper.cargar_a_mongodb(forzar=args.forzar)
+        elif args.only_index:
+            print("🔎 Ejecutando solo indexación local...")
+            scraper.actualizar_indice_busqueda(forzar=args.forzar)
         else:
             # Pipeline completo
             print("🚀 Ejecutando pipeline completo...")
-            scraper.ejecutar_pipeline_completo()
+            scraper.ejecutar_pipeline_completo(
+                modo_async=args.async_crawl,
+                reanudar=not args.reiniciar_crawl,
+                forzar=args.forzar,
+                workers=args.workers
+            )
             
     except KeyboardInterrupt:
         print("\n❌ Proceso interrumpido por el usuario")
@@ -0,0 +1,225 @@
+"""
+Registro de auditoría en segundo plano
+Los eventos se encolan sin tocar el disco y un hilo escritor los guarda por
+lotes como JSON Lines, con fsync periódico, rotación por tamaño y vaciado
+garantizado al terminar el proceso
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_CERRAR = object()  # Marca de fin para el hilo escritor
+
+
+class RegistroAuditoria:
+    """
+    Escritor de eventos de auditoría (un JSON por línea).
+
+    `registrar` solo agrega el evento a una cola (sin formatear ni escribir);
+    el hilo escritor, que arranca con el primer evento, toma lo acumulado en
+    lotes de hasta `max_lote`, lo escribe con una sola llamada y hace fsync
+    como máximo cada `intervalo_fsync` segundos (y siempre al quedar
+    inactivo). Cuando el archivo supera `max_bytes` se renombra con la fecha
+    y se abre uno nuevo; con `respaldos` se conservan solo los más recientes
+    (None conserva todos). Al salir del intérprete se vacía la cola; lo que
+    se registre después de `cerrar` se escribe de forma síncrona.
+
+    Args:
+        ruta (Path): Archivo de auditoría
+        max_bytes (int): Tamaño a partir del cual se rota (0 = sin rotación)
+        respaldos (int): Archivos rotados a conservar (None = todos)
+        intervalo_fsync (float): Segundos máximos entre fsync
+        max_lote (int): Eventos por escritura
+    """
+
+    def __init__(self, ruta, max_bytes=50 * 1024 * 1024, respaldos=None, intervalo_fsync=1.0, max_lote=1000):
+        self.ruta = Path(ruta)
+        self.max_bytes = max_bytes
+        self.respaldos = respaldos
+        self.intervalo_fsync = intervalo_fsync
+        self.max_lote = max_lote
+        self.escritos = 0
+        self.lotes = 0
+        self.rotaciones = 0
+        self._cola = queue.SimpleQueue()
+        self._hilo = None
+        self._hilo_cerrando = None  # Escritor que no terminó dentro del timeout de `cerrar`
+        self._cerrado = False
+        self._lock = threading.Lock()
+        self._archivo = None
+
+    def registrar(self, evento):
+        """Encolar un evento (dict serializable a JSON); no bloquea ni escribe"""
+        self._cola.put((time.time(), evento))
+        if self._hilo is None:
+            self._iniciar()
+
+    def _iniciar(self):
+        with self._lock:
+            if self._cerrado:
+                # Sin hilo escritor: quien registra guarda lo pendiente, pero
+                # solo cuando el escritor anterior terminó de verdad
+                if self._hilo_cerrando is not None:
+                    self._hilo_cerrando.join()
+                    self._hilo_cerrando = None
+                self._drenar([])
+            elif self._hilo is None:
+                self._hilo = threading.Thread(target=self._escribir, name="auditoria", daemon=True)
+                self._hilo.start()
+                atexit.register(self.cerrar)
+
+    def vaciar(self, timeout=None):
+        """
+        Esperar a que todo lo registrado hasta ahora esté escrito y sincronizado.
+
+        Returns:
+            bool: False si no terminó dentro de `timeout`
+        """
+        if self._hilo is None:
+            return True
+        listo = threading.Event()
+        self._cola.put(listo)
+        if self._hilo is None:
+            self._iniciar()  # Se cerró entretanto: el aviso se atiende aquí
+        return listo.wait(timeout)
+
+    def cerrar(self, timeout=10.0):
+        """
+        Vaciar la cola, cerrar el archivo y detener el hilo escritor.
+
+        Returns:
+            bool: False si el escritor no terminó dentro de `timeout` (sigue
+            escribiendo; lo que se registre después espera a que termine)
+        """
+        # Todo bajo el lock: `registrar` no puede arrancar otro hilo mientras
+        # este termina, y lo que llegue después espera y se escribe en `_iniciar`
+        with self._lock:
+            self._cerrado = True
+            hilo, self._hilo = self._hilo, None
+            if hilo is not None:
+                self._cola.put(_CERRAR)
+                self._hilo_cerrando = hilo
+            if self._hilo_cerrando is None:
+                return True
+            self._hilo_cerrando.join(timeout)
+            if self._hilo_cerrando.is_alive():
+                return False  # Al salir del intérprete se vuelve a esperar
+            self._hilo_cerrando = None
+            atexit.unregister(self.cerrar)
+            return True
+
+    def _escribir(self):
+        """Bucle del hilo escritor"""
+        pendiente_fsync = False
+        ultimo_fsync = time.monotonic()
+        while True:
+            try:
+                elemento = self._cola.get(timeout=self.intervalo_fsync if pendiente_fsync else None)
+            except queue.Empty:
+                # Inactivo con datos sin sincronizar
+                self._sincronizar()
+                pendiente_fsync = False
+                ultimo_fsync = time.monotonic()
+                continue
+
+            lineas = []
+            avisos = []
+            cerrar = False
+            while True:
+                if elemento is _CERRAR:
+                    cerrar = True
+                elif isinstance(elemento, threading.Event):
+                    avisos.append(elemento)
+                else:
+                    lineas.append(self._linea(*elemento))
+                if len(lineas) >= self.max_lote:
+                    break
+                try:
+                    elemento = self._cola.get_nowait()
+                except queue.Empty:
+                    break
+
+            if lineas:
+                self._escribir_lote(lineas)
+                pendiente_fsync = True
+            if pendiente_fsync and (avisos or cerrar or time.monotonic() - ultimo_fsync >= self.intervalo_fsync):
+                self._sincronizar()
+                pendiente_fsync = False
+                ultimo_fsync = time.monotonic()
+            for aviso in avisos:
+                aviso.set()
+            if cerrar:
+                # Lo encolado después de la marca (otros hilos) también se guarda
+                self._drenar(avisos)
+                return
+
+    def _drenar(self, avisos):
+        """Escribir y sincronizar todo lo que quede en la cola y cerrar el archivo"""
+        resto = []
+        while True:
+            try:
+                elemento = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(elemento, threading.Event):
+                avisos.append(elemento)
+            elif elemento is not _CERRAR:
+                resto.append(self._linea(*elemento))
+        if resto:
+            self._escribir_lote(resto)
+            self._sincronizar()
+        for aviso in avisos:
+            aviso.set()
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+    @staticmethod
+    def _linea(instante, evento):
+        registro = {'timestamp': datetime.fromtimestamp(instante).isoformat()}
+        registro.update(evento)
+        return json.dumps(registro, ensure_ascii=False, default=str) + "\n"
+
+    def _escribir_lote(self, lineas):
+        datos = "".join(lineas).encode('utf-8')
+        try:
+            if self._archivo is None:
+                self.ruta.parent.mkdir(parents=True, exist_ok=True)
+                self._archivo = open(self.ruta, 'ab')
+            if self.max_bytes and self._archivo.tell() and self._archivo.tell() + len(datos) > self.max_bytes:
+                self._rotar()
+            self._archivo.write(datos)
+            self._archivo.flush()
+            self.escritos += len(lineas)
+            self.lotes += 1
+        except OSError as e:
+            logger.error(f"❌ No se pudo escribir la auditoría ({len(lineas)} eventos): {e}")
+
+    def _sincronizar(self):
+        if self._archivo is not None:
+            try:
+                os.fsync(self._archivo.fileno())
+            except OSError as e:
+                logger.error(f"❌ No se pudo sincronizar la auditoría: {e}")
+
+    def _rotar(self):
+        """Renombrar el archivo actual con la fecha y abrir uno nuevo"""
+        self._sincronizar()
+        self._archivo.close()
+        sello = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        os.replace(self.ruta, self.ruta.with_name(f"{self.ruta.name}.{sello}"))
+        self._archivo = open(self.ruta, 'ab')
+        self.rotaciones += 1
+        if self.respaldos is not None:
+            rotados = sorted(self.ruta.parent.glob(f"{self.ruta.name}.*"))
+            for viejo in rotados[:max(0, len(rotados) - self.respaldos)]:
+                viejo.unlink()
@@ -0,0 +1,146 @@
+"""
+Backends para la capa de texto de los PDFs
+PyMuPDF (rápido, por defecto), PDFMiner y pdfplumber con la misma interfaz
+
+Cada backend es una función `paginas_<backend>(pdf_path)` que produce, por
+página, (número de página, texto, fracción de la página cubierta por imágenes).
+"""
+
+import logging
+
+# PyMuPDF
+try:
+    import pymupdf
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    try:
+        import fitz as pymupdf
+        PYMUPDF_AVAILABLE = True
+    except ImportError:
+        PYMUPDF_AVAILABLE = False
+
+# PDFMiner
+try:
+    from pdfminer.converter import PDFPageAggregator
+    from pdfminer.layout import LAParams, LTContainer, LTImage, LTText, LTTextBox
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+    PDF_MINER_AVAILABLE = True
+except ImportError:
+    PDF_MINER_AVAILABLE = False
+
+# pdfplumber
+try:
+    import pdfplumber
+    PDFPLUMBER_AVAILABLE = True
+except ImportError:
+    PDFPLUMBER_AVAILABLE = False
+
+from config import PDF_BACKEND, PDF_BACKENDS_RESPALDO
+
+logger = logging.getLogger(__name__)
+
+
+def _cobertura(area_imagenes, area_pagina):
+    """Fracción de la página cubierta por imágenes (0 a 1)"""
+    return min(area_imagenes / area_pagina, 1.0) if area_pagina else 0.0
+
+
+def paginas_pymupdf(pdf_path):
+    """Capa de texto por página con PyMuPDF"""
+    with pymupdf.open(pdf_path) as documento:
+        for numero, pagina in enumerate(documento, 1):
+            area_imagenes = sum(
+                abs(pymupdf.Rect(info['bbox']) & pagina.rect)
+                for info in pagina.get_image_info()
+            )
+            yield numero, pagina.get_text(), _cobertura(area_imagenes, abs(pagina.rect))
+
+
+def _render_pdfminer(layout):
+    """
+    Texto de una página tal como lo escribe el TextConverter de PDFMiner,
+    más el área cubierta por imágenes.
+    """
+    partes = []
+    area_imagenes = 0.0
+
+    def render(item):
+        nonlocal area_imagenes
+        if isinstance(item, LTContainer):
+            for hijo in item:
+                render(hijo)
+        elif isinstance(item, LTText):
+            partes.append(item.get_text())
+        if isinstance(item, LTTextBox):
+            partes.append("\n")
+        elif isinstance(item, LTImage):
+            area_imagenes += item.width * item.height
+
+    render(layout)
+    return "".join(partes), area_imagenes
+
+
+def paginas_pdfminer(pdf_path):
+    """Capa de texto por página con PDFMiner (misma salida que extract_text_to_fp)"""
+    with open(pdf_path, 'rb') as file:
+        recursos = PDFResourceManager()
+        dispositivo = PDFPageAggregator(recursos, laparams=LAParams())
+        interprete = PDFPageInterpreter(recursos, dispositivo)
+        for numero, pagina in enumerate(PDFPage.get_pages(file), 1):
+            interprete.process_page(pagina)
+            layout = dispositivo.get_result()
+            texto, area_imagenes = _render_pdfminer(layout)
+            yield numero, texto, _cobertura(area_imagenes, layout.width * layout.height)
+
+
+def paginas_pdfplumber(pdf_path):
+    """Capa de texto por página con pdfplumber"""
+    with pdfplumber.open(pdf_path) as documento:
+        for numero, pagina in enumerate(documento.pages, 1):
+            texto = pagina.extract_text() or ""
+            area_imagenes = sum(imagen['width'] * imagen['height'] for imagen in pagina.images)
+            cobertura = _cobertura(area_imagenes, pagina.width * pagina.height)
+            # Liberar los objetos de la página antes de pasar a la siguiente
+            pagina.close()
+            yield numero, texto, cobertura
+
+
+BACKENDS = {
+    'pymupdf': (PYMUPDF_AVAILABLE, paginas_pymupdf),
+    'pdfminer': (PDF_MINER_AVAILABLE, paginas_pdfminer),
+    'pdfplumber': (PDFPLUMBER_AVAILABLE, paginas_pdfplumber),
+}
+
+
+def backends_en_orden(preferido=None):
+    """Backends instalados: el preferido, PDF_BACKEND y luego PDF_BACKENDS_RESPALDO"""
+    orden = [preferido, PDF_BACKEND] + list(PDF_BACKENDS_RESPALDO)
+    resultado = []
+    for nombre in filter(None, orden):
+        if nombre not in BACKENDS:
+            raise ValueError(f"Backend de PDF desconocido: {nombre} (opciones: {', '.join(BACKENDS)})")
+        if BACKENDS[nombre][0] and nombre not in resultado:
+            resultado.append(nombre)
+    return resultado
+
+
+def extraer_capa_texto(pdf_path, backend=None):
+    """
+    Extraer la capa de texto de todas las páginas con el primer backend que funcione.
+
+    Args:
+        backend (str, optional): Backend preferido (por defecto PDF_BACKEND)
+
+    Returns:
+        tuple: (nombre del backend, lista de (número de página, texto, cobertura de imágenes))
+    """
+    errores = []
+    for nombre in backends_en_orden(backend):
+        try:
+            return nombre, list(BACKENDS[nombre][1](pdf_path))
+        except Exception as e:
+            logger.warning(f"{nombre} falló en {pdf_path}: {e}")
+            errores.append(f"{nombre}: {e}")
+
+    raise RuntimeError(f"Ningún backend de PDF pudo leer el archivo ({'; '.join(errores) or 'ninguno instalado'})")
@@ -0,0 +1,128 @@
+"""
+Caché de revalidación HTTP (ETag / Last-Modified)
+Guarda en disco los validadores de cada URL para hacer peticiones condicionales
+"""
+
+import json
+import sqlite3
+import threading
+from email.utils import formatdate
+from pathlib import Path
+
+from url_canonica import canonicalizar_url
+
+
+class CacheHTTP:
+    """
+    Metadatos HTTP por URL canónica en una base SQLite.
+    
+    Para cada URL se guardan ETag, Last-Modified, el tamaño de la última
+    respuesta completa y, opcionalmente, datos derivados (por ejemplo los
+    links extraídos de una página) para reutilizarlos cuando el servidor
+    responde 304 Not Modified. Es seguro usarla desde varios hilos.
+    """
+    
+    def __init__(self, ruta):
+        self.ruta = Path(ruta)
+        self._conn = None
+        self._lock = threading.Lock()
+        self.estadisticas = {
+            'no_modificados': 0,
+            'bytes_ahorrados': 0,
+            'descargas_completas': 0,
+        }
+    
+    def _conexion(self):
+        # Apertura diferida: no crear el archivo si nunca se usa la caché
+        if self._conn is None:
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.ruta), check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS respuestas (
+                    clave TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    tamano INTEGER NOT NULL DEFAULT 0,
+                    datos TEXT
+                )
+            """)
+            self._conn.commit()
+        return self._conn
+    
+    def obtener(self, url):
+        """Entrada guardada para la URL (dict) o None"""
+        with self._lock:
+            fila = self._conexion().execute(
+                "SELECT etag, last_modified, tamano, datos FROM respuestas WHERE clave = ?",
+                (canonicalizar_url(url),)
+            ).fetchone()
+        if not fila:
+            return None
+        etag, last_modified, tamano, datos = fila
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'tamano': tamano,
+            'datos': json.loads(datos) if datos is not None else None,
+        }
+    
+    def cabeceras_condicionales(self, url, entrada=None, mtime_local=None):
+        """
+        Cabeceras If-None-Match / If-Modified-Since para revalidar una URL.
+        
+        Args:
+            url (str): URL a revalidar
+            entrada (dict, optional): Entrada ya leída con `obtener`
+            mtime_local (float, optional): Fecha de modificación de la copia local,
+                usada como If-Modified-Since si no hay validadores guardados
+        """
+        entrada = entrada if entrada is not None else self.obtener(url)
+        cabeceras = {}
+        if entrada:
+            if entrada['etag']:
+                cabeceras['If-None-Match'] = entrada['etag']
+            if entrada['last_modified']:
+                cabeceras['If-Modified-Since'] = entrada['last_modified']
+        if not cabeceras and mtime_local is not None:
+            cabeceras['If-Modified-Since'] = formatdate(mtime_local, usegmt=True)
+        return cabeceras
+    
+    def guardar(self, url, response, tamano, datos=None):
+        """Guardar los validadores de una respuesta 200 completa"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        with self._lock:
+            self.estadisticas['descargas_completas'] += 1
+            if not etag and not last_modified:
+                return
+            conn = self._conexion()
+            conn.execute(
+                "INSERT OR REPLACE INTO respuestas (clave, etag, last_modified, tamano, datos) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    canonicalizar_url(url), etag, last_modified, tamano,
+                    json.dumps(datos, ensure_ascii=False) if datos is not None else None,
+                )
+            )
+            conn.commit()
+    
+    def registrar_no_modificado(self, url, entrada=None, tamano=None):
+        """
+        Contabilizar una respuesta 304.
+        
+        Returns:
+            int: Bytes que no fue necesario descargar
+        """
+        if tamano is None:
+            entrada = entrada if entrada is not None else self.obtener(url)
+            tamano = entrada['tamano'] if entrada else 0
+        with self._lock:
+            self.estadisticas['no_modificados'] += 1
+            self.estadisticas['bytes_ahorrados'] += tamano
+        return tamano
+    
+    def cerrar(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,142 @@
+"""
+Base común de las cachés SQLite con expulsión LRU acotada por tamaño
+Conexión por proceso, contadores compartidos y expulsión de las entradas
+usadas hace más tiempo; cada caché define su clave y su contenido
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+CONTADORES = ('aciertos', 'fallos', 'expulsiones')
+
+
+class CacheLRU:
+    """
+    Entradas (clave, contenido, tamaño, último uso) en una tabla SQLite.
+
+    Al superar `max_bytes` (la suma de los tamaños) se borran las entradas
+    usadas hace más tiempo. Los contadores de aciertos, fallos y expulsiones
+    viven en la misma base, así que suman lo que hacen todos los procesos.
+    Es segura desde varios hilos y varios procesos.
+
+    Las subclases definen TABLA y CONTENIDO (nombre de la columna con el
+    contenido o su referencia) y pueden redefinir `_al_expulsar` para
+    liberar lo que el contenido referencia.
+
+    Args:
+        ruta (Path): Archivo SQLite
+        max_bytes (int): Tamaño máximo de lo guardado
+    """
+
+    TABLA = None
+    CONTENIDO = None
+
+    def __init__(self, ruta, max_bytes):
+        self.ruta = Path(ruta)
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _conexion(self):
+        # Una conexión por proceso: los workers del pool la abren de nuevo tras el fork
+        if self._conn is None or self._pid != os.getpid():
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.ruta), timeout=30, check_same_thread=False)
+            self._pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.TABLA} (
+                    clave TEXT PRIMARY KEY,
+                    {self.CONTENIDO} TEXT NOT NULL,
+                    tamano INTEGER NOT NULL,
+                    usado REAL NOT NULL
+                )
+            """)
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.TABLA}_usado ON {self.TABLA} (usado)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS contadores (
+                    nombre TEXT PRIMARY KEY,
+                    valor INTEGER NOT NULL
+                )
+            """)
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO contadores (nombre, valor) VALUES (?, 0)",
+                [(nombre,) for nombre in CONTADORES]
+            )
+            self._conn.commit()
+        return self._conn
+
+    def _contar(self, conn, nombre, cantidad=1):
+        conn.execute("UPDATE contadores SET valor = valor + ? WHERE nombre = ?", (cantidad, nombre))
+
+    def _leer(self, conn, clave):
+        """Contenido guardado para la clave, o None"""
+        fila = conn.execute(
+            f"SELECT {self.CONTENIDO} FROM {self.TABLA} WHERE clave = ?", (clave,)
+        ).fetchone()
+        return fila[0] if fila else None
+
+    def _uso(self, conn, clave, acierto):
+        """Contar un acierto (y marcar la entrada como recién usada) o un fallo"""
+        if acierto:
+            conn.execute(f"UPDATE {self.TABLA} SET usado = ? WHERE clave = ?", (time.time(), clave))
+            self._contar(conn, 'aciertos')
+        else:
+            self._contar(conn, 'fallos')
+
+    def _olvidar(self, conn, clave):
+        conn.execute(f"DELETE FROM {self.TABLA} WHERE clave = ?", (clave,))
+
+    def _insertar(self, conn, clave, contenido, tamano):
+        """Guardar una entrada y expulsar las menos usadas si hace falta"""
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.TABLA} (clave, {self.CONTENIDO}, tamano, usado) VALUES (?, ?, ?, ?)",
+            (clave, contenido, tamano, time.time())
+        )
+        self._expulsar(conn)
+
+    def _expulsar(self, conn):
+        """Borrar entradas, de la usada hace más tiempo a la más reciente, hasta caber en max_bytes"""
+        total = conn.execute(f"SELECT COALESCE(SUM(tamano), 0) FROM {self.TABLA}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        expulsadas = []
+        for clave, contenido, tamano in conn.execute(
+            f"SELECT clave, {self.CONTENIDO}, tamano FROM {self.TABLA} ORDER BY usado"
+        ):
+            if total <= self.max_bytes:
+                break
+            expulsadas.append(clave)
+            total -= tamano
+            self._al_expulsar(contenido)
+
+        conn.executemany(f"DELETE FROM {self.TABLA} WHERE clave = ?", [(clave,) for clave in expulsadas])
+        self._contar(conn, 'expulsiones', len(expulsadas))
+
+    def _al_expulsar(self, contenido):
+        """Liberar lo que referencia una entrada expulsada (nada por defecto)"""
+
+    def contadores(self):
+        """Aciertos, fallos y expulsiones acumulados, más el tamaño actual de la caché"""
+        resultado = dict.fromkeys(CONTADORES, 0)
+        resultado.update(entradas=0, bytes=0)
+        if not self.ruta.exists():
+            return resultado
+        with self._lock:
+            conn = self._conexion()
+            resultado.update(conn.execute("SELECT nombre, valor FROM contadores").fetchall())
+            resultado['entradas'], resultado['bytes'] = conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM {self.TABLA}"
+            ).fetchone()
+        return resultado
+
+    def cerrar(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
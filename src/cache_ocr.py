@@ -0,0 +1,52 @@
+"""
+Caché persistente de resultados de OCR
+Indexada por el hash de los píxeles de la página y la configuración de Tesseract
+"""
+
+import hashlib
+
+from cache_lru import CacheLRU
+
+
+def clave_ocr(imagen, lang, config):
+    """
+    Clave de una página para la caché de OCR.
+
+    Combina el SHA-256 de los píxeles (con modo y tamaño de la imagen) con
+    el idioma y la configuración de Tesseract: la misma portada o membrete
+    rasterizado igual en otro PDF reutiliza el texto, pero cambiar OCR_CONFIG
+    o TESSERACT_LANG invalida los resultados anteriores.
+    """
+    h = hashlib.sha256(f"{imagen.mode}|{imagen.size}|{lang}|{config}|".encode())
+    h.update(imagen.tobytes())
+    return h.hexdigest()
+
+
+class CacheOCR(CacheLRU):
+    """
+    Texto OCR por página en una base SQLite con expulsión LRU por tamaño.
+
+    Al superar `max_bytes` de texto guardado se borran las entradas usadas
+    hace más tiempo. Los contadores de aciertos, fallos y expulsiones se
+    guardan en la misma base para sumar lo que hacen todos los procesos.
+    Es segura desde varios hilos y varios procesos.
+    """
+
+    TABLA = "textos"
+    CONTENIDO = "texto"
+
+    def obtener(self, clave):
+        """Texto guardado para la clave, o None"""
+        with self._lock:
+            conn = self._conexion()
+            texto = self._leer(conn, clave)
+            self._uso(conn, clave, texto is not None)
+            conn.commit()
+        return texto
+
+    def guardar(self, clave, texto):
+        """Guardar el texto de una página y expulsar las entradas menos usadas si hace falta"""
+        with self._lock:
+            conn = self._conexion()
+            self._insertar(conn, clave, texto, len(texto.encode('utf-8')))
+            conn.commit()
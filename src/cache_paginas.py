@@ -0,0 +1,81 @@
+"""
+Caché en disco de páginas rasterizadas para OCR
+Las imágenes se guardan como PNG, indexadas por (hash del PDF, página, DPI)
+"""
+
+import os
+import threading
+from pathlib import Path
+
+from cache_lru import CacheLRU
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+class CachePaginas(CacheLRU):
+    """
+    Páginas rasterizadas en disco con expulsión LRU acotada por tamaño.
+
+    El índice (SQLite) guarda, por página, el archivo PNG, su tamaño y el
+    último uso; al superar `max_bytes` se borran las páginas usadas hace más
+    tiempo. Los contadores de aciertos y fallos también viven en el índice,
+    así que suman lo que hacen todos los procesos de extracción. Es segura
+    desde varios hilos y varios procesos.
+    """
+
+    TABLA = "paginas"
+    CONTENIDO = "archivo"
+
+    def __init__(self, directorio, max_bytes):
+        self.directorio = Path(directorio)
+        super().__init__(self.directorio / "indice.sqlite3", max_bytes)
+
+    @staticmethod
+    def clave(huella_pdf, pagina, dpi):
+        return f"{huella_pdf}_{pagina:05d}_{dpi}"
+
+    def obtener(self, huella_pdf, pagina, dpi):
+        """Imagen PIL de la página si está en caché, o None"""
+        clave = self.clave(huella_pdf, pagina, dpi)
+        with self._lock:
+            conn = self._conexion()
+            archivo = self._leer(conn, clave)
+            imagen = None
+            if archivo:
+                try:
+                    imagen = Image.open(self.directorio / archivo)
+                    imagen.load()
+                except (OSError, ValueError):
+                    # Archivo borrado o truncado: olvidar la entrada y lo que quede en disco
+                    imagen = None
+                    self._olvidar(conn, clave)
+                    (self.directorio / archivo).unlink(missing_ok=True)
+            self._uso(conn, clave, imagen is not None)
+            conn.commit()
+        return imagen
+
+    def guardar(self, huella_pdf, pagina, dpi, imagen):
+        """Guardar una página rasterizada y expulsar las menos usadas si hace falta"""
+        clave = self.clave(huella_pdf, pagina, dpi)
+        archivo = f"{clave[:2]}/{clave}.png"
+        ruta = self.directorio / archivo
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+
+        # Escritura atómica: otro proceso nunca ve un PNG a medias
+        temporal = ruta.with_name(f"{ruta.name}.{os.getpid()}.{threading.get_ident()}.part")
+        imagen.save(temporal, format="PNG", compress_level=1)
+        os.replace(temporal, ruta)
+
+        with self._lock:
+            conn = self._conexion()
+            self._insertar(conn, clave, archivo, ruta.stat().st_size)
+            conn.commit()
+
+    def _al_expulsar(self, archivo):
+        try:
+            (self.directorio / archivo).unlink()
+        except FileNotFoundError:
+            pass
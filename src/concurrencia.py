@@ -0,0 +1,167 @@
+"""
+Control adaptativo de concurrencia (AIMD) según la respuesta del servidor
+El número de peticiones en vuelo sube de a poco mientras la latencia se
+mantiene cerca de la mejor observada y se reduce a la mitad ante una
+sobrecarga (429/503) o una latencia que se dispara, sin superar nunca un
+máximo fijo
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+ESTADOS_SOBRECARGA = {429, 503}
+MAX_RETRY_AFTER = 600  # segundos; una pausa mayor se acota (el ritmo ya quedó reducido)
+
+
+def segundos_retry_after(valor, ahora=None):
+    """
+    Segundos de espera pedidos por una cabecera Retry-After.
+
+    Acepta la forma en segundos ("120") y la fecha HTTP ("Wed, 21 Oct 2015
+    07:28:00 GMT"). Un valor ausente o inválido devuelve 0; el resultado se
+    acota a MAX_RETRY_AFTER.
+    """
+    if not valor:
+        return 0.0
+    valor = valor.strip()
+    if valor.isdigit():
+        segundos = float(valor)
+    else:
+        try:
+            fecha = parsedate_to_datetime(valor)
+        except (TypeError, ValueError):
+            return 0.0
+        if fecha is None or fecha.tzinfo is None:
+            return 0.0
+        segundos = fecha.timestamp() - (time.time() if ahora is None else ahora)
+    return min(max(segundos, 0.0), float(MAX_RETRY_AFTER))
+
+
+class ControladorAIMD:
+    """
+    Límite de peticiones en vuelo con aumento aditivo y reducción multiplicativa.
+
+    Cada respuesta sana suma `aumento / limite` (en total, +`aumento` por
+    cada ronda completa de peticiones en vuelo); una sobrecarga o una
+    latencia media mayor que `umbral_latencia` veces la latencia base
+    multiplica el límite por `factor`. Las respuestas de peticiones lanzadas
+    antes de una reducción no vuelven a reducir: una ráfaga de 429 cuenta
+    como una sola señal.
+
+    La latencia base es la mínima de las últimas `ventana_base` respuestas:
+    un cambio sostenido (un servidor más lento) termina siendo lo normal,
+    mientras que la saturación se sigue detectando porque las respuestas a
+    baja concurrencia vuelven a ser rápidas.
+
+    Se puede usar desde hilos (`cupo`, que bloquea mientras no haya lugar)
+    o desde un despachador asyncio que consulte `disponible` y llame a
+    `registrar`.
+
+    Args:
+        maximo (int): Techo duro de peticiones en vuelo
+        minimo (int): Piso del límite
+        inicial (int): Límite de partida (por defecto `minimo`)
+        factor (float): Multiplicador del límite en cada reducción
+        aumento (float): Incremento del límite por ronda sana
+        umbral_latencia (float): Múltiplo de la latencia base que se considera lentitud
+        suavizado (float): Peso de cada muestra en la latencia media (EWMA)
+        ventana_base (int): Respuestas consideradas para la latencia base
+    """
+
+    def __init__(self, maximo, minimo=1, inicial=None, factor=0.5, aumento=1.0,
+                 umbral_latencia=2.0, suavizado=0.2, ventana_base=100):
+        if maximo < 1:
+            raise ValueError(f"El máximo de concurrencia debe ser al menos 1: {maximo}")
+        self.maximo = maximo
+        self.minimo = max(1, min(minimo, maximo))
+        self.limite = float(min(maximo, max(self.minimo, inicial or self.minimo)))
+        self.factor = factor
+        self.aumento = aumento
+        self.umbral_latencia = umbral_latencia
+        self.suavizado = suavizado
+        self.ventana_base = ventana_base
+        self.latencia_base = None
+        self.latencia_media = None
+        self._muestras = 0
+        self._minimos = deque()  # (número de muestra, latencia) crecientes: mínimo de la ventana
+        self.en_vuelo = 0
+        self.max_en_vuelo = 0
+        self.reducciones = 0
+        self._epoca = 0
+        self._cond = threading.Condition()
+
+    @property
+    def disponible(self):
+        """Hay lugar para otra petición"""
+        return self.en_vuelo < int(self.limite)
+
+    def iniciar(self):
+        """Registrar una petición lanzada (sin esperar); devuelve su época"""
+        with self._cond:
+            self.en_vuelo += 1
+            self.max_en_vuelo = max(self.max_en_vuelo, self.en_vuelo)
+            return self._epoca
+
+    def adquirir(self):
+        """Esperar lugar para otra petición (desde un hilo); devuelve su época"""
+        with self._cond:
+            while not self.disponible:
+                self._cond.wait()
+            self.en_vuelo += 1
+            self.max_en_vuelo = max(self.max_en_vuelo, self.en_vuelo)
+            return self._epoca
+
+    def registrar(self, epoca, latencia=None, sobrecarga=False):
+        """
+        Registrar el resultado de una petición y ajustar el límite.
+
+        Args:
+            epoca (int): Valor devuelto por `iniciar` / `adquirir`
+            latencia (float): Segundos hasta la respuesta (None si falló sin respuesta)
+            sobrecarga (bool): El servidor respondió 429/503 o pidió esperar
+        """
+        with self._cond:
+            self.en_vuelo -= 1
+            lento = False
+            if latencia is not None:
+                self._muestras += 1
+                while self._minimos and self._minimos[-1][1] >= latencia:
+                    self._minimos.pop()
+                self._minimos.append((self._muestras, latencia))
+                if self._minimos[0][0] <= self._muestras - self.ventana_base:
+                    self._minimos.popleft()
+                self.latencia_base = self._minimos[0][1]
+                if self.latencia_media is None:
+                    self.latencia_media = latencia
+                else:
+                    self.latencia_media += self.suavizado * (latencia - self.latencia_media)
+                lento = self.latencia_media > self.umbral_latencia * max(self.latencia_base, 1e-3)
+
+            if sobrecarga or lento:
+                if epoca == self._epoca:
+                    self.limite = max(float(self.minimo), self.limite * self.factor)
+                    self.reducciones += 1
+                    self._epoca += 1
+                    # La nueva media parte de la base: la lentitud se vuelve a medir
+                    self.latencia_media = self.latencia_base
+            elif latencia is not None:
+                self.limite = min(float(self.maximo), self.limite + self.aumento / self.limite)
+            self._cond.notify_all()
+
+    @contextmanager
+    def cupo(self):
+        """
+        Ocupar un lugar mientras dura el bloque (desde un hilo).
+
+        El bloque recibe un dict donde anotar 'latencia' y 'sobrecarga'; si
+        no anota nada (por ejemplo, por una excepción) se libera sin ajustar.
+        """
+        resultado = {'latencia': None, 'sobrecarga': False}
+        epoca = self.adquirir()
+        try:
+            yield resultado
+        finally:
+            self.registrar(epoca, resultado['latencia'], resultado['sobrecarga'])
@@ -0,0 +1,187 @@
+"""
+Escáner de datos personales (Ley 1581 de 2012)
+Todas las categorías se combinan en una sola expresión regular compilada una
+vez, de modo que cada texto se recorre en una única pasada; los textos muy
+grandes se pueden escanear por trozos con memoria acotada. `enmascarar`
+redacta los datos encontrados antes de guardar el texto
+"""
+
+import re
+
+# Categoría -> patrón. El orden define la prioridad cuando dos categorías
+# coinciden en el mismo lugar (un número de 10 dígitos se informa como cédula)
+CATEGORIAS_PII = {
+    'cedula': r'\d{8,10}',  # Números de cédula
+    'telefono': r'\d{3}[-.]?\d{3}[-.]?\d{4}',  # Números de teléfono
+    'email': r'[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}',  # Emails
+    'password': r'password',  # Contraseñas
+    'token': r'token',  # Tokens de autenticación
+}
+
+# Todos los patrones están delimitados por \b: se factoriza fuera de la alternancia
+PATRON_PII = re.compile(
+    r'\b(?:' + '|'.join(f'(?P<{categoria}>{patron})' for categoria, patron in CATEGORIAS_PII.items()) + r')\b',
+    re.IGNORECASE
+)
+
+# Misma búsqueda sin la categoría email, escrita para que el motor de re
+# descarte rápido: empieza por una clase de caracteres fija (los \b iniciales
+# y la alternancia obligan a intentar cada posición del texto) y la categoría
+# se elige con lookbehind sobre ese primer carácter. Fuera de las rachas que
+# contienen "@" encuentra exactamente lo mismo que PATRON_PII
+_PATRON_SIN_EMAIL = re.compile(
+    r'[\dPpTt](?<!\w.)(?:'
+    r'(?<=\d)(?:(?P<cedula>\d{7,9})|(?P<telefono>\d\d[-.]?\d{3}[-.]?\d{4}))'
+    r'|(?<=[Pp])(?P<password>(?i:assword))'
+    r'|(?<=[Tt])(?P<token>(?i:oken))'
+    r')(?!\w)'
+)
+
+# Caracteres que pueden formar parte de una coincidencia de cualquier categoría
+_RACHA = re.compile(r'[\w.%+@-]*')
+_CARACTERES_RACHA = set('_.%+@-')
+
+# Largo máximo que se considera para una coincidencia al escanear por trozos:
+# lo que quede a menos de esta distancia del final de un trozo espera al siguiente
+MARGEN_TROZOS = 256
+TAMANO_TROZO = 1 << 20
+
+MASCARA = "[{}]"  # Reemplazo de un dato personal: [CEDULA], [TELEFONO], [EMAIL]...
+
+
+def coincidencias(texto, inicio=0):
+    """
+    Recorrer el texto una sola vez desde `inicio`.
+
+    Cada racha de caracteres que contiene "@" se escanea con PATRON_PII; el
+    resto del texto, con _PATRON_SIN_EMAIL. Ninguna coincidencia cruza el
+    borde de una racha, así que el resultado es el mismo que el de
+    PATRON_PII.finditer(texto, inicio).
+
+    Yields:
+        tuple: (categoria, inicio, fin) en orden de aparición, sin solapamientos
+    """
+    posicion = inicio
+    arroba = texto.find('@', inicio)
+    while arroba != -1:
+        desde = arroba
+        while desde > posicion and (texto[desde - 1].isalnum() or texto[desde - 1] in _CARACTERES_RACHA):
+            desde -= 1
+        hasta = _RACHA.match(texto, arroba).end()
+        for m in _PATRON_SIN_EMAIL.finditer(texto, posicion, desde):
+            yield m.lastgroup, m.start(), m.end()
+        for m in PATRON_PII.finditer(texto, desde, hasta):
+            yield m.lastgroup, m.start(), m.end()
+        posicion = hasta
+        arroba = texto.find('@', hasta)
+
+    for m in _PATRON_SIN_EMAIL.finditer(texto, posicion):
+        yield m.lastgroup, m.start(), m.end()
+
+
+def coincidencias_en_trozos(trozos, margen=MARGEN_TROZOS):
+    """
+    Escanear un texto entregado por trozos (por ejemplo, leído de un archivo).
+
+    Solo se conserva en memoria el final del trozo anterior, así que una
+    coincidencia que cruza el borde entre dos trozos se encuentra igual que
+    en el texto completo. Las posiciones son absolutas respecto del texto
+    entero.
+
+    Args:
+        trozos: Iterable de str
+        margen (int): Largo máximo de una coincidencia
+
+    Yields:
+        tuple: (categoria, inicio, fin)
+    """
+    buffer = ""
+    base = 0  # Posición absoluta de buffer[0]
+    desde = 0  # Posición en buffer donde sigue el escaneo
+    for trozo in trozos:
+        if not trozo:
+            continue
+        buffer += trozo
+        limite = len(buffer) - margen
+        siguiente = max(desde, limite)
+        for categoria, inicio, fin in coincidencias(buffer, desde):
+            if fin > limite:
+                # Podría extenderse o cambiar con el texto que falta
+                siguiente = min(inicio, max(desde, limite))
+                break
+            yield categoria, base + inicio, base + fin
+            desde = siguiente = max(fin, limite)
+        desde = siguiente
+        # Se deja un carácter antes de `desde` para evaluar \b
+        descarte = max(desde - 1, 0)
+        buffer = buffer[descarte:]
+        base += descarte
+        desde -= descarte
+
+    for categoria, inicio, fin in coincidencias(buffer, desde):
+        yield categoria, base + inicio, base + fin
+
+
+def trozos_de_archivo(ruta, tamano=TAMANO_TROZO, encoding='utf-8'):
+    """Leer un archivo de texto en trozos de `tamano` caracteres"""
+    with open(ruta, encoding=encoding, errors='replace') as archivo:
+        while True:
+            trozo = archivo.read(tamano)
+            if not trozo:
+                return
+            yield trozo
+
+
+def resumen(hallazgos, max_posiciones=None):
+    """
+    Contar coincidencias por categoría.
+
+    Args:
+        hallazgos: Iterable de (categoria, inicio, fin)
+        max_posiciones (int): Posiciones a conservar por categoría (None = todas)
+
+    Returns:
+        dict: {'total', 'conteos': {categoria: n}, 'posiciones': {categoria: [(inicio, fin)]}}
+    """
+    conteos = {categoria: 0 for categoria in CATEGORIAS_PII}
+    posiciones = {categoria: [] for categoria in CATEGORIAS_PII}
+    for categoria, inicio, fin in hallazgos:
+        conteos[categoria] += 1
+        if max_posiciones is None or len(posiciones[categoria]) < max_posiciones:
+            posiciones[categoria].append((inicio, fin))
+    return {'total': sum(conteos.values()), 'conteos': conteos, 'posiciones': posiciones}
+
+
+def escanear(texto, max_posiciones=None):
+    """Resumen de los datos personales de un texto completo (ver `resumen`)"""
+    return resumen(coincidencias(texto), max_posiciones)
+
+
+def enmascarar(texto, categorias=None, mascara=MASCARA):
+    """
+    Reemplazar los datos personales del texto por una máscara, en una sola pasada.
+
+    Args:
+        texto (str): Texto extraído
+        categorias: Categorías a enmascarar (None = todas); las demás
+            coincidencias se dejan como están
+        mascara (str): Formato de la máscara; recibe la categoría en mayúsculas
+
+    Returns:
+        tuple: (texto enmascarado, {categoria: reemplazos} de `categorias`)
+    """
+    categorias = list(CATEGORIAS_PII) if categorias is None else list(categorias)
+    mascaras = {categoria: mascara.format(categoria.upper()) for categoria in categorias}
+    conteos = {categoria: 0 for categoria in categorias}
+    partes = []
+    posicion = 0
+    for categoria, inicio, fin in coincidencias(texto):
+        if categoria in mascaras:
+            partes.append(texto[posicion:inicio])
+            partes.append(mascaras[categoria])
+            conteos[categoria] += 1
+            posicion = fin
+    if not partes:
+        return texto, conteos
+    partes.append(texto[posicion:])
+    return "".join(partes), conteos
@@ -0,0 +1,138 @@
+"""
+Estado persistente del crawler (SQLite)
+Permite reanudar un crawling interrumpido sin volver a empezar en URL_INICIAL
+"""
+
+import sqlite3
+from pathlib import Path
+
+from frontera import FronteraCrawl
+from url_canonica import canonicalizar_url
+
+
+class EstadoCrawl:
+    """
+    Checkpoint del crawling en una base SQLite local.
+    
+    Cada página procesada se guarda en una sola transacción junto con los
+    links que descubrió, de modo que tras un KeyboardInterrupt o un fallo el
+    estado en disco siempre es consistente. Las páginas despachadas cuyo
+    resultado no llegó a guardarse siguen marcadas como pendientes y se
+    vuelven a visitar al reanudar.
+    """
+    
+    def __init__(self, ruta):
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.ruta))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                clave TEXT PRIMARY KEY,
+                valor TEXT
+            );
+            CREATE TABLE IF NOT EXISTS paginas (
+                clave TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                orden INTEGER NOT NULL,
+                visitada INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS links (
+                orden INTEGER PRIMARY KEY AUTOINCREMENT,
+                clave TEXT UNIQUE NOT NULL,
+                url TEXT NOT NULL,
+                tipo TEXT NOT NULL
+            );
+        """)
+        self.conn.commit()
+        self._orden = self._siguiente_orden()
+    
+    def _siguiente_orden(self):
+        fila = self.conn.execute("SELECT COALESCE(MAX(orden) + 1, 0) FROM paginas").fetchone()
+        return fila[0]
+    
+    def _meta(self, clave):
+        fila = self.conn.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+        return fila[0] if fila else None
+    
+    def pendiente(self, url_inicial):
+        """Indicar si hay un crawling sin terminar que empezó en `url_inicial`"""
+        return (
+            self._meta('url_inicial') == url_inicial
+            and self._meta('completado') == '0'
+        )
+    
+    def iniciar(self, url_inicial):
+        """Descartar el estado anterior y registrar un crawling nuevo"""
+        with self.conn:
+            self.conn.execute("DELETE FROM meta")
+            self.conn.execute("DELETE FROM paginas")
+            self.conn.execute("DELETE FROM links")
+            self.conn.executemany(
+                "INSERT INTO meta (clave, valor) VALUES (?, ?)",
+                [('url_inicial', url_inicial), ('completado', '0')]
+            )
+        self._orden = 0
+        self._encolar([{'url': url_inicial, 'type': 'ASPX'}])
+        self.conn.commit()
+    
+    def _encolar(self, paginas):
+        filas = []
+        for link in paginas:
+            filas.append((canonicalizar_url(link['url']), link['url'], self._orden))
+            self._orden += 1
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO paginas (clave, url, orden) VALUES (?, ?, ?)", filas
+        )
+    
+    def registrar_pagina(self, url, registrados, encolados):
+        """
+        Guardar el resultado de una página visitada.
+        
+        Args:
+            url (str): Página visitada
+            registrados (list): Links nuevos agregados a la lista de links
+            encolados (list): Páginas ASPX nuevas agregadas a la cola
+        """
+        with self.conn:
+            self.conn.execute(
+                "UPDATE paginas SET visitada = 1 WHERE clave = ?",
+                (canonicalizar_url(url),)
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO links (clave, url, tipo) VALUES (?, ?, ?)",
+                [(canonicalizar_url(l['url']), l['url'], l['type']) for l in registrados]
+            )
+            self._encolar(encolados)
+    
+    def marcar_completado(self):
+        """Marcar el crawling como terminado (el próximo empezará de cero)"""
+        with self.conn:
+            self.conn.execute("UPDATE meta SET valor = '1' WHERE clave = 'completado'")
+    
+    def restaurar(self):
+        """
+        Reconstruir la frontera y la lista de links guardadas.
+        
+        Returns:
+            tuple: (FronteraCrawl, lista de links en orden de descubrimiento)
+        """
+        frontera = FronteraCrawl()
+        links = []
+        for url, tipo in self.conn.execute("SELECT url, tipo FROM links ORDER BY orden"):
+            frontera.registrar(url)
+            links.append({'url': url, 'type': tipo})
+        
+        for url, visitada in self.conn.execute(
+            "SELECT url, visitada FROM paginas ORDER BY orden"
+        ):
+            if visitada:
+                frontera.marcar_visitada(url)
+            else:
+                frontera.encolar({'url': url, 'type': 'ASPX'})
+        
+        return frontera, links
+    
+    def cerrar(self):
+        self.conn.close()
@@ -0,0 +1,271 @@
+"""
+Extracción de texto de PDFs (capa de texto y OCR)
+Funciones a nivel de módulo para poder ejecutarlas en procesos separados
+
+La extracción es por página: se usa la capa de texto de cada página (con el
+backend configurado, ver backends_pdf) y solo las páginas vacías o que son
+una imagen escaneada pasan por OCR.
+"""
+
+import os
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from cache_paginas import CachePaginas
+from cache_ocr import CacheOCR, clave_ocr
+from manifiesto import sha256_archivo
+from backends_pdf import (
+    PYMUPDF_AVAILABLE, PDF_MINER_AVAILABLE, PDFPLUMBER_AVAILABLE, extraer_capa_texto
+)
+
+if not (PYMUPDF_AVAILABLE or PDF_MINER_AVAILABLE or PDFPLUMBER_AVAILABLE):
+    print("⚠️  Ni PyMuPDF, PDFMiner ni pdfplumber disponibles. Solo se usará OCR para PDFs.")
+
+# Importaciones para OCR
+try:
+    import pytesseract
+    from pdf2image import convert_from_path, pdfinfo_from_path
+    from PIL import Image
+    OCR_AVAILABLE = True
+except ImportError:
+    print("⚠️  OCR no disponible. Instalar: pip install pytesseract pdf2image Pillow")
+    OCR_AVAILABLE = False
+
+from config import (
+    TESSERACT_LANG, OCR_CONFIG, OCR_DPI, OCR_WORKERS, RASTER_CACHE_DIR, RASTER_CACHE_MAX_MB,
+    OCR_CACHE_PATH, OCR_CACHE_MAX_MB,
+    OCR_MIN_CARACTERES_PAGINA, OCR_COBERTURA_IMAGEN, OCR_MAX_CARACTERES_PAGINA_IMAGEN
+)
+
+logger = logging.getLogger(__name__)
+
+_cache_paginas = None
+_cache_ocr = None
+
+
+def extraer_texto_pdf_normal(pdf_path, backend=None):
+    """Extraer la capa de texto completa (PyMuPDF, PDFMiner o pdfplumber)"""
+    try:
+        _, paginas = extraer_capa_texto(pdf_path, backend)
+        texto = "\f".join(texto_pagina for _, texto_pagina, _ in paginas).strip()
+        return texto if len(texto) > 50 else None  # Mínimo 50 caracteres
+        
+    except Exception as e:
+        logger.warning(f"Capa de texto ilegible en {pdf_path}: {e}")
+        return None
+
+
+def _mapear_en_orden(executor, funcion, elementos, en_vuelo):
+    """
+    Como executor.map, pero con a lo sumo `en_vuelo` tareas pendientes.
+    
+    executor.map envía todas las tareas de inmediato; aquí la siguiente página
+    solo se rasteriza cuando se consumió el resultado de una anterior, así que
+    nunca hay más de `en_vuelo` imágenes en memoria.
+    """
+    pendientes = deque()
+    for elemento in elementos:
+        pendientes.append(executor.submit(funcion, elemento))
+        if len(pendientes) >= en_vuelo:
+            yield pendientes.popleft().result()
+    while pendientes:
+        yield pendientes.popleft().result()
+
+
+def cache_paginas():
+    """Caché de páginas rasterizadas (None si RASTER_CACHE_MAX_MB es 0)"""
+    global _cache_paginas
+    if _cache_paginas is None and RASTER_CACHE_MAX_MB > 0:
+        _cache_paginas = CachePaginas(RASTER_CACHE_DIR, RASTER_CACHE_MAX_MB * 1024 * 1024)
+    return _cache_paginas
+
+
+def cache_ocr():
+    """Caché de resultados de OCR por página (None si OCR_CACHE_MAX_MB es 0)"""
+    global _cache_ocr
+    if _cache_ocr is None and OCR_CACHE_MAX_MB > 0:
+        _cache_ocr = CacheOCR(OCR_CACHE_PATH, OCR_CACHE_MAX_MB * 1024 * 1024)
+    return _cache_ocr
+
+
+def rasterizar_pagina(pdf_path, numero, huella=None):
+    """
+    Imagen de una página (numerada desde 1) a OCR_DPI.
+    
+    Con `huella` (SHA-256 del PDF) se consulta primero la caché de páginas y
+    las páginas nuevas se guardan en ella.
+    """
+    cache = cache_paginas() if huella else None
+    if cache:
+        imagen = cache.obtener(huella, numero, OCR_DPI)
+        if imagen is not None:
+            return imagen
+    
+    imagenes = convert_from_path(pdf_path, dpi=OCR_DPI, first_page=numero, last_page=numero)
+    for sobrante in imagenes[1:]:
+        sobrante.close()
+    if cache:
+        cache.guardar(huella, numero, OCR_DPI, imagenes[0])
+    return imagenes[0]
+
+
+def ocr_pagina(pdf_path, numero, huella=None):
+    """Rasterizar y pasar por OCR una sola página (numerada desde 1)
+    
+    Las páginas idénticas (portadas, membretes, formularios de anexos) se
+    reconocen por el hash de sus píxeles y reutilizan el texto de la caché.
+    """
+    imagen = rasterizar_pagina(pdf_path, numero, huella)
+    try:
+        cache = cache_ocr()
+        if cache:
+            clave = clave_ocr(imagen, TESSERACT_LANG, OCR_CONFIG)
+            texto = cache.obtener(clave)
+            if texto is not None:
+                return texto
+        
+        texto = pytesseract.image_to_string(
+            imagen, 
+            lang=TESSERACT_LANG,
+            config=OCR_CONFIG
+        )
+        if cache:
+            cache.guardar(clave, texto)
+        return texto
+    finally:
+        # Liberar el buffer de la página antes de rasterizar la siguiente
+        imagen.close()
+
+
+def ocr_paginas(pdf_path, paginas, workers=None):
+    """
+    OCR de las páginas indicadas, en paralelo y página por página.
+    
+    Cada página se rasteriza por separado (pdftoppm y tesseract son procesos
+    externos, así que los hilos trabajan en paralelo); el pico de memoria
+    queda acotado por `workers` imágenes sin importar el número de páginas.
+    Las páginas ya rasterizadas se leen de la caché de páginas.
+    
+    Yields:
+        tuple: (número de página, texto) en el orden de `paginas`
+    """
+    if workers is None:
+        workers = OCR_WORKERS
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    
+    paginas = list(paginas)
+    huella = sha256_archivo(pdf_path) if cache_paginas() else None
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        textos = _mapear_en_orden(
+            executor, lambda numero: ocr_pagina(pdf_path, numero, huella), paginas, workers
+        )
+        yield from zip(paginas, textos)
+
+
+def extraer_texto_pdf_ocr(pdf_path, workers=None):
+    """Extraer texto usando OCR, rasterizando una página a la vez"""
+    if not OCR_AVAILABLE:
+        return None
+    
+    try:
+        total_paginas = pdfinfo_from_path(pdf_path)["Pages"]
+        texto_completo = []
+        
+        for numero, texto_pagina in ocr_paginas(pdf_path, range(1, total_paginas + 1), workers):
+            if texto_pagina.strip():
+                texto_completo.append(f"--- Página {numero} ---\n{texto_pagina}")
+        
+        texto_final = "\n\n".join(texto_completo)
+        return texto_final if len(texto_final.strip()) > 50 else None
+        
+    except Exception as e:
+        logger.warning(f"OCR falló en {pdf_path}: {e}")
+        return None
+
+
+def pagina_requiere_ocr(texto, cobertura_imagenes):
+    """Una página va a OCR si su capa de texto está vacía o es una imagen escaneada"""
+    caracteres = len(texto.strip())
+    if caracteres < OCR_MIN_CARACTERES_PAGINA:
+        return True
+    return cobertura_imagenes >= OCR_COBERTURA_IMAGEN and caracteres < OCR_MAX_CARACTERES_PAGINA_IMAGEN
+
+
+def extraer_texto_pdf(pdf_path, ocr_workers=None, backend=None):
+    """Extraer texto de PDF decidiendo el método página por página
+    
+    Se usa la capa de texto de cada página; las páginas vacías o escaneadas
+    se pasan por OCR. Las páginas se separan con \\f, como en la salida de
+    PDFMiner.
+    
+    Args:
+        ocr_workers (int, optional): Páginas OCR en paralelo (por defecto OCR_WORKERS)
+        backend (str, optional): Backend de la capa de texto (por defecto PDF_BACKEND)
+    
+    Returns:
+        tuple: (texto o None,
+                método: 'PYMUPDF' | 'PDFMINER' | 'PDFPLUMBER' | 'OCR' | 'HIBRIDO' | 'FALLIDO',
+                páginas: lista de {'page', 'method', 'char_count'})
+    """
+    archivo_nombre = os.path.basename(pdf_path)
+    textos = {}
+    metodos = {}
+    para_ocr = []
+    
+    # Capa de texto por página
+    try:
+        nombre_backend, capa_texto = extraer_capa_texto(pdf_path, backend)
+        for numero, texto_pagina, cobertura in capa_texto:
+            textos[numero] = texto_pagina
+            metodos[numero] = nombre_backend.upper()
+            if pagina_requiere_ocr(texto_pagina, cobertura):
+                para_ocr.append(numero)
+    except Exception as e:
+        logger.warning(f"Capa de texto ilegible en {pdf_path}: {e}")
+        para_ocr = None
+    
+    # OCR solo de las páginas que lo necesitan
+    if OCR_AVAILABLE and para_ocr != []:
+        try:
+            if para_ocr is None:
+                para_ocr = list(range(1, pdfinfo_from_path(pdf_path)["Pages"] + 1))
+            logger.info(f"🔍 OCR de {len(para_ocr)} página(s) de {archivo_nombre}")
+            for numero, texto_pagina in ocr_paginas(pdf_path, para_ocr, ocr_workers):
+                textos[numero] = texto_pagina
+                metodos[numero] = 'OCR'
+        except Exception as e:
+            # Las páginas ya procesadas conservan su texto
+            logger.warning(f"OCR falló en {pdf_path}: {e}")
+    
+    paginas = [
+        {'page': numero, 'method': metodos[numero], 'char_count': len(textos[numero].strip())}
+        for numero in sorted(textos)
+    ]
+    texto = "\f".join(textos[numero] for numero in sorted(textos)).strip()
+    if len(texto) <= 50:  # Mínimo 50 caracteres
+        logger.warning(f"❌ No se pudo extraer texto de: {archivo_nombre}")
+        return None, 'FALLIDO', paginas
+    
+    usados = {pagina['method'] for pagina in paginas if pagina['char_count']}
+    metodo = usados.pop() if len(usados) == 1 else 'HIBRIDO'
+    return texto, metodo, paginas
+
+
+def extraer_texto_pdf_en_proceso(pdf_path):
+    """
+    Punto de entrada para los workers del ProcessPoolExecutor.
+    
+    Nunca lanza excepciones: los errores vuelven al proceso principal como
+    texto para registrarlos en las estadísticas. El paralelismo ya está en el
+    pool de procesos, así que cada worker hace el OCR de una página a la vez.
+    
+    Returns:
+        tuple: (texto o None, método, páginas, mensaje de error o None)
+    """
+    try:
+        texto, metodo, paginas = extraer_texto_pdf(pdf_path, ocr_workers=1)
+        return texto, metodo, paginas, None
+    except Exception as e:
+        return None, 'FALLIDO', [], f"{type(e).__name__}: {e}"
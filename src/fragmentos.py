@@ -0,0 +1,69 @@
+"""
+Modelo fragmentado de documentos para MongoDB
+Divide el texto de un PDF en fragmentos acotados por páginas y tamaño,
+enlazados a un documento padre sin texto
+"""
+
+SEPARADOR_PAGINAS = "\f"
+
+
+def _corte(texto, inicio, limite):
+    """Posición donde cortar texto[inicio:limite]: tras un salto de línea o un espacio si hay uno cerca del final"""
+    minimo = inicio + (limite - inicio) // 2
+    for separador in ("\n", " "):
+        posicion = texto.rfind(separador, minimo, limite)
+        if posicion != -1:
+            return posicion + 1
+    return limite
+
+
+def dividir_en_fragmentos(texto, max_caracteres):
+    """
+    Dividir el texto en fragmentos de páginas completas de hasta `max_caracteres`.
+
+    Las páginas (separadas por "\\f") se agrupan mientras quepan; una página
+    más larga que el límite se corta en varios fragmentos. Cada fragmento es
+    exactamente texto[char_start:char_start + len(text)], así que concatenar
+    los fragmentos en orden reconstruye el texto original.
+
+    Returns:
+        list: dicts con chunk (orden desde 0), page_start, page_end, char_start y text
+    """
+    fragmentos = []
+
+    def agregar(desde, hasta, pagina_inicio, pagina_fin):
+        fragmentos.append({
+            'chunk': len(fragmentos),
+            'page_start': pagina_inicio,
+            'page_end': pagina_fin,
+            'char_start': desde,
+            'text': texto[desde:hasta],
+        })
+
+    inicio = 0  # Inicio del fragmento en curso
+    pagina_inicio = 1
+    posicion = 0  # Inicio de la página actual
+    paginas = texto.split(SEPARADOR_PAGINAS)
+    for numero, pagina in enumerate(paginas, 1):
+        # El separador queda al final de su página
+        fin_pagina = min(posicion + len(pagina) + 1, len(texto))
+        if fin_pagina - inicio > max_caracteres and posicion > inicio:
+            agregar(inicio, posicion, pagina_inicio, numero - 1)
+            inicio, pagina_inicio = posicion, numero
+        while fin_pagina - inicio > max_caracteres:
+            corte = _corte(texto, inicio, inicio + max_caracteres)
+            agregar(inicio, corte, numero, numero)
+            inicio, pagina_inicio = corte, numero
+        posicion = fin_pagina
+
+    if inicio < len(texto) or not fragmentos:
+        agregar(inicio, len(texto), pagina_inicio, len(paginas))
+    return fragmentos
+
+
+def documento_padre(data, fragmentos):
+    """Copia del documento sin el texto, con el tamaño total y el número de fragmentos"""
+    padre = {campo: valor for campo, valor in data.items() if campo != 'text'}
+    padre['char_count'] = len(data.get('text') or '')
+    padre['chunk_count'] = len(fragmentos)
+    return padre
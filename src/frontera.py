@@ -0,0 +1,86 @@
+"""
+Frontera del crawler: cola BFS con índice por URL
+Todas las operaciones (encolar, siguiente, registrar, consultas) son O(1)
+"""
+
+from collections import deque
+
+from url_canonica import canonicalizar_url
+
+
+class FronteraCrawl:
+    """
+    Cola de páginas ASPX por visitar más un índice URL → estado.
+    
+    El índice guarda, por cada URL conocida, si está encolada, visitada y/o
+    registrada en la lista de links, de modo que ninguna comprobación de
+    duplicados necesita recorrer listas. Las claves del índice son URLs
+    canónicas, así que las variantes de una misma URL cuentan una sola vez.
+    """
+    
+    ENCOLADA = 1
+    VISITADA = 2
+    REGISTRADA = 4
+    
+    def __init__(self):
+        self._cola = deque()
+        self._estado = {}
+        self.total_visitadas = 0
+    
+    def __len__(self):
+        """Número de páginas pendientes en la cola"""
+        return len(self._cola)
+    
+    def _tiene(self, clave, bandera):
+        return bool(self._estado.get(clave, 0) & bandera)
+    
+    def _marcar(self, clave, bandera):
+        self._estado[clave] = self._estado.get(clave, 0) | bandera
+    
+    def encolar(self, link):
+        """
+        Agregar una página a la cola si no está encolada ni visitada.
+        
+        Returns:
+            bool: True si se encoló
+        """
+        clave = canonicalizar_url(link['url'])
+        if self._tiene(clave, self.ENCOLADA | self.VISITADA):
+            return False
+        self._marcar(clave, self.ENCOLADA)
+        self._cola.append(link)
+        return True
+    
+    def siguiente(self):
+        """Sacar la siguiente página de la cola y marcarla como visitada (o None)"""
+        if not self._cola:
+            return None
+        link = self._cola.popleft()
+        clave = canonicalizar_url(link['url'])
+        self._estado[clave] = (self._estado[clave] & ~self.ENCOLADA) | self.VISITADA
+        self.total_visitadas += 1
+        return link
+    
+    def marcar_visitada(self, url):
+        """Marcar como visitada una página que no pasó por la cola (al restaurar estado)"""
+        clave = canonicalizar_url(url)
+        if not self._tiene(clave, self.VISITADA):
+            self._estado[clave] = (self._estado.get(clave, 0) & ~self.ENCOLADA) | self.VISITADA
+            self.total_visitadas += 1
+    
+    def registrar(self, url):
+        """
+        Marcar un link como registrado si no fue visitado ni registrado antes.
+        
+        Returns:
+            bool: True si el link es nuevo y debe agregarse a la lista de links
+        """
+        clave = canonicalizar_url(url)
+        if self._tiene(clave, self.VISITADA | self.REGISTRADA):
+            return False
+        self._marcar(clave, self.REGISTRADA)
+        return True
+    
+    def visitada(self, url):
+        """Indicar si la URL ya fue visitada"""
+        return self._tiene(canonicalizar_url(url), self.VISITADA)
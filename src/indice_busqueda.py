@@ -0,0 +1,611 @@
+"""
+Índice invertido local para búsqueda de texto completo (sin base de datos)
+Construido a partir de la salida de la extracción (JSON individuales o JSONL)
+
+- Tokenizador para español: minúsculas, sin tildes y con un stemmer liviano
+- Postings posicionales en SQLite (posiciones codificadas como varint de deltas)
+- Ranking BM25 y frases entre comillas
+- Extractos resaltados a partir de la ubicación de cada término, guardada al indexar
+- Actualización incremental: solo se reindexan los documentos que cambiaron
+"""
+
+import functools
+import hashlib
+import heapq
+import json
+import logging
+import math
+import re
+import sqlite3
+import unicodedata
+from pathlib import Path
+
+from config import JSON_OUTPUT_DIR, JSONL_OUTPUT_PATH, OUTPUT_FORMAT
+from manifiesto import sha256_archivo
+from salida_jsonl import leer_registros
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+VERSION_ESQUEMA = 2  # Un índice de otra versión se descarta y se reconstruye al actualizarlo
+TABLAS = ("postings", "textos", "documentos", "archivos")
+EXTRACTO_BYTES = 160  # Tamaño aproximado de cada extracto resaltado
+
+PATRON_PALABRA = re.compile(r"[^\W_]+")
+PATRON_FRASE = re.compile(r'"([^"]*)"')
+PATRON_ESPACIO = re.compile(r"\s")
+PATRON_ULTIMO_ESPACIO = re.compile(r"\s\S*$")
+
+STOPWORDS = frozenset("""
+a al algo algun alguna algunas alguno algunos ante antes asi aun bajo bien cada como con
+contra cual cuales cuando de del desde donde dos durante e el ella ellas ello ellos en entre
+era es esa esas ese eso esos esta estan estas este esto estos fue fueron ha han hasta hay la
+las le les lo los mas me mi mientras muy ni no nos o otra otras otro otros para pero por
+porque que quien quienes se sea ser si sin sino sobre su sus tambien tan te toda todas todo
+todos tu u un una unas uno unos y ya
+""".split())
+
+
+def plegar(palabra):
+    """Minúsculas y sin tildes ni diéresis (la ñ queda como n)"""
+    descompuesta = unicodedata.normalize('NFD', palabra.lower())
+    return "".join(c for c in descompuesta if not unicodedata.combining(c))
+
+
+def raiz(palabra):
+    """
+    Stemmer liviano para español (basado en las reglas de Savoy): quita el
+    plural de las palabras de 5 o más letras y la vocal final de las de 4 o
+    más, para que singular y plural coincidan ("niño" y "niños" quedan como
+    "nin"). "vacunaciones" y "vacunación" quedan como "vacunacion"; "leyes"
+    como "ley"; "luces" como "luz".
+    """
+    if len(palabra) < 4:
+        return palabra
+    if palabra[-1] in "oae":
+        return palabra[:-1]
+    if palabra[-1] == "s" and len(palabra) >= 5:
+        if palabra.endswith("eses"):
+            return palabra[:-2]
+        if palabra.endswith("ces"):
+            return palabra[:-3] + "z"
+        if palabra[-2] in "oae":
+            return palabra[:-2]
+    return palabra
+
+
+@functools.lru_cache(maxsize=200000)
+def normalizar_termino(palabra):
+    """Término indexado para una palabra, o None si es una stopword"""
+    plegada = plegar(palabra)
+    if plegada in STOPWORDS:
+        return None
+    return raiz(plegada)
+
+
+def _largo_utf8(texto, inicio, fin):
+    """Bytes UTF-8 de texto[inicio:fin] (casi siempre espacios y puntuación ASCII)"""
+    tramo = texto[inicio:fin]
+    return len(tramo) if tramo.isascii() else len(tramo.encode('utf-8'))
+
+
+def tokenizar_con_offsets(texto):
+    """
+    Términos del texto con su posición y su ubicación en el texto.
+
+    Las stopwords no se indexan pero ocupan posición, así que una frase
+    como "ley de salud" exige que "salud" esté dos posiciones después de "ley".
+
+    Yields:
+        tuple: (término, posición, inicio, fin), con inicio y fin en bytes
+        del texto codificado en UTF-8
+    """
+    if texto.isascii():
+        # Bytes y caracteres coinciden
+        for posicion, coincidencia in enumerate(PATRON_PALABRA.finditer(texto)):
+            termino = normalizar_termino(coincidencia.group())
+            if termino:
+                yield termino, posicion, coincidencia.start(), coincidencia.end()
+        return
+
+    byte = anterior = 0
+    for posicion, coincidencia in enumerate(PATRON_PALABRA.finditer(texto)):
+        inicio, fin = coincidencia.span()
+        palabra = coincidencia.group()
+        byte += _largo_utf8(texto, anterior, inicio)
+        largo = len(palabra) if palabra.isascii() else len(palabra.encode('utf-8'))
+        termino = normalizar_termino(palabra)
+        if termino:
+            yield termino, posicion, byte, byte + largo
+        byte += largo
+        anterior = fin
+
+
+def tokenizar(texto):
+    """
+    Términos del texto con su posición (ver tokenizar_con_offsets).
+
+    Yields:
+        tuple: (término, posición)
+    """
+    for termino, posicion, _, _ in tokenizar_con_offsets(texto):
+        yield termino, posicion
+
+
+def _agregar_varint(salida, valor):
+    while valor >= 0x80:
+        salida.append((valor & 0x7F) | 0x80)
+        valor >>= 7
+    salida.append(valor)
+
+
+def _leer_varints(datos):
+    valor = desplazamiento = 0
+    for byte in datos:
+        valor |= (byte & 0x7F) << desplazamiento
+        if byte & 0x80:
+            desplazamiento += 7
+        else:
+            yield valor
+            valor = desplazamiento = 0
+
+
+def codificar_posiciones(posiciones):
+    """Posiciones crecientes como varint de las diferencias"""
+    salida = bytearray()
+    anterior = 0
+    for posicion in posiciones:
+        _agregar_varint(salida, posicion - anterior)
+        anterior = posicion
+    return bytes(salida)
+
+
+def decodificar_posiciones(datos):
+    """Inversa de codificar_posiciones"""
+    posiciones = []
+    actual = 0
+    for delta in _leer_varints(datos):
+        actual += delta
+        posiciones.append(actual)
+    return posiciones
+
+
+def codificar_offsets(offsets):
+    """(inicio, fin) crecientes como varint de la diferencia entre inicios y del largo"""
+    salida = bytearray()
+    anterior = 0
+    for inicio, fin in offsets:
+        _agregar_varint(salida, inicio - anterior)
+        _agregar_varint(salida, fin - inicio)
+        anterior = inicio
+    return bytes(salida)
+
+
+def decodificar_offsets(datos):
+    """Inversa de codificar_offsets"""
+    valores = _leer_varints(datos)
+    offsets = []
+    inicio = 0
+    for delta, largo in zip(valores, valores):
+        inicio += delta
+        offsets.append((inicio, inicio + largo))
+    return offsets
+
+
+def resaltar(extracto, marcas=("«", "»")):
+    """Texto de un extracto en una línea, con las coincidencias entre `marcas`"""
+    partes = []
+    anterior = 0
+    for inicio, fin in extracto['coincidencias']:
+        partes += [extracto['texto'][anterior:inicio], marcas[0], extracto['texto'][inicio:fin], marcas[1]]
+        anterior = fin
+    partes.append(extracto['texto'][anterior:])
+    return " ".join("".join(partes).split())
+
+
+class IndiceBusqueda:
+    """
+    Índice invertido posicional en una base SQLite.
+
+    Cada documento viene de un archivo de origen: un JSON individual
+    (clave = nombre del archivo) o una línea del JSONL (clave =
+    "<archivo>#<doc_id>", la última línea de cada doc_id gana). Un archivo
+    cuyo tamaño y fecha no cambiaron no se vuelve a leer, y un documento
+    cuyo hash no cambió no se vuelve a tokenizar.
+
+    Cada posting guarda, además de las posiciones, dónde está cada
+    ocurrencia en el texto (en bytes UTF-8), y el texto se guarda como BLOB:
+    un extracto se lee con substr() sin cargar ni recorrer el documento.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.ruta))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != VERSION_ESQUEMA:
+            with self.conn:
+                for tabla in TABLAS:
+                    self.conn.execute(f"DROP TABLE IF EXISTS {tabla}")
+                self.conn.execute(f"PRAGMA user_version = {VERSION_ESQUEMA}")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS documentos (
+                doc_id INTEGER PRIMARY KEY,
+                clave TEXT UNIQUE NOT NULL,
+                origen TEXT NOT NULL,
+                file TEXT,
+                huella TEXT NOT NULL,
+                longitud INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS postings (
+                termino TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                posiciones BLOB NOT NULL,
+                offsets BLOB NOT NULL,
+                PRIMARY KEY (termino, doc_id)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS textos (
+                doc_id INTEGER PRIMARY KEY,
+                texto BLOB NOT NULL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings (doc_id)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS archivos (
+                origen TEXT PRIMARY KEY,
+                tamano INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL
+            )
+        """)
+        self.conn.commit()
+        self._documentos = None
+
+    def actualizar(self, json_files=(), jsonl=None):
+        """
+        Poner el índice al día con los archivos de salida de la extracción.
+
+        Args:
+            json_files: Archivos minsalud_texto_*.json
+            jsonl (Path, optional): Archivo JSONL (se ignora si no existe)
+
+        Returns:
+            dict: nuevos, actualizados, sin_cambios, eliminados y errores
+        """
+        totales = {'nuevos': 0, 'actualizados': 0, 'sin_cambios': 0, 'eliminados': 0, 'errores': 0}
+        existentes = {
+            clave: (doc_id, origen, huella)
+            for doc_id, clave, origen, huella in self.conn.execute(
+                "SELECT doc_id, clave, origen, huella FROM documentos"
+            )
+        }
+        vistas = set()
+        origenes = set()
+
+        with self.conn:
+            for ruta in json_files:
+                ruta = Path(ruta)
+                origenes.add(ruta.name)
+                vistas.add(ruta.name)
+                if self._archivo_sin_cambios(ruta) and ruta.name in existentes:
+                    totales['sin_cambios'] += 1
+                    continue
+                huella = sha256_archivo(ruta)
+                if existentes.get(ruta.name, (None, None, None))[2] == huella:
+                    totales['sin_cambios'] += 1
+                else:
+                    try:
+                        with open(ruta, 'r', encoding='utf-8') as f:
+                            data = json.load(f)
+                    except ValueError as e:
+                        # Se conserva la versión indexada antes, si la hay
+                        logger.warning(f"JSON inválido, no se indexa {ruta.name}: {e}")
+                        totales['errores'] += 1
+                        continue
+                    self._indexar(ruta.name, ruta.name, data, huella, existentes, totales)
+                self._registrar_archivo(ruta)
+
+            if jsonl is not None and Path(jsonl).exists():
+                jsonl = Path(jsonl)
+                origenes.add(jsonl.name)
+                if self._archivo_sin_cambios(jsonl):
+                    claves = [clave for clave, (_, origen, _) in existentes.items() if origen == jsonl.name]
+                    vistas.update(claves)
+                    totales['sin_cambios'] += len(claves)
+                else:
+                    vistas.update(self._actualizar_jsonl(jsonl, existentes, totales))
+                    self._registrar_archivo(jsonl)
+
+            # Documentos cuyo archivo o línea ya no existe
+            for clave, (doc_id, origen, _) in existentes.items():
+                if clave not in vistas:
+                    self._eliminar(doc_id)
+                    totales['eliminados'] += 1
+            self.conn.executemany(
+                "DELETE FROM archivos WHERE origen = ?",
+                [(origen,) for (origen,) in self.conn.execute("SELECT origen FROM archivos")
+                 if origen not in origenes]
+            )
+
+        self._documentos = None
+        return totales
+
+    def actualizar_desde_salida(self):
+        """Actualizar con la salida configurada: JSONL_OUTPUT_PATH o los JSON de JSON_OUTPUT_DIR"""
+        if OUTPUT_FORMAT == "jsonl":
+            return self.actualizar(jsonl=JSONL_OUTPUT_PATH)
+        return self.actualizar(sorted(JSON_OUTPUT_DIR.glob("minsalud_texto_*.json")))
+
+    def vaciar(self):
+        """Descartar todo lo indexado"""
+        with self.conn:
+            for tabla in TABLAS:
+                self.conn.execute(f"DELETE FROM {tabla}")
+        self._documentos = None
+
+    def _archivo_sin_cambios(self, ruta):
+        stat = ruta.stat()
+        fila = self.conn.execute(
+            "SELECT tamano, mtime_ns FROM archivos WHERE origen = ?", (ruta.name,)
+        ).fetchone()
+        return fila == (stat.st_size, stat.st_mtime_ns)
+
+    def _registrar_archivo(self, ruta):
+        stat = ruta.stat()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO archivos (origen, tamano, mtime_ns) VALUES (?, ?, ?)",
+            (ruta.name, stat.st_size, stat.st_mtime_ns)
+        )
+
+    def _actualizar_jsonl(self, jsonl, existentes, totales):
+        """Reindexar las líneas vigentes del JSONL que cambiaron; devuelve sus claves"""
+        # Primera pasada: la última línea de cada doc_id y su hash, sin guardar los textos
+        ultimas = {}
+        for numero, (registro, linea) in enumerate(leer_registros(jsonl)):
+            if registro is not None and registro.get('doc_id'):
+                ultimas[f"{jsonl.name}#{registro['doc_id']}"] = (numero, hashlib.sha256(linea).hexdigest())
+
+        pendientes = {
+            numero: (clave, huella) for clave, (numero, huella) in ultimas.items()
+            if existentes.get(clave, (None, None, None))[2] != huella
+        }
+        totales['sin_cambios'] += len(ultimas) - len(pendientes)
+        if pendientes:
+            for numero, (registro, _) in enumerate(leer_registros(jsonl)):
+                if numero in pendientes:
+                    clave, huella = pendientes[numero]
+                    self._indexar(clave, jsonl.name, registro, huella, existentes, totales)
+        return set(ultimas)
+
+    def _indexar(self, clave, origen, data, huella, existentes, totales):
+        """(Re)indexar un documento"""
+        texto = data.get('text') or ''
+        terminos = {}
+        longitud = 0
+        for termino, posicion, inicio, fin in tokenizar_con_offsets(texto):
+            posiciones, offsets = terminos.setdefault(termino, ([], []))
+            posiciones.append(posicion)
+            offsets.append((inicio, fin))
+            longitud += 1
+
+        if clave in existentes:
+            doc_id = existentes[clave][0]
+            self.conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+            self.conn.execute(
+                "UPDATE documentos SET file = ?, huella = ?, longitud = ? WHERE doc_id = ?",
+                (data.get('file'), huella, longitud, doc_id)
+            )
+            totales['actualizados'] += 1
+        else:
+            doc_id = self.conn.execute(
+                "INSERT INTO documentos (clave, origen, file, huella, longitud) VALUES (?, ?, ?, ?, ?)",
+                (clave, origen, data.get('file'), huella, longitud)
+            ).lastrowid
+            existentes[clave] = (doc_id, origen, huella)
+            totales['nuevos'] += 1
+
+        self.conn.executemany(
+            "INSERT INTO postings (termino, doc_id, tf, posiciones, offsets) VALUES (?, ?, ?, ?, ?)",
+            [(termino, doc_id, len(posiciones), codificar_posiciones(posiciones), codificar_offsets(offsets))
+             for termino, (posiciones, offsets) in terminos.items()]
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO textos (doc_id, texto) VALUES (?, ?)", (doc_id, texto.encode('utf-8'))
+        )
+
+    def _eliminar(self, doc_id):
+        self.conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM textos WHERE doc_id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM documentos WHERE doc_id = ?", (doc_id,))
+
+    def _cargar_documentos(self):
+        """doc_id → (clave, file, longitud), en memoria mientras el índice no cambie"""
+        if self._documentos is None:
+            self._documentos = {
+                doc_id: (clave, file, longitud)
+                for doc_id, clave, file, longitud in self.conn.execute(
+                    "SELECT doc_id, clave, file, longitud FROM documentos"
+                )
+            }
+            total = sum(longitud for _, _, longitud in self._documentos.values())
+            self._longitud_media = total / len(self._documentos) if self._documentos else 0.0
+        return self._documentos
+
+    def _postings(self, termino, con_posiciones=False):
+        if con_posiciones:
+            return {
+                doc_id: decodificar_posiciones(posiciones)
+                for doc_id, posiciones in self.conn.execute(
+                    "SELECT doc_id, posiciones FROM postings WHERE termino = ?", (termino,)
+                )
+            }
+        return dict(self.conn.execute("SELECT doc_id, tf FROM postings WHERE termino = ?", (termino,)))
+
+    def _documentos_con_frase(self, frase):
+        """doc_ids que contienen los términos de la frase en posiciones consecutivas"""
+        terminos = list(tokenizar(frase))
+        if not terminos:
+            return None
+        posiciones = {termino: self._postings(termino, con_posiciones=True) for termino, _ in terminos}
+        candidatos = set.intersection(*(set(docs) for docs in posiciones.values()))
+
+        # La frase empieza en p si cada término está en p + (su posición en la frase)
+        origen = terminos[0][1]
+        resultado = set()
+        for doc_id in candidatos:
+            inicios = None
+            for termino, posicion in terminos:
+                desplazadas = {p - (posicion - origen) for p in posiciones[termino][doc_id]}
+                inicios = desplazadas if inicios is None else inicios & desplazadas
+                if not inicios:
+                    break
+            if inicios:
+                resultado.add(doc_id)
+        return resultado
+
+    def buscar(self, consulta, limite=10):
+        """
+        Documentos más relevantes para la consulta según BM25.
+
+        Las partes entre comillas son frases: solo se devuelven documentos
+        que las contengan tal cual (con los mismos términos en el mismo orden).
+
+        Returns:
+            list: dicts con doc_id, clave, file y score, de mayor a menor score
+        """
+        documentos = self._cargar_documentos()
+        if not documentos:
+            return []
+
+        filtro = None
+        for frase in PATRON_FRASE.findall(consulta):
+            con_frase = self._documentos_con_frase(frase)
+            if con_frase is not None:
+                filtro = con_frase if filtro is None else filtro & con_frase
+
+        n_documentos = len(documentos)
+        puntajes = {}
+        for termino in dict.fromkeys(t for t, _ in tokenizar(consulta.replace('"', ' '))):
+            postings = self._postings(termino)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n_documentos - df + 0.5) / (df + 0.5))
+            for doc_id, tf in postings.items():
+                if filtro is not None and doc_id not in filtro:
+                    continue
+                longitud = documentos[doc_id][2]
+                norma = BM25_K1 * (1 - BM25_B + BM25_B * longitud / self._longitud_media)
+                puntajes[doc_id] = puntajes.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norma)
+
+        mejores = heapq.nlargest(limite, puntajes.items(), key=lambda item: item[1])
+        return [
+            {'doc_id': doc_id, 'clave': documentos[doc_id][0], 'file': documentos[doc_id][1], 'score': puntaje}
+            for doc_id, puntaje in mejores
+        ]
+
+    def extractos(self, doc_id, consulta, maximo=3, ancho=EXTRACTO_BYTES):
+        """
+        Ventanas del documento donde más términos de la consulta aparecen juntos.
+
+        Usa la ubicación de las ocurrencias guardada al indexar: solo se leen
+        los postings de los términos de la consulta para este documento y,
+        del texto, los bytes de cada ventana.
+
+        Args:
+            maximo (int): Número máximo de extractos (sin solaparse)
+            ancho (int): Tamaño aproximado de cada extracto en bytes
+
+        Returns:
+            list: dicts con inicio y fin (bytes del texto leídos), texto del
+            extracto sin las palabras cortadas en los bordes y coincidencias
+            ((inicio, fin) de cada término dentro de `texto`), en el orden en
+            que aparecen en el documento
+        """
+        terminos = list(dict.fromkeys(t for t, _ in tokenizar(consulta.replace('"', ' '))))
+        if not terminos:
+            return []
+        filas = self.conn.execute(
+            f"SELECT termino, offsets FROM postings WHERE doc_id = ? "
+            f"AND termino IN ({', '.join('?' * len(terminos))})",
+            (doc_id, *terminos)
+        )
+        ocurrencias = sorted(
+            (inicio, fin, termino) for termino, datos in filas for inicio, fin in decodificar_offsets(datos)
+        )
+        if not ocurrencias:
+            return []
+
+        # Candidata por cada ocurrencia: las que caben en `ancho` bytes a partir de ella
+        candidatas = []
+        j = 0
+        for i, (inicio, _, _) in enumerate(ocurrencias):
+            j = max(j, i + 1)
+            while j < len(ocurrencias) and ocurrencias[j][1] - inicio <= ancho:
+                j += 1
+            grupo = ocurrencias[i:j]
+            candidatas.append((len({termino for _, _, termino in grupo}), len(grupo), -inicio, i, j))
+
+        # Más términos distintos primero, luego más ocurrencias y luego la primera en el texto
+        elegidas = []
+        for _, _, _, i, j in sorted(candidatas, reverse=True):
+            margen = max(0, ancho - (ocurrencias[j - 1][1] - ocurrencias[i][0])) // 2
+            ventana = (max(0, ocurrencias[i][0] - margen), ocurrencias[j - 1][1] + margen)
+            if all(ventana[1] <= otra[0] or ventana[0] >= otra[1] for otra in elegidas):
+                elegidas.append(ventana)
+                if len(elegidas) == maximo:
+                    break
+
+        return [self._extracto(doc_id, inicio, fin, ocurrencias) for inicio, fin in sorted(elegidas)]
+
+    def _extracto(self, doc_id, inicio, fin, ocurrencias):
+        """Leer los bytes [inicio, fin) del texto y ubicar en ellos las ocurrencias"""
+        datos = self.conn.execute(
+            "SELECT substr(texto, ?, ?) FROM textos WHERE doc_id = ?", (inicio + 1, fin - inicio, doc_id)
+        ).fetchone()[0]
+        hasta_el_final = len(datos) < fin - inicio
+        fin = inicio + len(datos)
+        # No empezar a mitad de un carácter UTF-8 (bytes de continuación 10xxxxxx)
+        recorte = 0
+        while recorte < len(datos) and datos[recorte] & 0xC0 == 0x80:
+            recorte += 1
+        inicio += recorte
+        datos = datos[recorte:]
+        texto = datos.decode('utf-8', errors='ignore')
+
+        coincidencias = [
+            (len(datos[:a - inicio].decode('utf-8')), len(datos[:b - inicio].decode('utf-8')))
+            for a, b, _ in ocurrencias if a >= inicio and b <= fin
+        ]
+        # Descartar las palabras cortadas en los bordes
+        corte_inicio = corte_fin = None
+        if inicio > 0:
+            borde = PATRON_ESPACIO.search(texto, 0, coincidencias[0][0] if coincidencias else len(texto))
+            corte_inicio = borde.end() if borde else None
+        if not hasta_el_final:
+            borde = PATRON_ULTIMO_ESPACIO.search(texto, coincidencias[-1][1] if coincidencias else 0)
+            corte_fin = borde.start() if borde else None
+        desplazamiento = corte_inicio or 0
+        return {
+            'inicio': inicio,
+            'fin': fin,
+            'texto': texto[corte_inicio:corte_fin],
+            'coincidencias': [(a - desplazamiento, b - desplazamiento) for a, b in coincidencias],
+        }
+
+    def estadisticas(self):
+        """Documentos, términos distintos y postings del índice"""
+        return {
+            'documentos': self.conn.execute("SELECT COUNT(*) FROM documentos").fetchone()[0],
+            'terminos': self.conn.execute("SELECT COUNT(DISTINCT termino) FROM postings").fetchone()[0],
+            'postings': self.conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0],
+        }
+
+    def cerrar(self):
+        self.conn.close()
@@ -0,0 +1,171 @@
+"""
+Limitador de tasa por host con cubetas de tokens
+Cada host tiene sus propias cubetas; un turno se reserva de forma atómica
+(bajo un lock) y la espera se hace fuera del lock, con time.sleep en hilos o
+asyncio.sleep en el event loop, de modo que ningún hilo bloquea a los demás
+"""
+
+import asyncio
+import threading
+import time
+from urllib.parse import urlparse
+
+
+def host_de(url):
+    """Host (en minúsculas) de una URL; un nombre de host se devuelve tal cual"""
+    if not url:
+        return ''
+    if '//' in url:
+        return urlparse(url).netloc.lower()
+    return url.lower()
+
+
+class CubetaTokens:
+    """
+    Cubeta de `capacidad` tokens que se recarga a `tasa` tokens por segundo.
+
+    Se lleva como el instante teórico de la próxima llegada (algoritmo GCRA):
+    un turno se puede reservar por adelantado y cada reserva obtiene el
+    instante en que su token estará disponible, así que las peticiones
+    concurrentes quedan en fila sin volver a consultar. En cualquier ventana
+    de W segundos se conceden a lo sumo capacidad + tasa * W turnos.
+    """
+
+    def __init__(self, tasa, capacidad=1):
+        if tasa <= 0:
+            raise ValueError(f"La tasa debe ser positiva: {tasa}")
+        self.tasa = tasa
+        self.capacidad = max(1, int(capacidad))
+        self.intervalo = 1.0 / tasa
+        self._tolerancia = (self.capacidad - 1) * self.intervalo
+        self._llegada = float('-inf')
+
+    def turno(self, ahora):
+        """Primer instante (>= ahora) en que hay un token disponible"""
+        return max(ahora, self._llegada - self._tolerancia)
+
+    def consumir(self, instante):
+        """Gastar el token del turno `instante` (obtenido con `turno`)"""
+        self._llegada = max(self._llegada, instante) + self.intervalo
+
+    def continuar(self, anterior):
+        """Heredar las reservas pendientes de otra cubeta del mismo host"""
+        self._llegada = max(self._llegada, anterior._llegada - anterior.intervalo + self.intervalo)
+
+
+class LimitadorHosts:
+    """
+    Límites de tasa independientes por host.
+
+    Cada host recibe una copia de los `limites` por defecto ({nombre: (tasa,
+    capacidad)}); `fijar_limite` agrega o reemplaza un límite de un host
+    (por ejemplo el Crawl-delay de su robots.txt). Un turno se concede
+    cuando todas las cubetas del host tienen token, así que rige la más
+    estricta. `pausar` suspende un host durante un tiempo (Retry-After).
+
+    Args:
+        limites (dict): {nombre: (tasa en peticiones/segundo, capacidad)}
+        reloj: Función que devuelve el tiempo actual en segundos (monótono)
+        dormir: Espera bloqueante (para hilos)
+        dormir_async: Espera asyncio (corutina)
+    """
+
+    def __init__(self, limites, reloj=time.monotonic, dormir=time.sleep, dormir_async=asyncio.sleep):
+        self.limites = dict(limites)
+        self.reloj = reloj
+        self.dormir = dormir
+        self.dormir_async = dormir_async
+        self.adquisiciones = 0
+        self.espera_total = 0.0
+        self._cubetas = {}
+        self._pausas = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cubetas)
+
+    def _cubetas_host(self, host):
+        cubetas = self._cubetas.get(host)
+        if cubetas is None:
+            cubetas = {nombre: CubetaTokens(tasa, capacidad) for nombre, (tasa, capacidad) in self.limites.items()}
+            self._cubetas[host] = cubetas
+        return cubetas
+
+    def fijar_limite(self, url, nombre, tasa, capacidad=1):
+        """Agregar o reemplazar el límite `nombre` de un host (tasa None lo quita)"""
+        with self._lock:
+            cubetas = self._cubetas_host(host_de(url))
+            anterior = cubetas.pop(nombre, None)
+            if tasa is None:
+                return
+            cubeta = CubetaTokens(tasa, capacidad)
+            if anterior:
+                cubeta.continuar(anterior)
+            cubetas[nombre] = cubeta
+
+    def limite(self, url, nombre):
+        """(tasa, capacidad) del límite `nombre` de un host, o None"""
+        with self._lock:
+            cubeta = self._cubetas_host(host_de(url)).get(nombre)
+            return (cubeta.tasa, cubeta.capacidad) if cubeta else None
+
+    def tasa_efectiva(self, url, excepto=()):
+        """Tasa del límite más estricto de un host sin contar los de `excepto`, o None"""
+        with self._lock:
+            cubetas = self._cubetas_host(host_de(url))
+            return min((cubeta.tasa for nombre, cubeta in cubetas.items() if nombre not in excepto), default=None)
+
+    def pausar(self, url, segundos):
+        """No conceder turnos del host de `url` durante `segundos` (se suma a los límites)"""
+        with self._lock:
+            host = host_de(url)
+            hasta = self.reloj() + segundos
+            if hasta > self._pausas.get(host, float('-inf')):
+                self._pausas[host] = hasta
+
+    def reservar(self, url):
+        """
+        Reservar el próximo turno del host de `url` sin esperar.
+
+        Returns:
+            float: Segundos que se debe esperar antes de realizar la petición
+        """
+        with self._lock:
+            ahora = self.reloj()
+            host = host_de(url)
+            cubetas = self._cubetas_host(host).values()
+            instante = max((cubeta.turno(ahora) for cubeta in cubetas), default=ahora)
+            instante = max(instante, self._pausas.get(host, ahora))
+            for cubeta in cubetas:
+                cubeta.consumir(instante)
+            espera = instante - ahora
+            self.adquisiciones += 1
+            self.espera_total += espera
+            return espera
+
+    def intentar(self, url):
+        """Tomar un turno solo si está disponible ahora (no bloquea ni reserva)"""
+        with self._lock:
+            ahora = self.reloj()
+            host = host_de(url)
+            cubetas = self._cubetas_host(host).values()
+            if self._pausas.get(host, ahora) > ahora or any(cubeta.turno(ahora) > ahora for cubeta in cubetas):
+                return False
+            for cubeta in cubetas:
+                cubeta.consumir(ahora)
+            self.adquisiciones += 1
+            return True
+
+    def adquirir(self, url):
+        """Esperar (bloqueando solo el hilo que llama) el turno del host de `url`"""
+        espera = self.reservar(url)
+        if espera > 0:
+            self.dormir(espera)
+        return espera
+
+    async def adquirir_async(self, url):
+        """Versión asyncio de `adquirir`: espera sin bloquear el event loop"""
+        espera = self.reservar(url)
+        if espera > 0:
+            await self.dormir_async(espera)
+        return espera
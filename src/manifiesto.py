@@ -0,0 +1,145 @@
+"""
+Manifiesto de contenido del pipeline (SQLite)
+Registra, por etapa, el hash de cada entrada, la configuración con la que
+se procesó y la salida que produjo
+"""
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+BLOQUE_HASH = 1024 * 1024
+
+
+def sha256_archivo(ruta):
+    """SHA-256 de un archivo leyendo por bloques"""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(BLOQUE_HASH), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def huella_ajustes(**ajustes):
+    """SHA-256 de la configuración que determina la salida de una etapa"""
+    return hashlib.sha256(json.dumps(ajustes, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _sha256_prefijo(ruta, posicion, limite=BLOQUE_HASH):
+    """SHA-256 de los primeros min(posicion, limite) bytes de un archivo"""
+    with open(ruta, 'rb') as f:
+        return hashlib.sha256(f.read(min(posicion, limite))).hexdigest()
+
+
+class ManifiestoPipeline:
+    """
+    Manifiesto por etapa: entrada → (hash, salida).
+    
+    Una entrada cuyo hash coincide con el registrado y cuya salida sigue
+    existiendo no necesita reprocesarse, salvo que se haya procesado con
+    otros ajustes (ver `huella_ajustes`). Para no releer archivos grandes
+    en cada ejecución, el hash se reutiliza mientras el tamaño y la fecha
+    de modificación del archivo no cambien.
+    """
+    
+    def __init__(self, ruta):
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.ruta))
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS entradas (
+                etapa TEXT NOT NULL,
+                entrada TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                tamano INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                salida TEXT,
+                actualizado TEXT NOT NULL,
+                ajustes TEXT,
+                PRIMARY KEY (etapa, entrada)
+            )
+        """)
+        columnas = {fila[1] for fila in self.conn.execute("PRAGMA table_info(entradas)")}
+        if 'ajustes' not in columnas:
+            # Manifiestos anteriores: sin ajustes registrados, se reprocesan una vez
+            self.conn.execute("ALTER TABLE entradas ADD COLUMN ajustes TEXT")
+        self.conn.commit()
+    
+    def _fila(self, etapa, entrada):
+        return self.conn.execute(
+            "SELECT hash, tamano, mtime_ns, salida, ajustes FROM entradas WHERE etapa = ? AND entrada = ?",
+            (etapa, entrada)
+        ).fetchone()
+    
+    def huella(self, etapa, ruta_archivo):
+        """Hash del contenido del archivo (reutilizado si tamaño y mtime no cambiaron)"""
+        ruta_archivo = Path(ruta_archivo)
+        stat = ruta_archivo.stat()
+        fila = self._fila(etapa, ruta_archivo.name)
+        if fila and fila[1] == stat.st_size and fila[2] == stat.st_mtime_ns:
+            return fila[0]
+        return sha256_archivo(ruta_archivo)
+    
+    def salida_vigente(self, etapa, ruta_archivo, huella, ajustes=None):
+        """Salida registrada para la entrada si ni su hash ni los ajustes cambiaron (o None)"""
+        fila = self._fila(etapa, Path(ruta_archivo).name)
+        if fila and fila[0] == huella and fila[4] == ajustes:
+            return fila[3]
+        return None
+    
+    def salidas(self, etapa):
+        """Diccionario entrada → salida de todas las entradas de una etapa"""
+        return dict(self.conn.execute(
+            "SELECT entrada, salida FROM entradas WHERE etapa = ?", (etapa,)
+        ))
+    
+    def registrar(self, etapa, ruta_archivo, huella, salida, ajustes=None):
+        """Registrar que la entrada con este hash produjo `salida` con estos ajustes"""
+        ruta_archivo = Path(ruta_archivo)
+        stat = ruta_archivo.stat()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entradas "
+                "(etapa, entrada, hash, tamano, mtime_ns, salida, actualizado, ajustes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (etapa, ruta_archivo.name, huella, stat.st_size, stat.st_mtime_ns,
+                 salida, datetime.now().isoformat(), ajustes)
+            )
+    
+    def posicion(self, etapa, ruta_archivo):
+        """
+        Bytes ya procesados de un archivo de solo-anexado (0 si nunca se procesó).
+        
+        Si el archivo se reescribió (es más corto, o su comienzo ya no coincide
+        con el hash registrado) se vuelve a empezar desde 0.
+        """
+        ruta_archivo = Path(ruta_archivo)
+        fila = self._fila(etapa, ruta_archivo.name)
+        if not fila or not ruta_archivo.exists():
+            return 0
+        posicion = fila[1]
+        if ruta_archivo.stat().st_size < posicion or fila[0] != _sha256_prefijo(ruta_archivo, posicion):
+            return 0
+        return posicion
+    
+    def registrar_posicion(self, etapa, ruta_archivo, posicion):
+        """Registrar que un archivo de solo-anexado se procesó hasta `posicion` bytes"""
+        ruta_archivo = Path(ruta_archivo)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entradas "
+                "(etapa, entrada, hash, tamano, mtime_ns, salida, actualizado) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (etapa, ruta_archivo.name, _sha256_prefijo(ruta_archivo, posicion), posicion,
+                 ruta_archivo.stat().st_mtime_ns, None, datetime.now().isoformat())
+            )
+    
+    def olvidar_etapa(self, etapa):
+        """Descartar todo lo registrado para una etapa"""
+        with self.conn:
+            self.conn.execute("DELETE FROM entradas WHERE etapa = ?", (etapa,))
+    
+    def cerrar(self):
+        self.conn.close()
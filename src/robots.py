@@ -0,0 +1,197 @@
+"""
+Reglas de robots.txt compiladas y caché persistente por sitio
+Implementa la coincidencia de RFC 9309: gana la regla más larga (Allow en
+caso de empate), con comodines `*` y ancla de fin `$`; las reglas se
+compilan una vez por sitio y evaluar una URL toma microsegundos
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+
+def ruta_de(url):
+    """Ruta y consulta de una URL, tal como se comparan con las reglas"""
+    partes = urlsplit(url)
+    ruta = partes.path or '/'
+    return f"{ruta}?{partes.query}" if partes.query else ruta
+
+
+def _expresion(patron):
+    """Expresión regular (anclada al inicio con match) del patrón de una regla"""
+    anclado = patron.endswith('$')
+    if anclado:
+        patron = patron[:-1]
+    expresion = '.*'.join(re.escape(parte) for parte in patron.split('*'))
+    return expresion + (r'\Z' if anclado else '')
+
+
+def _comparador(patron):
+    """Función que indica si una ruta coincide con el patrón de una regla"""
+    if '*' not in patron and not patron.endswith('$'):
+        return lambda ruta: ruta.startswith(patron)
+    return re.compile(_expresion(patron), re.S).match
+
+
+class ReglasRobots:
+    """
+    Reglas de un robots.txt para un agente.
+
+    Se usan los grupos cuyo User-agent es el token de producto del agente
+    (el nombre antes de '/', sin distinguir mayúsculas); si no hay ninguno,
+    los grupos `*`.
+    Sin reglas (robots.txt vacío o inexistente) todo está permitido.
+
+    Args:
+        contenido (str): Texto del robots.txt
+        agente (str): User-Agent del scraper (se usa el nombre antes de '/')
+    """
+
+    def __init__(self, contenido, agente):
+        self.agente = agente.split('/', 1)[0].strip().lower()
+        self.crawl_delay = None
+        self.reglas = []
+        self._compilar(contenido or '')
+
+    def _compilar(self, contenido):
+        grupos = []  # (agentes, reglas, crawl_delay)
+        agentes, reglas, retraso = [], [], [None]
+        en_reglas = False
+        for linea in contenido.splitlines():
+            linea = linea.split('#', 1)[0].strip()
+            if ':' not in linea:
+                continue
+            clave, valor = (parte.strip() for parte in linea.split(':', 1))
+            clave = clave.lower()
+            if clave == 'user-agent':
+                if en_reglas:
+                    grupos.append((agentes, reglas, retraso))
+                    agentes, reglas, retraso = [], [], [None]
+                    en_reglas = False
+                agentes.append(valor.split('/', 1)[0].strip().lower())
+            elif clave in ('allow', 'disallow', 'crawl-delay'):
+                en_reglas = True
+                if not agentes:
+                    continue  # Regla fuera de un grupo
+                if clave == 'crawl-delay':
+                    try:
+                        retraso[0] = float(valor)
+                    except ValueError:
+                        pass
+                elif valor:
+                    reglas.append((clave == 'allow', valor))
+        if agentes:
+            grupos.append((agentes, reglas, retraso))
+
+        propios = [g for g in grupos if self.agente in g[0]]
+        elegidos = propios or [g for g in grupos if '*' in g[0]]
+        for _, reglas, retraso in elegidos:
+            self.reglas.extend(reglas)
+            if retraso[0] is not None and retraso[0] > 0:
+                self.crawl_delay = max(self.crawl_delay or 0.0, retraso[0])
+
+        # Ordenadas de más específica a menos (Allow primero en empate): la
+        # primera coincidencia decide
+        self.reglas.sort(key=lambda regla: (-len(regla[1]), not regla[0]))
+        self._comparadores = [(permitir, _comparador(patron)) for permitir, patron in self.reglas]
+        # Filtro previo: una sola expresión descarta las rutas sin ninguna regla aplicable
+        self._alguna = None
+        if self.reglas:
+            self._alguna = re.compile('|'.join(_expresion(patron) for _, patron in self.reglas), re.S).match
+
+    def permite(self, url):
+        """Indicar si el agente puede acceder a la URL (o ruta)"""
+        ruta = url if url.startswith('/') else ruta_de(url)
+        if self._alguna is None or ruta == '/robots.txt' or not self._alguna(ruta):
+            return True
+        for permitir, coincide in self._comparadores:
+            if coincide(ruta):
+                return permitir
+        return True
+
+
+class CacheRobots:
+    """
+    robots.txt compilados por sitio, con vencimiento y guardados en SQLite.
+
+    Cada entrada guarda el texto del robots.txt y su vencimiento (hora
+    de reloj, para que sobreviva entre ejecuciones); las reglas se compilan
+    al cargar la caché. Un contenido None representa un robots.txt que no
+    se pudo obtener: se permite todo hasta que venza. Sin ruta la caché
+    vive solo en memoria. Es segura entre hilos.
+
+    Args:
+        ruta (Path): Archivo SQLite (None para no persistir)
+        agente (str): User-Agent con el que se interpretan las reglas
+        reloj: Función que devuelve la hora actual en segundos (epoch)
+    """
+
+    def __init__(self, ruta, agente, reloj=time.time):
+        self.ruta = Path(ruta) if ruta else None
+        self.agente = agente
+        self.reloj = reloj
+        self._entradas = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cargar())
+
+    def _conexion(self):
+        if self._conn is None:
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.ruta), check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS robots (
+                    sitio TEXT PRIMARY KEY,
+                    contenido TEXT,
+                    expira REAL NOT NULL
+                )
+            """)
+            self._conn.commit()
+        return self._conn
+
+    def _cargar(self):
+        # Carga diferida: la primera consulta lee y compila todas las entradas
+        if self._entradas is None:
+            with self._lock:
+                if self._entradas is None:
+                    entradas = {}
+                    if self.ruta and self.ruta.exists():
+                        filas = self._conexion().execute("SELECT sitio, contenido, expira FROM robots")
+                        for sitio, contenido, expira in filas:
+                            entradas[sitio] = (ReglasRobots(contenido, self.agente), expira)
+                    self._entradas = entradas
+        return self._entradas
+
+    def obtener(self, sitio):
+        """Reglas vigentes del sitio (esquema://host) o None si faltan o vencieron"""
+        entrada = self._cargar().get(sitio)
+        if entrada is None or entrada[1] <= self.reloj():
+            return None
+        return entrada[0]
+
+    def guardar(self, sitio, contenido, ttl):
+        """Compilar y guardar el robots.txt de un sitio por `ttl` segundos; devuelve las reglas"""
+        entradas = self._cargar()
+        reglas = ReglasRobots(contenido, self.agente)
+        expira = self.reloj() + ttl
+        with self._lock:
+            entradas[sitio] = (reglas, expira)
+            if self.ruta:
+                conn = self._conexion()
+                conn.execute(
+                    "INSERT OR REPLACE INTO robots (sitio, contenido, expira) VALUES (?, ?, ?)",
+                    (sitio, contenido, expira)
+                )
+                conn.commit()
+        return reglas
+
+    def cerrar(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
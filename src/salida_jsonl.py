@@ -0,0 +1,99 @@
+"""
+Salida JSONL de solo-anexado para los textos extraídos
+Un registro por línea con identificador estable (doc_id), sin comprimir o
+comprimido con gzip (.gz) o zstd (.zst) según la extensión del archivo
+"""
+
+import gzip
+import io
+import json
+from pathlib import Path
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+
+def compresion(ruta):
+    """'gzip', 'zstd' o None según la extensión del archivo"""
+    sufijo = Path(ruta).suffix.lower()
+    if sufijo == '.gz':
+        return 'gzip'
+    if sufijo in ('.zst', '.zstd'):
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstandard no disponible. Instalar: pip install zstandard")
+        return 'zstd'
+    return None
+
+
+class SalidaJSONL:
+    """
+    Escritor de registros JSONL en modo anexar.
+
+    Cada apertura agrega un miembro gzip o un frame zstd completo al final
+    del archivo, así que el archivo es válido aunque se escriba en varias
+    ejecuciones y se puede leer a partir del tamaño que tenía antes de
+    cualquier apertura (ver `leer_registros`).
+    """
+
+    def __init__(self, ruta):
+        self.ruta = Path(ruta)
+        self._archivo = None
+        self.registros = 0
+
+    def __enter__(self):
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        tipo = compresion(self.ruta)
+        if tipo == 'gzip':
+            self._archivo = gzip.open(self.ruta, 'ab')
+        elif tipo == 'zstd':
+            self._archivo = zstandard.ZstdCompressor().stream_writer(open(self.ruta, 'ab'), closefd=True)
+        else:
+            self._archivo = open(self.ruta, 'ab')
+        return self
+
+    def escribir(self, registro):
+        """Agregar un registro (dict con 'doc_id') como una línea"""
+        linea = json.dumps(registro, ensure_ascii=False) + "\n"
+        self._archivo.write(linea.encode('utf-8'))
+        self.registros += 1
+
+    def __exit__(self, *exc):
+        self._archivo.close()
+        self._archivo = None
+
+
+def leer_registros(ruta, desde=0):
+    """
+    Leer un archivo JSONL línea por línea, con memoria acotada.
+
+    Args:
+        ruta: Archivo JSONL (.jsonl, .jsonl.gz o .jsonl.zst)
+        desde (int): Posición en bytes del archivo en disco desde la que leer;
+            debe ser el tamaño que tenía el archivo antes de una apertura de
+            SalidaJSONL (inicio de un miembro gzip / frame zstd)
+
+    Yields:
+        tuple: (registro o None si la línea no es JSON válido, bytes de la línea)
+    """
+    tipo = compresion(ruta)
+    with open(ruta, 'rb') as crudo:
+        crudo.seek(desde)
+        if tipo == 'gzip':
+            flujo = gzip.GzipFile(fileobj=crudo, mode='rb')
+        elif tipo == 'zstd':
+            lector = zstandard.ZstdDecompressor().stream_reader(crudo, read_across_frames=True)
+            flujo = io.BufferedReader(lector)
+        else:
+            flujo = crudo
+
+        for linea in flujo:
+            if not linea.strip():
+                continue
+            try:
+                yield json.loads(linea), linea
+            except ValueError:
+                # Línea truncada (por ejemplo, una escritura interrumpida)
+                yield None, linea
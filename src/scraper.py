@@ -3,6 +3,7 @@ MinSalud Web Scraper - Script completo
 Extrae hipervínculos, descarga PDFs, extrae texto y carga a MongoDB
 """
 
+import asyncio
 import requests
 from bs4 import BeautifulSoup
 import json
@@ -10,40 +11,35 @@ import os
 import time
 import logging
 from datetime import datetime
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urldefrag
 from pathlib import Path
+from collections import deque
+from contextlib import nullcontext
 import concurrent.futures
-from io import StringIO
+import hashlib
 import traceback
 
-# Importaciones para extracción de texto PDF
-try:
-    from pdfminer.high_level import extract_text_to_fp
-    from pdfminer.layout import LAParams
-    PDF_MINER_AVAILABLE = True
-except ImportError:
-    print("⚠️  PDFMiner no disponible. Solo se usará OCR para PDFs.")
-    PDF_MINER_AVAILABLE = False
-
-# Importaciones para OCR
-try:
-    import pytesseract
-    from pdf2image import convert_from_path
-    from PIL import Image
-    OCR_AVAILABLE = True
-except ImportError:
-    print("⚠️  OCR no disponible. Instalar: pip install pytesseract pdf2image Pillow")
-    OCR_AVAILABLE = False
-
 # Importaciones para MongoDB
 try:
-    from pymongo import MongoClient
+    from pymongo import MongoClient, UpdateOne, DeleteMany
+    from pymongo.errors import BulkWriteError
     MONGO_AVAILABLE = True
 except ImportError:
     print("⚠️  PyMongo no disponible. Instalar: pip install pymongo")
     MONGO_AVAILABLE = False
 
 from config import *
+from frontera import FronteraCrawl
+from estado_crawl import EstadoCrawl
+from cache_http import CacheHTTP
+from manifiesto import ManifiestoPipeline, huella_ajustes
+from salida_jsonl import SalidaJSONL, leer_registros
+from fragmentos import dividir_en_fragmentos, documento_padre
+from indice_busqueda import IndiceBusqueda
+from escaner_pii import enmascarar
+from concurrencia import ControladorAIMD, ESTADOS_SOBRECARGA
+import extraccion_pdf
+from url_canonica import canonicalizar_url, nombre_archivo_pdf, clave_archivo
 
 # Importar módulo de ética y cumplimiento
 try:
@@ -72,14 +68,26 @@ class MinSaludScraper:
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        self.tamano_pool_http = None
+        self._configurar_pool_http(MAX_WORKERS)
+        self.control_descargas = None
+        self.control_crawl = None
         
-        self.links_visitados = set()
+        self.frontera = FronteraCrawl()
+        self.estado_crawl = None
+        self.cache_http = CacheHTTP(HTTP_CACHE_PATH)
         self.todos_los_links = []
         self.estadisticas = {
             'paginas_procesadas': 0,
             'pdfs_descargados': 0,
             'textos_extraidos': 0,
+            'textos_sin_cambios': 0,
+            'pii_redactados': 0,
             'documentos_mongo': 0,
+            'documentos_sin_cambios': 0,
+            'cache_paginas': {'aciertos': 0, 'fallos': 0, 'expulsiones': 0},
+            'cache_ocr': {'aciertos': 0, 'fallos': 0, 'expulsiones': 0},
+            'mongo_bulk': {'matched': 0, 'upserted': 0, 'modified': 0, 'lotes': 0},
             'errores': []
         }
     
@@ -103,122 +111,325 @@ class MinSaludScraper:
         ensure_directories()
         self.logger.info("✅ Directorios configurados correctamente")
     
-    def extraer_hipervinculos(self, url):
-        """Extraer todos los hipervínculos de una página"""
+    def _configurar_pool_http(self, conexiones):
+        """Dimensionar el pool de conexiones de la sesión para `conexiones` hilos
+        
+        El adaptador por defecto de requests guarda 10 conexiones por host;
+        con más hilos se abren y descartan conexiones en cada petición.
+        """
+        if conexiones == self.tamano_pool_http:
+            return
+        adaptador = requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=conexiones)
+        for prefijo in ('https://', 'http://'):
+            anterior = self.session.adapters.get(prefijo)
+            self.session.mount(prefijo, adaptador)
+            if anterior:
+                anterior.close()
+        self.tamano_pool_http = conexiones
+    
+    def _concurrencia_maxima(self):
+        """Techo de peticiones simultáneas: MAX_WORKERS acotado por el límite ético"""
+        if self.ethical_validator:
+            return max(1, min(MAX_WORKERS, self.ethical_validator.MAX_CONCURRENT_CONNECTIONS))
+        return MAX_WORKERS
+    
+    def _validar_acceso(self, url, accion='extraer_links'):
+        """Aplicar las validaciones éticas previas a una petición.
+
+        Returns:
+            bool: False si robots.txt no permite el acceso a la URL
+        """
+        if not self.ethical_validator:
+            return True
+        
+        # Validar dominio permitido
+        self.ethical_validator.validate_domain(url)
+        
+        # Verificar robots.txt
+        if not self.ethical_validator.check_robots_txt(url, self.session):
+            self.logger.warning(f"⚠️ robots.txt no permite acceso a: {url}")
+            return False
+        
+        # Registrar actividad
+        self.ethical_validator.log_scraping_activity(url, accion, 'iniciado')
+        return True
+    
+    def _peticion_http(self, url, headers, resultado=None, turno_reservado=False, **kwargs):
+        """GET con límite de tasa por host y reintentos ante 429/503
+        
+        Cada respuesta se informa al validador ético, que adapta el ritmo del
+        host y aplica las pausas de Retry-After. Sin Retry-After se espera
+        RETRY_BACKOFF, duplicado en cada reintento.
+        
+        Args:
+            url (str): URL de la petición
+            headers (dict): Cabeceras de la petición
+            resultado (dict, optional): Donde anotar 'latencia' (de la última
+                respuesta) y 'sobrecarga' (si alguna fue 429/503)
+            turno_reservado (bool): El primer turno ya se esperó (modo async)
+        """
+        resultado = {} if resultado is None else resultado
+        for intento in range(1, RETRY_ATTEMPTS + 1):
+            # Aplicar límite de tasa
+            if self.ethical_validator and not (turno_reservado and intento == 1):
+                self.ethical_validator.rate_limit(url)
+            
+            response = self.session.get(url, timeout=REQUEST_TIMEOUT, headers=headers, **kwargs)
+            resultado['latencia'] = response.elapsed.total_seconds()
+            pausa = 0.0
+            if self.ethical_validator:
+                pausa = self.ethical_validator.record_response(
+                    url, response.status_code, response.headers.get('Retry-After')
+                )
+            if response.status_code not in ESTADOS_SOBRECARGA:
+                return response
+            
+            resultado['sobrecarga'] = True
+            response.close()
+            if intento < RETRY_ATTEMPTS:
+                espera = RETRY_BACKOFF * 2 ** (intento - 1)
+                self.logger.warning(
+                    f"⏳ HTTP {response.status_code} en {url}: "
+                    f"reintento {intento}/{RETRY_ATTEMPTS - 1} en {max(espera, pausa):.1f}s"
+                )
+                # Con Retry-After la pausa la aplica el límite de tasa del próximo intento
+                if not pausa:
+                    time.sleep(espera)
+        
+        raise requests.exceptions.HTTPError(
+            f"HTTP {response.status_code} tras {RETRY_ATTEMPTS} intentos", response=response
+        )
+    
+    def _obtener_links(self, url, resultado=None, turno_reservado=False):
+        """Descargar una página y extraer sus links válidos (sin validaciones éticas)"""
         links = []
+        self.logger.info(f"🔍 Extrayendo links de: {url}")
+        
+        # Usar cabeceras éticas si está disponible
+        headers = self.ethical_validator.get_ethical_headers() if self.ethical_validator else {}
+        
+        # Revalidar si ya tenemos los links de esta página
+        entrada = self.cache_http.obtener(url)
+        if entrada and entrada['datos'] is not None:
+            headers.update(self.cache_http.cabeceras_condicionales(url, entrada))
+        
+        response = self._peticion_http(url, headers, resultado, turno_reservado)
+        if response.status_code == 304 and entrada:
+            self.cache_http.registrar_no_modificado(url, entrada)
+            self.logger.info(f"♻️  Página sin cambios (304), {len(entrada['datos'])} links en caché")
+            return entrada['datos']
+        response.raise_for_status()
+        
+        soup = BeautifulSoup(response.content, 'lxml')
         
+        # Buscar contenedor con diferentes posibles clases
+        container_div = None
+        clases_posibles = ['container_blanco', 'contenido', 'content', 'main-content']
+        
+        for clase in clases_posibles:
+            container_div = soup.find('div', class_=clase)
+            if container_div:
+                self.logger.info(f"📦 Usando contenedor: '{clase}'")
+                break
+        
+        # Si no se encuentra contenedor específico, usar body completo
+        if not container_div:
+            self.logger.warning("⚠️  No se encontró contenedor específico, usando body completo")
+            container_div = soup.find('body')
+        
+        if container_div:
+            for link in container_div.find_all('a', href=True):
+                href = link.get('href')
+                if href:
+                    full_url = urldefrag(urljoin(url, href))[0]
+                    clave = canonicalizar_url(full_url)
+                    
+                    # Validar dominio (sobre la forma canónica de la URL)
+                    if clave.startswith(DOMINIO_BASE):
+                        if clave.endswith('.aspx'):
+                            links.append({'url': full_url, 'type': 'ASPX'})
+                        elif clave.endswith('.pdf'):
+                            links.append({'url': full_url, 'type': 'PDF'})
+        
+        self.cache_http.guardar(url, response, len(response.content), datos=links)
+        self.logger.info(f"✅ Encontrados {len(links)} links válidos")
+        return links
+    
+    def _registrar_error_extraccion(self, url, error):
+        """Registrar un error ocurrido al extraer links de una página"""
+        if isinstance(error, requests.exceptions.RequestException):
+            error_msg = f"Error accediendo a {url}: {error}"
+        else:
+            error_msg = f"Error inesperado en {url}: {error}"
+        self.logger.error(error_msg)
+        self.estadisticas['errores'].append(error_msg)
+    
+    def extraer_hipervinculos(self, url):
+        """Extraer todos los hipervínculos de una página"""
         try:
             # 🛡️ VALIDACIONES ÉTICAS
-            if self.ethical_validator:
-                # Validar dominio permitido
-                self.ethical_validator.validate_domain(url)
-                
-                # Verificar robots.txt
-                if not self.ethical_validator.check_robots_txt(url):
-                    self.logger.warning(f"⚠️ robots.txt no permite acceso a: {url}")
-                    return []
-                
-                # Aplicar límite de tasa
-                self.ethical_validator.rate_limit()
-                
-                # Registrar actividad
-                self.ethical_validator.log_scraping_activity(url, 'extraer_links', 'iniciado')
-            
-            self.logger.info(f"🔍 Extrayendo links de: {url}")
-            
-            # Usar cabeceras éticas si está disponible
-            headers = self.ethical_validator.get_ethical_headers() if self.ethical_validator else {}
-            response = self.session.get(url, timeout=REQUEST_TIMEOUT, headers=headers)
-            response.raise_for_status()
+            if not self._validar_acceso(url):
+                return []
             
-            soup = BeautifulSoup(response.content, 'lxml')
+            return self._obtener_links(url)
             
-            # Buscar contenedor con diferentes posibles clases
-            container_div = None
-            clases_posibles = ['container_blanco', 'contenido', 'content', 'main-content']
+        except Exception as e:
+            self._registrar_error_extraccion(url, e)
+            return []
+    
+    async def _extraer_hipervinculos_async(self, url, executor, control, epoca):
+        """Versión asyncio de extraer_hipervinculos.
+
+        Las peticiones bloqueantes se ejecutan en el pool de hilos, mientras que la
+        espera por el límite de tasa se hace en el event loop sin bloquear otros
+        requests en vuelo. Al terminar se informa la latencia y las sobrecargas
+        al controlador de concurrencia, que libera el lugar de la petición.
+        """
+        loop = asyncio.get_running_loop()
+        resultado = {'latencia': None, 'sobrecarga': False}
+        try:
+            if not await loop.run_in_executor(executor, self._validar_acceso, url):
+                return []
             
-            for clase in clases_posibles:
-                container_div = soup.find('div', class_=clase)
-                if container_div:
-                    self.logger.info(f"📦 Usando contenedor: '{clase}'")
-                    break
+            if self.ethical_validator:
+                await self.ethical_validator.rate_limit_async(url)
             
-            # Si no se encuentra contenedor específico, usar body completo
-            if not container_div:
-                self.logger.warning("⚠️  No se encontró contenedor específico, usando body completo")
-                container_div = soup.find('body')
+            return await loop.run_in_executor(executor, self._obtener_links, url, resultado, True)
             
-            if container_div:
-                for link in container_div.find_all('a', href=True):
-                    href = link.get('href')
-                    if href:
-                        full_url = urljoin(url, href)
-                        
-                        # Validar dominio
-                        if full_url.startswith(DOMINIO_BASE):
-                            if full_url.endswith('.aspx'):
-                                links.append({'url': full_url, 'type': 'ASPX'})
-                            elif full_url.endswith('.pdf'):
-                                links.append({'url': full_url, 'type': 'PDF'})
-            
-            self.logger.info(f"✅ Encontrados {len(links)} links válidos")
-            return links
-            
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Error accediendo a {url}: {e}"
-            self.logger.error(error_msg)
-            self.estadisticas['errores'].append(error_msg)
-            return []
         except Exception as e:
-            error_msg = f"Error inesperado en {url}: {e}"
-            self.logger.error(error_msg)
-            self.estadisticas['errores'].append(error_msg)
+            self._registrar_error_extraccion(url, e)
             return []
+        finally:
+            control.registrar(epoca, resultado['latencia'], resultado['sobrecarga'])
+    
+    def _registrar_links(self, url_pagina, nuevos_links):
+        """Registrar links descubiertos y encolar las páginas ASPX por visitar"""
+        registrados = []
+        encolados = []
+        for link in nuevos_links:
+            # Evitar duplicados en todos_los_links
+            if self.frontera.registrar(link['url']):
+                self.todos_los_links.append(link)
+                registrados.append(link)
+            
+            # Si es ASPX, agregar a la cola
+            if link['type'] == 'ASPX' and self.frontera.encolar(link):
+                encolados.append(link)
+        
+        # Checkpoint de la página procesada
+        if self.estado_crawl:
+            self.estado_crawl.registrar_pagina(url_pagina, registrados, encolados)
     
-    def crawl_sitio_web(self, max_paginas=None):
+    def _limite_alcanzado(self, max_paginas):
+        """Indicar si ya se visitó el máximo de páginas configurado"""
+        return bool(max_paginas) and self.frontera.total_visitadas >= max_paginas
+    
+    def crawl_sitio_web(self, max_paginas=None, modo_async=False, reanudar=True):
         """Recorrer todo el sitio web y extraer links
         
+        El progreso se guarda en CRAWL_STATE_PATH después de cada página, por lo
+        que un crawling interrumpido continúa donde se quedó.
+        
         Args:
             max_paginas (int, optional): Límite de páginas a procesar (para pruebas)
+            modo_async (bool): Usar el motor asyncio con varias peticiones en vuelo
+            reanudar (bool): Continuar un crawling interrumpido si existe
         """
         self.logger.info("🕷️  Iniciando crawling del sitio web...")
         if max_paginas:
             self.logger.info(f"⚡ Modo prueba: máximo {max_paginas} páginas")
         
-        links_a_visitar = [{'url': URL_INICIAL, 'type': 'ASPX'}]
+        self.estado_crawl = EstadoCrawl(CRAWL_STATE_PATH)
+        try:
+            if reanudar and self.estado_crawl.pendiente(URL_INICIAL):
+                self.frontera, self.todos_los_links = self.estado_crawl.restaurar()
+                self.estadisticas['paginas_procesadas'] += self.frontera.total_visitadas
+                self.logger.info(
+                    f"🔁 Reanudando crawling: {self.frontera.total_visitadas} páginas visitadas, "
+                    f"{len(self.frontera)} en cola, {len(self.todos_los_links)} links"
+                )
+            else:
+                self.estado_crawl.iniciar(URL_INICIAL)
+                self.frontera = FronteraCrawl()
+                self.todos_los_links = []
+                self.frontera.encolar({'url': URL_INICIAL, 'type': 'ASPX'})
+            
+            if modo_async:
+                asyncio.run(self._crawl_async(max_paginas))
+            else:
+                self._crawl_serial(max_paginas)
+            
+            if not self.frontera:
+                self.estado_crawl.marcar_completado()
+        finally:
+            self.estado_crawl.cerrar()
+            self.estado_crawl = None
+        
+        # Guardar JSON con todos los links
+        self.guardar_links_json()
         
-        while links_a_visitar:
+        self.logger.info(f"✅ Crawling completado. {len(self.todos_los_links)} links encontrados")
+        self._log_revalidacion()
+    
+    def _crawl_serial(self, max_paginas):
+        """Crawling secuencial: una página a la vez"""
+        while self.frontera:
             # Verificar límite de páginas si está definido
-            if max_paginas and len(self.links_visitados) >= max_paginas:
+            if self._limite_alcanzado(max_paginas):
                 self.logger.info(f"⚡ Límite de {max_paginas} páginas alcanzado")
                 break
             
-            pagina_actual = links_a_visitar.pop(0)
-            url_actual = pagina_actual['url']
+            url_actual = self.frontera.siguiente()['url']
+            self.estadisticas['paginas_procesadas'] += 1
             
-            if url_actual not in self.links_visitados and pagina_actual['type'] == 'ASPX':
-                self.links_visitados.add(url_actual)
-                self.estadisticas['paginas_procesadas'] += 1
-                
-                nuevos_links = self.extraer_hipervinculos(url_actual)
+            # El ritmo lo marca el límite de tasa del validador ético
+            nuevos_links = self.extraer_hipervinculos(url_actual)
+            self._registrar_links(url_actual, nuevos_links)
+    
+    async def _crawl_async(self, max_paginas):
+        """Crawling asyncio con un número adaptativo de peticiones en vuelo.
+
+        Un ControladorAIMD decide cuántas páginas despachar: sube mientras la
+        latencia se mantiene y se reduce a la mitad ante 429/503 o lentitud,
+        sin pasar de MAX_WORKERS ni del límite ético de conexiones.
+
+        Los resultados se consumen en el mismo orden en que se despacharon las
+        páginas, de modo que la cola evoluciona igual que en el modo secuencial y
+        el archivo Links_MinSalud.json resultante es idéntico.
+        """
+        max_en_vuelo = self._concurrencia_maxima()
+        self.logger.info(f"⚡ Modo async: hasta {max_en_vuelo} peticiones en vuelo")
+        self._configurar_pool_http(max_en_vuelo)
+        control = ControladorAIMD(max_en_vuelo)
+        self.control_crawl = control
+        
+        en_vuelo = deque()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_en_vuelo) as executor:
+            while True:
+                # Despachar páginas mientras haya cupo
+                while control.disponible and self.frontera:
+                    if self._limite_alcanzado(max_paginas):
+                        break
+                    
+                    pagina = self.frontera.siguiente()
+                    self.estadisticas['paginas_procesadas'] += 1
+                    en_vuelo.append((pagina['url'], asyncio.ensure_future(
+                        self._extraer_hipervinculos_async(pagina['url'], executor, control, control.iniciar())
+                    )))
                 
-                for link in nuevos_links:
-                    if link['url'] not in self.links_visitados:
-                        # Evitar duplicados en todos_los_links
-                        if not any(l['url'] == link['url'] for l in self.todos_los_links):
-                            self.todos_los_links.append(link)
-                        
-                        # Si es ASPX, agregar a la cola
-                        if link['type'] == 'ASPX':
-                            links_a_visitar.append(link)
+                if not en_vuelo:
+                    break
                 
-                # Delay entre requests
-                time.sleep(DELAY_BETWEEN_REQUESTS)
+                # Consumir el resultado más antiguo para conservar el orden
+                url_pagina, tarea = en_vuelo.popleft()
+                self._registrar_links(url_pagina, await tarea)
         
-        # Guardar JSON con todos los links
-        self.guardar_links_json()
-        
-        self.logger.info(f"✅ Crawling completado. {len(self.todos_los_links)} links encontrados")
+        if self._limite_alcanzado(max_paginas):
+            self.logger.info(f"⚡ Límite de {max_paginas} páginas alcanzado")
+        self.logger.info(
+            f"⚡ Concurrencia del crawling: máximo {control.max_en_vuelo} en vuelo "
+            f"(techo {max_en_vuelo}), límite final {control.limite:.1f}, {control.reducciones} reducciones"
+        )
     
     def guardar_links_json(self):
         """Guardar lista de links en archivo JSON"""
@@ -250,52 +461,120 @@ class MinSaludScraper:
             self.logger.error(error_msg)
             raise
     
-    def descargar_pdf(self, pdf_url):
-        """Descargar un archivo PDF individual"""
+    def descargar_pdf(self, pdf_url, control=None):
+        """Descargar un archivo PDF individual
+        
+        Si el PDF ya existe se revalida con una petición condicional
+        (If-None-Match / If-Modified-Since): con 304 se conserva la copia local
+        y con 200 se reemplaza por la versión nueva.
+        
+        La petición pasa por las validaciones éticas, el límite de tasa por
+        host y las cabeceras éticas. Ante 429/503 se reintenta hasta
+        RETRY_ATTEMPTS veces (ver _peticion_http).
+        
+        Args:
+            pdf_url (str): URL del PDF
+            control (ControladorAIMD, optional): Controlador de concurrencia que
+                recibe la latencia y las sobrecargas de cada petición
+        """
         try:
-            file_name = os.path.basename(pdf_url)
-            if not file_name.endswith('.pdf'):
-                file_name += '.pdf'
-            
-            file_path = PDF_DIR / file_name
+            # 🛡️ VALIDACIONES ÉTICAS
+            if not self._validar_acceso(pdf_url, 'descargar_pdf'):
+                return None
             
-            # Verificar si ya existe
-            if file_path.exists():
-                self.logger.info(f"⏭️  PDF ya existe: {file_name}")
-                return str(file_path)
+            file_path = PDF_DIR / nombre_archivo_pdf(pdf_url)
             
-            response = self.session.get(pdf_url, stream=True, timeout=REQUEST_TIMEOUT)
-            response.raise_for_status()
+            # Buscar copia local (también con el nombre sin canonicalizar
+            # usado por versiones anteriores)
+            nombre_anterior = os.path.basename(urldefrag(pdf_url)[0])
+            existente = next(
+                (p for p in (file_path, PDF_DIR / nombre_anterior) if p.is_file()), None
+            )
             
-            with open(file_path, 'wb') as pdf_file:
-                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
-                    if chunk:
-                        pdf_file.write(chunk)
+            headers = self.ethical_validator.get_ethical_headers() if self.ethical_validator else {}
+            entrada = None
+            if existente:
+                file_path = existente
+                entrada = self.cache_http.obtener(pdf_url)
+                headers.update(self.cache_http.cabeceras_condicionales(
+                    pdf_url, entrada, mtime_local=existente.stat().st_mtime
+                ))
             
-            self.estadisticas['pdfs_descargados'] += 1
-            self.logger.info(f"📥 PDF descargado: {file_name}")
-            return str(file_path)
+            # El cupo de concurrencia se ocupa durante toda la transferencia
+            with control.cupo() if control else nullcontext({}) as resultado:
+                response = self._peticion_http(pdf_url, headers, resultado, stream=True)
+                return self._guardar_pdf(pdf_url, response, file_path, existente, entrada)
             
         except Exception as e:
             error_msg = f"Error descargando PDF {pdf_url}: {e}"
             self.logger.error(error_msg)
             self.estadisticas['errores'].append(error_msg)
+            if self.ethical_validator:
+                self.ethical_validator.log_scraping_activity(pdf_url, 'descargar_pdf', 'error')
             return None
     
+    def _guardar_pdf(self, pdf_url, response, file_path, existente, entrada):
+        """Procesar la respuesta de descargar_pdf: conservar la copia (304) o escribir el PDF"""
+        if existente and response.status_code == 304:
+            response.close()
+            self.cache_http.registrar_no_modificado(
+                pdf_url, entrada, tamano=existente.stat().st_size
+            )
+            self.logger.info(f"⏭️  PDF sin cambios: {existente.name}")
+            if self.ethical_validator:
+                self.ethical_validator.log_scraping_activity(pdf_url, 'descargar_pdf', 'sin_cambios')
+            return str(existente)
+        response.raise_for_status()
+        
+        # Escribir en un archivo temporal para no dejar PDFs truncados
+        temporal = file_path.with_name(file_path.name + '.part')
+        tamano = 0
+        with open(temporal, 'wb') as pdf_file:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                if chunk:
+                    pdf_file.write(chunk)
+                    tamano += len(chunk)
+        os.replace(temporal, file_path)
+        self.cache_http.guardar(pdf_url, response, tamano)
+        
+        self.estadisticas['pdfs_descargados'] += 1
+        if existente:
+            self.logger.info(f"🔄 PDF actualizado: {file_path.name}")
+        else:
+            self.logger.info(f"📥 PDF descargado: {file_path.name}")
+        if self.ethical_validator:
+            self.ethical_validator.log_scraping_activity(pdf_url, 'descargar_pdf', 'completado')
+        return str(file_path)
+    
     def descargar_pdfs_paralelo(self):
-        """Descargar todos los PDFs en paralelo"""
-        pdf_links = [link['url'] for link in self.todos_los_links if link['type'] == 'PDF']
+        """Descargar todos los PDFs en paralelo
+        
+        El número de descargas simultáneas lo ajusta un ControladorAIMD: sube
+        mientras la latencia se mantiene y se reduce a la mitad ante 429/503 o
+        lentitud, sin pasar de MAX_WORKERS ni del límite ético de conexiones.
+        El pool HTTP de la sesión se dimensiona para ese techo.
+        """
+        # Deduplicar por URL canónica: variantes de la misma URL se descargan una vez
+        pdf_por_clave = {}
+        for link in self.todos_los_links:
+            if link['type'] == 'PDF':
+                pdf_por_clave.setdefault(canonicalizar_url(link['url']), link['url'])
+        pdf_links = list(pdf_por_clave.values())
         
         if not pdf_links:
             self.logger.info("📄 No hay PDFs para descargar")
             return []
         
-        self.logger.info(f"📥 Descargando {len(pdf_links)} PDFs...")
+        maximo = self._concurrencia_maxima()
+        self._configurar_pool_http(maximo)
+        control = ControladorAIMD(maximo)
+        self.control_descargas = control
+        self.logger.info(f"📥 Descargando {len(pdf_links)} PDFs (hasta {maximo} en paralelo)...")
         
         archivos_descargados = []
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            future_to_url = {executor.submit(self.descargar_pdf, url): url for url in pdf_links}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=maximo) as executor:
+            future_to_url = {executor.submit(self.descargar_pdf, url, control): url for url in pdf_links}
             
             for future in concurrent.futures.as_completed(future_to_url):
                 resultado = future.result()
@@ -303,102 +582,277 @@ class MinSaludScraper:
                     archivos_descargados.append(resultado)
         
         self.logger.info(f"✅ {len(archivos_descargados)} PDFs descargados exitosamente")
+        self.logger.info(
+            f"⚡ Concurrencia de descargas: máximo {control.max_en_vuelo} en vuelo "
+            f"(techo {maximo}), límite final {control.limite:.1f}, {control.reducciones} reducciones"
+        )
+        self._log_revalidacion()
         return archivos_descargados
     
+    def _log_revalidacion(self):
+        """Registrar cuántas respuestas 304 y bytes se ahorraron en esta ejecución"""
+        stats = self.cache_http.estadisticas
+        self.logger.info(
+            f"♻️  Revalidación HTTP: {stats['no_modificados']} respuestas 304, "
+            f"{stats['bytes_ahorrados']:,} bytes ahorrados"
+        )
+    
     def extraer_texto_pdf_normal(self, pdf_path):
         """Extraer texto usando PDFMiner"""
-        if not PDF_MINER_AVAILABLE:
-            return None
-        
-        try:
-            output_string = StringIO()
-            with open(pdf_path, 'rb') as file:
-                extract_text_to_fp(file, output_string, laparams=LAParams())
-            
-            texto = output_string.getvalue().strip()
-            return texto if len(texto) > 50 else None  # Mínimo 50 caracteres
-            
-        except Exception as e:
-            self.logger.warning(f"PDFMiner falló en {pdf_path}: {e}")
-            return None
+        return extraccion_pdf.extraer_texto_pdf_normal(pdf_path)
     
     def extraer_texto_pdf_ocr(self, pdf_path):
         """Extraer texto usando OCR"""
-        if not OCR_AVAILABLE:
-            return None
-        
-        try:
-            images = convert_from_path(pdf_path)
-            texto_completo = []
-            
-            for i, imagen in enumerate(images):
-                texto_pagina = pytesseract.image_to_string(
-                    imagen, 
-                    lang=TESSERACT_LANG,
-                    config=OCR_CONFIG
-                )
-                if texto_pagina.strip():
-                    texto_completo.append(f"--- Página {i+1} ---\n{texto_pagina}")
-            
-            texto_final = "\n\n".join(texto_completo)
-            return texto_final if len(texto_final.strip()) > 50 else None
-            
-        except Exception as e:
-            self.logger.warning(f"OCR falló en {pdf_path}: {e}")
-            return None
+        return extraccion_pdf.extraer_texto_pdf_ocr(pdf_path)
     
     def extraer_texto_pdf(self, pdf_path):
-        """Extraer texto de PDF usando el mejor método disponible"""
-        archivo_nombre = os.path.basename(pdf_path)
+        """Extraer texto de PDF, con OCR solo en las páginas que lo necesitan
         
-        # Intentar primero PDFMiner (más rápido y preciso)
-        texto = self.extraer_texto_pdf_normal(pdf_path)
-        if texto:
-            return texto, 'PDFMINER'
+        Returns:
+            tuple: (texto o None, método, métodos por página)
+        """
+        return extraccion_pdf.extraer_texto_pdf(pdf_path)
+    
+    def _nombre_json_libre(self, indice, usados):
+        """Primer nombre minsalud_texto_NNN.json desde `indice` que no esté asignado"""
+        while f"minsalud_texto_{indice:03d}.json" in usados:
+            indice += 1
+        nombre = f"minsalud_texto_{indice:03d}.json"
+        usados.add(nombre)
+        return nombre
+    
+    def _salida_texto_existe(self, salida):
+        """La salida registrada en el manifiesto existe y es del formato configurado"""
+        if OUTPUT_FORMAT == "jsonl":
+            return salida == JSONL_OUTPUT_PATH.name and JSONL_OUTPUT_PATH.exists()
+        return salida.endswith('.json') and (JSON_OUTPUT_DIR / salida).exists()
+    
+    def _redactar_pii(self, texto):
+        """Enmascarar los datos personales del texto (PII_CATEGORIAS_REDACCION)
         
-        # Si falla, intentar OCR
-        texto = self.extraer_texto_pdf_ocr(pdf_path)
-        if texto:
-            return texto, 'OCR'
+        Returns:
+            tuple: (texto, reemplazos por categoría o None si la redacción está desactivada)
+        """
+        if not PII_REDACCION:
+            return texto, None
+        texto, conteos = enmascarar(texto, PII_CATEGORIAS_REDACCION)
+        self.estadisticas['pii_redactados'] += sum(conteos.values())
+        return texto, conteos
+    
+    def _ajustes_texto(self):
+        """Huella de la configuración que determina el texto guardado de un PDF
         
-        # Si ambos fallan
-        self.logger.warning(f"❌ No se pudo extraer texto de: {archivo_nombre}")
-        return None, 'FALLIDO'
+        Si cambia el backend, el OCR o la redacción de datos personales, los
+        textos registrados en el manifiesto dejan de estar vigentes.
+        """
+        return huella_ajustes(
+            pdf_backend=PDF_BACKEND,
+            pdf_backends_respaldo=PDF_BACKENDS_RESPALDO,
+            ocr_dpi=OCR_DPI,
+            tesseract_lang=TESSERACT_LANG,
+            ocr_config=OCR_CONFIG,
+            ocr_min_caracteres_pagina=OCR_MIN_CARACTERES_PAGINA,
+            ocr_cobertura_imagen=OCR_COBERTURA_IMAGEN,
+            ocr_max_caracteres_pagina_imagen=OCR_MAX_CARACTERES_PAGINA_IMAGEN,
+            pii_redaccion=PII_REDACCION,
+            pii_categorias=PII_CATEGORIAS_REDACCION if PII_REDACCION else None
+        )
     
-    def procesar_pdfs_texto(self):
-        """Procesar todos los PDFs y extraer texto"""
-        pdf_files = list(PDF_DIR.glob("*.pdf"))
+    def _registro_texto(self, pdf_path, texto, metodo, paginas, huella):
+        """Documento con el texto extraído de un PDF, con los datos personales enmascarados"""
+        texto, redacciones = self._redactar_pii(texto)
+        registro = {
+            'file': pdf_path.name,
+            'timestamp': datetime.now().isoformat(),
+            'text': texto,
+            'method': metodo,
+            'pages': paginas,
+            'size_bytes': pdf_path.stat().st_size,
+            'char_count': len(texto),
+            'sha256': huella
+        }
+        if redacciones is not None:
+            registro['pii_redactions'] = redacciones
+        return registro
+    
+    def _guardar_textos_jsonl(self, pendientes, resultados, total, manifiesto, ajustes):
+        """
+        Anexar los textos extraídos al JSONL de salida, uno por línea.
+        
+        Cada registro lleva un doc_id estable (la clave canónica del PDF); si
+        un PDF se vuelve a extraer, su nueva línea reemplaza a la anterior al
+        cargar a MongoDB. El manifiesto se actualiza después de cerrar el
+        archivo, cuando las líneas ya están completas en disco.
+        """
+        registrados = []
+        with SalidaJSONL(JSONL_OUTPUT_PATH) as salida:
+            for (i, pdf_path, huella), (texto, metodo, paginas, error) in zip(pendientes, resultados):
+                try:
+                    self.logger.info(f"📖 Procesando {i}/{total}: {pdf_path.name}")
+                    
+                    if error:
+                        raise RuntimeError(error)
+                    
+                    if texto:
+                        registro = {'doc_id': clave_archivo(pdf_path.name)}
+                        registro.update(self._registro_texto(pdf_path, texto, metodo, paginas, huella))
+                        salida.escribir(registro)
+                        registrados.append((pdf_path, huella))
+                        self.estadisticas['textos_extraidos'] += 1
+                        self.logger.info(f"✅ Texto extraído y anexado a {JSONL_OUTPUT_PATH.name}")
+                    else:
+                        error_msg = f"No se pudo extraer texto de: {pdf_path.name}"
+                        self.estadisticas['errores'].append(error_msg)
+                    
+                except Exception as e:
+                    error_msg = f"Error procesando {pdf_path.name}: {e}"
+                    self.logger.error(error_msg)
+                    self.estadisticas['errores'].append(error_msg)
+        
+        for pdf_path, huella in registrados:
+            manifiesto.registrar(ETAPA_TEXTO, pdf_path, huella, JSONL_OUTPUT_PATH.name, ajustes)
+    
+    def procesar_pdfs_texto(self, forzar=False, workers=None):
+        """Procesar todos los PDFs y extraer texto
+        
+        Los PDFs cuyo contenido no cambió desde la última extracción (según el
+        manifiesto del pipeline) y cuyo JSON sigue existiendo se omiten. Cambiar
+        la configuración de extracción (backend, OCR o redacción de datos
+        personales) vuelve a extraerlos todos.
+        
+        Args:
+            forzar (bool): Reprocesar todos los PDFs aunque no hayan cambiado
+            workers (int, optional): Procesos de extracción en paralelo
+                (por defecto EXTRACTION_WORKERS; 0 = todos los núcleos)
+        """
+        pdf_files = sorted(PDF_DIR.glob("*.pdf"))
         
         if not pdf_files:
             self.logger.info("📄 No hay archivos PDF para procesar")
             return
         
+        if workers is None:
+            workers = EXTRACTION_WORKERS
+        if workers == 0:
+            workers = os.cpu_count() or 1
+        
         self.logger.info(f"📝 Procesando texto de {len(pdf_files)} PDFs...")
+        if workers > 1:
+            self.logger.info(f"⚡ Extracción en paralelo con {workers} procesos")
+        
+        caches = {
+            'cache_paginas': extraccion_pdf.cache_paginas(),
+            'cache_ocr': extraccion_pdf.cache_ocr(),
+        }
+        contadores_previos = {nombre: cache.contadores() for nombre, cache in caches.items() if cache}
+        
+        manifiesto = ManifiestoPipeline(MANIFEST_PATH)
+        try:
+            self._procesar_pdfs_texto(pdf_files, manifiesto, forzar, workers)
+        finally:
+            manifiesto.cerrar()
+        
+        if self.estadisticas['textos_sin_cambios']:
+            self.logger.info(f"⏭️  {self.estadisticas['textos_sin_cambios']} PDFs sin cambios omitidos")
+        if self.estadisticas['pii_redactados']:
+            self.logger.info(f"🔒 {self.estadisticas['pii_redactados']} datos personales enmascarados (Ley 1581 de 2012)")
+        for nombre, antes in contadores_previos.items():
+            self._registrar_cache(nombre, antes, caches[nombre].contadores())
+    
+    def _registrar_cache(self, nombre, antes, despues):
+        """Sumar a las estadísticas los aciertos y fallos de una caché de OCR en esta ejecución"""
+        stats = self.estadisticas[nombre]
+        for contador in stats:
+            stats[contador] += despues[contador] - antes[contador]
+        if stats['aciertos'] or stats['fallos']:
+            titulo = "🖼️  Caché de páginas" if nombre == 'cache_paginas' else "🔤 Caché de OCR"
+            self.logger.info(
+                f"{titulo}: {stats['aciertos']} aciertos, {stats['fallos']} fallos, "
+                f"{stats['expulsiones']} expulsadas ({despues['bytes'] / 1024 / 1024:.1f} MB en disco)"
+            )
+    
+    def _extraer_textos(self, pdf_paths, workers):
+        """Extraer el texto de varios PDFs, en serie o en un pool de procesos
+        
+        Los resultados se entregan en el mismo orden de `pdf_paths`.
+        
+        Yields:
+            tuple: (texto o None, método, páginas, mensaje de error o None)
+        """
+        if workers <= 1 or len(pdf_paths) <= 1:
+            for pdf_path in pdf_paths:
+                try:
+                    texto, metodo, paginas = self.extraer_texto_pdf(pdf_path)
+                    yield texto, metodo, paginas, None
+                except Exception as e:
+                    yield None, 'FALLIDO', [], str(e)
+            return
+        
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futuros = [
+                executor.submit(extraccion_pdf.extraer_texto_pdf_en_proceso, str(pdf_path))
+                for pdf_path in pdf_paths
+            ]
+            for futuro in futuros:
+                try:
+                    yield futuro.result()
+                except Exception as e:
+                    # Por ejemplo BrokenProcessPool si un worker muere
+                    yield None, 'FALLIDO', [], f"{type(e).__name__}: {e}"
+    
+    def _procesar_pdfs_texto(self, pdf_files, manifiesto, forzar, workers):
+        """Extraer el texto de los PDFs nuevos o modificados"""
+        salidas_previas = manifiesto.salidas(ETAPA_TEXTO)
+        usados = set(salidas_previas.values())
+        ajustes = self._ajustes_texto()
         
+        # Seleccionar los PDFs nuevos o modificados
+        pendientes = []
         for i, pdf_path in enumerate(pdf_files, 1):
+            try:
+                huella = manifiesto.huella(ETAPA_TEXTO, pdf_path)
+                salida = None if forzar else manifiesto.salida_vigente(ETAPA_TEXTO, pdf_path, huella, ajustes)
+                if salida and self._salida_texto_existe(salida):
+                    self.estadisticas['textos_sin_cambios'] += 1
+                    self.logger.debug(f"⏭️  Sin cambios: {pdf_path.name}")
+                    continue
+                pendientes.append((i, pdf_path, huella))
+                
+            except Exception as e:
+                error_msg = f"Error procesando {pdf_path.name}: {e}"
+                self.logger.error(error_msg)
+                self.estadisticas['errores'].append(error_msg)
+        
+        if not pendientes:
+            return
+        
+        # Extraer y guardar en el orden de entrada (nombres de JSON deterministas)
+        resultados = self._extraer_textos([pdf_path for _, pdf_path, _ in pendientes], workers)
+        if OUTPUT_FORMAT == "jsonl":
+            self._guardar_textos_jsonl(pendientes, resultados, len(pdf_files), manifiesto, ajustes)
+            return
+        
+        for (i, pdf_path, huella), (texto, metodo, paginas, error) in zip(pendientes, resultados):
             try:
                 self.logger.info(f"📖 Procesando {i}/{len(pdf_files)}: {pdf_path.name}")
                 
-                texto, metodo = self.extraer_texto_pdf(pdf_path)
+                if error:
+                    raise RuntimeError(error)
                 
                 if texto:
                     # Crear JSON individual
-                    json_data = {
-                        'file': pdf_path.name,
-                        'timestamp': datetime.now().isoformat(),
-                        'text': texto,
-                        'method': metodo,
-                        'size_bytes': pdf_path.stat().st_size,
-                        'char_count': len(texto)
-                    }
+                    json_data = self._registro_texto(pdf_path, texto, metodo, paginas, huella)
                     
-                    # Guardar JSON
-                    json_filename = f"minsalud_texto_{i:03d}.json"
+                    # Guardar JSON (conservando el nombre asignado en ejecuciones anteriores)
+                    json_filename = salidas_previas.get(pdf_path.name)
+                    if not (json_filename or '').endswith('.json'):
+                        json_filename = self._nombre_json_libre(i, usados)
                     json_path = JSON_OUTPUT_DIR / json_filename
                     
                     with open(json_path, 'w', encoding='utf-8') as f:
                         json.dump(json_data, f, indent=2, ensure_ascii=False)
                     
+                    manifiesto.registrar(ETAPA_TEXTO, pdf_path, huella, json_filename, ajustes)
                     self.estadisticas['textos_extraidos'] += 1
                     self.logger.info(f"✅ Texto extraído y guardado: {json_filename}")
                     
@@ -411,13 +865,27 @@ class MinSaludScraper:
                 self.logger.error(error_msg)
                 self.estadisticas['errores'].append(error_msg)
     
-    def cargar_a_mongodb(self, batch_size=100, crear_indices=True):
+    def cargar_a_mongodb(self, batch_size=100, crear_indices=True, forzar=False):
         """
         Cargar datos extraídos a MongoDB Atlas con optimizaciones
         
+        Los JSON cuyo contenido no cambió desde la última carga a esta colección
+        (según el manifiesto del pipeline) se omiten sin leerlos. El resto se
+        envía en lotes de `UpdateOne(..., upsert=True)` por `file_key` con un
+        único `bulk_write` no ordenado por lote; los documentos cuyo
+        `content_hash` ya está en la colección no se reenvían.
+        
+        Cada documento lleva `char_count` y una vista previa (`preview`) para
+        que las consultas puedan listarlo sin leer el texto.
+        
+        Con MONGO_FRAGMENTOS el texto se guarda en fragmentos de
+        FRAGMENTOS_COLLECTION_NAME y el documento de la colección principal
+        queda sin texto (ver `_operaciones_fragmentos`).
+        
         Args:
-            batch_size (int): Número de documentos a insertar por lote
+            batch_size (int): Número de operaciones por bulk_write
             crear_indices (bool): Crear índices en la colección
+            forzar (bool): Volver a cargar todos los JSON aunque no hayan cambiado
         """
         if not MONGO_AVAILABLE:
             self.logger.warning("⚠️  PyMongo no disponible. Saltando carga a MongoDB")
@@ -438,96 +906,142 @@ class MinSaludScraper:
             
             db = client[DB_NAME]
             collection = db[COLLECTION_NAME]
+            coleccion_fragmentos = db[FRAGMENTOS_COLLECTION_NAME] if MONGO_FRAGMENTOS else None
             
             self.logger.info(f"🗄️  Base de datos: {DB_NAME}")
             self.logger.info(f"📁 Colección: {COLLECTION_NAME}")
+            if MONGO_FRAGMENTOS:
+                self.logger.info(f"🧩 Fragmentos: {FRAGMENTOS_COLLECTION_NAME}")
             
             # Crear índices para mejorar rendimiento
             if crear_indices:
-                self._crear_indices_mongodb(collection)
+                self._crear_indices_mongodb(collection, coleccion_fragmentos)
             
-            # Obtener archivos JSON
-            json_files = list(JSON_OUTPUT_DIR.glob("minsalud_texto_*.json"))
-            
-            if not json_files:
-                self.logger.warning("📄 No hay archivos JSON para cargar")
-                return
-            
-            self.logger.info(f"📊 {len(json_files)} archivos JSON encontrados")
-            
-            documentos_cargados = 0
-            documentos_actualizados = 0
-            documentos_duplicados = 0
-            batch = []
+            # Obtener la salida de la extracción de texto
+            formato_jsonl = OUTPUT_FORMAT == "jsonl"
+            if formato_jsonl:
+                if not JSONL_OUTPUT_PATH.exists():
+                    self.logger.warning(f"📄 No existe {JSONL_OUTPUT_PATH.name} para cargar")
+                    return
+                self.logger.info(f"📊 Leyendo {JSONL_OUTPUT_PATH.name} línea por línea")
+            else:
+                json_files = sorted(JSON_OUTPUT_DIR.glob("minsalud_texto_*.json"))
+                
+                if not json_files:
+                    self.logger.warning("📄 No hay archivos JSON para cargar")
+                    return
+                
+                self.logger.info(f"📊 {len(json_files)} archivos JSON encontrados")
             
-            for i, json_file in enumerate(json_files, 1):
-                try:
-                    with open(json_file, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
+            manifiesto = ManifiestoPipeline(MANIFEST_PATH)
+            try:
+                totales = {'matched': 0, 'upserted': 0, 'modified': 0, 'lotes': 0, 'fallidos': 0, 'fragmentos': 0}
+                documentos_duplicados = 0
+                operaciones = []
+                fragmentos = []
+                pendientes_manifiesto = []
+                claves_vistas = set()
+                claves_lote = set()
+                
+                # Una colección vacía invalida lo registrado en el manifiesto
+                etapa_mongo = f"mongo:{DB_NAME}/{COLLECTION_NAME}"
+                if not forzar and collection.find_one({}, {'_id': 1}) is None:
+                    forzar = True
+                
+                self._completar_file_key(collection)
+                
+                # Hash de contenido de lo ya cargado, en una sola consulta y sin el texto
+                hashes_cargados = {} if forzar else {
+                    doc['file_key']: doc.get('content_hash')
+                    for doc in collection.find({}, {'_id': 0, 'file_key': 1, 'content_hash': 1})
+                }
+                
+                if formato_jsonl:
+                    desde = 0 if forzar else manifiesto.posicion(etapa_mongo, JSONL_OUTPUT_PATH)
+                    hasta = JSONL_OUTPUT_PATH.stat().st_size
+                    documentos = self._documentos_jsonl(JSONL_OUTPUT_PATH, desde)
+                else:
+                    documentos = self._documentos_json(json_files, manifiesto, etapa_mongo, forzar)
+                
+                for data, huella, pendiente in documentos:
+                    clave = data['file_key']
+                    if not formato_jsonl and clave in claves_vistas:
+                        # Variante del mismo archivo ya cargada en esta ejecución
+                        documentos_duplicados += 1
+                        self.logger.debug(f"⏭️  Ya existe: {data['file']}")
+                        continue
+                    claves_vistas.add(clave)
                     
-                    # Agregar metadata adicional
-                    data['_uploaded_at'] = datetime.now().isoformat()
-                    data['_source_file'] = str(json_file.name)
+                    if hashes_cargados.get(clave) == huella:
+                        # Ya está en MongoDB con el mismo contenido
+                        documentos_duplicados += 1
+                        self.logger.debug(f"⏭️  Sin cambios: {data['file']}")
+                        if pendiente:
+                            manifiesto.registrar(etapa_mongo, *pendiente)
+                        continue
                     
-                    # Verificar si ya existe (por nombre de archivo)
-                    existente = collection.find_one({'file': data['file']})
+                    if clave in claves_lote:
+                        # Versión más reciente (JSONL) de un documento que ya está en el lote:
+                        # bulk_write no ordenado no garantiza el orden, se envía el lote antes
+                        self._escribir_lote_mongodb(
+                            collection, operaciones, pendientes_manifiesto,
+                            manifiesto, etapa_mongo, totales, coleccion_fragmentos, fragmentos
+                        )
+                        operaciones, pendientes_manifiesto, claves_lote, fragmentos = [], [], set(), []
                     
-                    if existente:
-                        # Actualizar si el texto es diferente
-                        if existente.get('text') != data.get('text'):
-                            collection.update_one(
-                                {'_id': existente['_id']},
-                                {'$set': data}
-                            )
-                            documentos_actualizados += 1
-                            self.logger.info(f"🔄 Actualizado: {data['file']}")
-                        else:
-                            documentos_duplicados += 1
-                            self.logger.debug(f"⏭️  Ya existe: {data['file']}")
+                    if MONGO_FRAGMENTOS:
+                        operacion, operaciones_fragmentos = self._operaciones_fragmentos(data)
+                        fragmentos.extend((len(operaciones), op) for op in operaciones_fragmentos)
+                        operaciones.append(operacion)
                     else:
-                        # Agregar al batch para inserción
-                        batch.append(data)
-                        
-                        # Insertar cuando el batch esté lleno
-                        if len(batch) >= batch_size:
-                            result = collection.insert_many(batch)
-                            documentos_cargados += len(result.inserted_ids)
-                            self.logger.info(f"💾 Batch insertado: {len(result.inserted_ids)} documentos")
-                            batch = []
+                        operaciones.append(UpdateOne({'file_key': clave}, {'$set': data}, upsert=True))
+                    pendientes_manifiesto.append((clave, pendiente))
+                    claves_lote.add(clave)
+                    hashes_cargados[clave] = huella
                     
-                    # Mostrar progreso
-                    if i % 10 == 0:
-                        self.logger.info(f"📈 Progreso: {i}/{len(json_files)} archivos procesados")
-                    
-                except json.JSONDecodeError as e:
-                    error_msg = f"Error JSON en {json_file.name}: {e}"
-                    self.logger.error(error_msg)
-                    self.estadisticas['errores'].append(error_msg)
-                except Exception as e:
-                    error_msg = f"Error procesando {json_file.name}: {e}"
-                    self.logger.error(error_msg)
-                    self.estadisticas['errores'].append(error_msg)
-            
-            # Insertar documentos restantes del batch
-            if batch:
-                result = collection.insert_many(batch)
-                documentos_cargados += len(result.inserted_ids)
-                self.logger.info(f"💾 Batch final insertado: {len(result.inserted_ids)} documentos")
+                    # Enviar cuando el lote esté lleno
+                    if len(operaciones) >= batch_size:
+                        self._escribir_lote_mongodb(
+                            collection, operaciones, pendientes_manifiesto,
+                            manifiesto, etapa_mongo, totales, coleccion_fragmentos, fragmentos
+                        )
+                        operaciones, pendientes_manifiesto, claves_lote, fragmentos = [], [], set(), []
+                
+                # Enviar las operaciones restantes
+                if operaciones:
+                    self._escribir_lote_mongodb(
+                        collection, operaciones, pendientes_manifiesto,
+                        manifiesto, etapa_mongo, totales, coleccion_fragmentos, fragmentos
+                    )
+                
+                # El JSONL solo avanza si todo lo leído quedó cargado
+                if formato_jsonl and not totales['fallidos']:
+                    manifiesto.registrar_posicion(etapa_mongo, JSONL_OUTPUT_PATH, hasta)
+                
+                self._completar_vista_previa(collection, batch_size)
+            finally:
+                manifiesto.cerrar()
             
             # Guardar estadísticas
-            self.estadisticas['documentos_mongo'] = documentos_cargados
+            self.estadisticas['documentos_mongo'] = totales['upserted']
+            self.estadisticas['mongo_bulk'] = totales
             
             # Resumen final
             print("\n" + "="*60)
             print("📊 RESUMEN DE CARGA A MONGODB")
             print("="*60)
-            print(f"✅ Nuevos documentos insertados: {documentos_cargados}")
-            print(f"🔄 Documentos actualizados: {documentos_actualizados}")
+            print(f"✅ Nuevos documentos (upserted): {totales['upserted']}")
+            print(f"🔄 Documentos existentes (matched): {totales['matched']}")
+            print(f"✏️  Documentos modificados (modified): {totales['modified']}")
             print(f"⏭️  Documentos duplicados (sin cambios): {documentos_duplicados}")
+            print(f"📋 JSON omitidos por manifiesto: {self.estadisticas['documentos_sin_cambios']}")
+            print(f"📦 Lotes bulk_write enviados: {totales['lotes']}")
+            if MONGO_FRAGMENTOS:
+                print(f"🧩 Fragmentos escritos: {totales['fragmentos']}")
             print(f"📁 Total en colección: {collection.count_documents({})}")
             print("="*60)
             
-            self.logger.info(f"✅ Carga completada: {documentos_cargados} nuevos, {documentos_actualizados} actualizados")
+            self.logger.info(f"✅ Carga completada: {totales['upserted']} nuevos, {totales['modified']} actualizados")
             
             # Cerrar conexión
             client.close()
@@ -549,13 +1063,218 @@ class MinSaludScraper:
                 print("5. Verificar IP en whitelist (MongoDB Atlas)")
                 print("="*60)
     
-    def _crear_indices_mongodb(self, collection):
-        """Crear índices en la colección de MongoDB"""
+    def _preparar_documento(self, data, origen, huella):
+        """Agregar la metadata de carga a un documento extraído"""
+        data['_uploaded_at'] = datetime.now().isoformat()
+        data['_source_file'] = origen
+        data['file_key'] = clave_archivo(data['file'])
+        data['content_hash'] = huella
+        data['char_count'] = len(data.get('text') or '')
+        data['preview'] = self._vista_previa(data.get('text') or '')
+        return data
+    
+    @staticmethod
+    def _vista_previa(texto):
+        """Primeros MONGO_PREVIEW_CARACTERES del texto con los espacios y saltos de línea colapsados"""
+        return " ".join(texto[:MONGO_PREVIEW_CARACTERES * 2].split())[:MONGO_PREVIEW_CARACTERES]
+    
+    def _documentos_json(self, json_files, manifiesto, etapa, forzar):
+        """
+        Documentos de los archivos JSON individuales que cambiaron desde la última carga.
+        
+        Yields:
+            tuple: (documento, content_hash, entrada pendiente de registrar en el manifiesto)
+        """
+        for i, json_file in enumerate(json_files, 1):
+            try:
+                huella = manifiesto.huella(etapa, json_file)
+                if not forzar and manifiesto.salida_vigente(etapa, json_file, huella):
+                    self.estadisticas['documentos_sin_cambios'] += 1
+                    continue
+                
+                with open(json_file, 'r', encoding='utf-8') as f:
+                    data = self._preparar_documento(json.load(f), json_file.name, huella)
+                
+            except json.JSONDecodeError as e:
+                error_msg = f"Error JSON en {json_file.name}: {e}"
+                self.logger.error(error_msg)
+                self.estadisticas['errores'].append(error_msg)
+                continue
+            except Exception as e:
+                error_msg = f"Error procesando {json_file.name}: {e}"
+                self.logger.error(error_msg)
+                self.estadisticas['errores'].append(error_msg)
+                continue
+            
+            yield data, huella, (json_file, huella, data['file_key'])
+            
+            # Mostrar progreso
+            if i % 10 == 0:
+                self.logger.info(f"📈 Progreso: {i}/{len(json_files)} archivos procesados")
+    
+    def _documentos_jsonl(self, ruta, desde):
+        """
+        Documentos del JSONL a partir de la posición `desde`, línea por línea.
+        
+        Un doc_id repetido es una versión más reciente del mismo documento.
+        
+        Yields:
+            tuple: (documento, content_hash de la línea, None)
+        """
+        if desde:
+            self.logger.info(f"⏩ Continuando {ruta.name} desde el byte {desde:,}")
+        leidos = 0
+        try:
+            for data, linea in leer_registros(ruta, desde):
+                leidos += 1
+                if data is None:
+                    error_msg = f"Línea JSON inválida en {ruta.name} (registro {leidos})"
+                    self.logger.error(error_msg)
+                    self.estadisticas['errores'].append(error_msg)
+                    continue
+                huella = hashlib.sha256(linea).hexdigest()
+                yield self._preparar_documento(data, ruta.name, huella), huella, None
+                
+                if leidos % 100 == 0:
+                    self.logger.info(f"📈 Progreso: {leidos} registros leídos")
+        except EOFError as e:
+            # Miembro gzip incompleto al final (escritura interrumpida)
+            error_msg = f"{ruta.name} termina en un bloque comprimido incompleto: {e}"
+            self.logger.error(error_msg)
+            self.estadisticas['errores'].append(error_msg)
+    
+    def _operaciones_fragmentos(self, data):
+        """
+        Operaciones para guardar un documento en el modelo fragmentado.
+        
+        Returns:
+            tuple: (upsert del padre sin texto, upserts de los fragmentos por
+            (file_key, chunk) más el borrado de los fragmentos sobrantes de una
+            versión anterior más larga)
+        """
+        clave = data['file_key']
+        fragmentos = dividir_en_fragmentos(data.get('text') or '', MONGO_FRAGMENTO_MAX_CARACTERES)
+        enlace = {'file_key': clave, 'file': data['file'], 'content_hash': data['content_hash']}
+        
+        operaciones = [
+            UpdateOne(
+                {'file_key': clave, 'chunk': fragmento['chunk']},
+                {'$set': {**enlace, **fragmento}},
+                upsert=True
+            )
+            for fragmento in fragmentos
+        ]
+        operaciones.append(DeleteMany({'file_key': clave, 'chunk': {'$gte': len(fragmentos)}}))
+        
+        padre = UpdateOne(
+            {'file_key': clave},
+            {'$set': documento_padre(data, fragmentos), '$unset': {'text': ''}},
+            upsert=True
+        )
+        return padre, operaciones
+    
+    def _completar_file_key(self, collection):
+        """Agregar file_key a documentos cargados antes de que existiera la clave canónica"""
+        antiguos = list(collection.find({'file_key': {'$exists': False}}, {'file': 1}))
+        if not antiguos:
+            return
+        collection.bulk_write([
+            UpdateOne({'_id': doc['_id']}, {'$set': {'file_key': clave_archivo(doc['file'])}})
+            for doc in antiguos if 'file' in doc
+        ], ordered=False)
+        self.logger.info(f"🔑 file_key agregado a {len(antiguos)} documentos existentes")
+    
+    def _completar_vista_previa(self, collection, batch_size):
+        """Agregar char_count y preview a documentos cargados antes de que existieran"""
+        antiguos = collection.find(
+            {'preview': {'$exists': False}, 'text': {'$exists': True}}, {'text': 1}
+        ).batch_size(batch_size)
+        operaciones = []
+        completados = 0
+        for doc in antiguos:
+            texto = doc['text'] or ''
+            operaciones.append(UpdateOne(
+                {'_id': doc['_id']},
+                {'$set': {'char_count': len(texto), 'preview': self._vista_previa(texto)}}
+            ))
+            if len(operaciones) >= batch_size:
+                collection.bulk_write(operaciones, ordered=False)
+                completados += len(operaciones)
+                operaciones = []
+        if operaciones:
+            collection.bulk_write(operaciones, ordered=False)
+            completados += len(operaciones)
+        if completados:
+            self.logger.info(f"📝 char_count y preview agregados a {completados} documentos existentes")
+    
+    def _escribir_lote_mongodb(self, collection, operaciones, pendientes, manifiesto, etapa, totales,
+                               coleccion_fragmentos=None, fragmentos=None):
+        """
+        Enviar un lote de upserts en un único bulk_write no ordenado.
+        
+        Un error en una operación no detiene las demás: se registra en las
+        estadísticas y ese documento queda fuera del manifiesto para reintentarlo.
+        
+        Los fragmentos ((índice del padre en `operaciones`, operación)) se
+        envían antes que los padres: si los de un documento fallan, su padre
+        no se actualiza y conserva el content_hash anterior, así que el
+        documento se vuelve a enviar en la próxima carga.
+        """
+        fallidas = set()
+        if fragmentos:
+            try:
+                resultado = coleccion_fragmentos.bulk_write([op for _, op in fragmentos], ordered=False)
+                detalles_fragmentos = resultado.bulk_api_result
+            except BulkWriteError as e:
+                detalles_fragmentos = e.details
+                for error in detalles_fragmentos.get('writeErrors', []):
+                    indice = fragmentos[error['index']][0]
+                    if indice not in fallidas:
+                        error_msg = f"Error cargando fragmentos de {pendientes[indice][0]}: {error.get('errmsg')}"
+                        self.logger.error(error_msg)
+                        self.estadisticas['errores'].append(error_msg)
+                    fallidas.add(indice)
+            totales['fragmentos'] += detalles_fragmentos.get('nUpserted', 0) + detalles_fragmentos.get('nMatched', 0)
+        
+        enviar = [indice for indice in range(len(operaciones)) if indice not in fallidas]
+        detalles = {}
+        try:
+            if enviar:
+                detalles = collection.bulk_write([operaciones[i] for i in enviar], ordered=False).bulk_api_result
+        except BulkWriteError as e:
+            detalles = e.details
+            for error in detalles.get('writeErrors', []):
+                indice = enviar[error['index']]
+                fallidas.add(indice)
+                error_msg = f"Error cargando {pendientes[indice][0]}: {error.get('errmsg')}"
+                self.logger.error(error_msg)
+                self.estadisticas['errores'].append(error_msg)
+        
+        totales['matched'] += detalles.get('nMatched', 0)
+        totales['upserted'] += detalles.get('nUpserted', 0)
+        totales['modified'] += detalles.get('nModified', 0)
+        totales['lotes'] += 1
+        totales['fallidos'] += len(fallidas)
+        for indice, (_, pendiente) in enumerate(pendientes):
+            if pendiente and indice not in fallidas:
+                manifiesto.registrar(etapa, *pendiente)
+        
+        self.logger.info(
+            f"💾 Lote {totales['lotes']}: {len(operaciones)} upserts "
+            f"({detalles.get('nUpserted', 0)} nuevos, {detalles.get('nModified', 0)} modificados)"
+        )
+    
+    def _crear_indices_mongodb(self, collection, coleccion_fragmentos=None):
+        """Crear índices en la colección de MongoDB (y en la de fragmentos si se usa)"""
         try:
             # Índice en el campo 'file' (único)
             collection.create_index('file', unique=True)
             self.logger.info("📑 Índice creado en campo 'file'")
             
+            # Índice en la clave canónica del archivo (con _id: orden total para paginar)
+            collection.create_index([('file_key', 1), ('_id', 1)])
+            self.logger.info("📑 Índice creado en campos 'file_key' y '_id'")
+            
             # Índice en timestamp
             collection.create_index('timestamp')
             self.logger.info("📑 Índice creado en campo 'timestamp'")
@@ -564,9 +1283,49 @@ class MinSaludScraper:
             collection.create_index([('text', 'text')])
             self.logger.info("📑 Índice de texto creado")
             
+            if coleccion_fragmentos is not None:
+                # Fragmentos de un documento en orden, y búsqueda de texto sobre los fragmentos
+                coleccion_fragmentos.create_index([('file_key', 1), ('chunk', 1)], unique=True)
+                coleccion_fragmentos.create_index([('text', 'text')])
+                self.logger.info("📑 Índices creados en la colección de fragmentos")
+            
         except Exception as e:
             self.logger.warning(f"⚠️  Error creando índices: {e}")
     
+    def actualizar_indice_busqueda(self, forzar=False):
+        """
+        Actualizar el índice invertido local con los textos extraídos
+        
+        Solo se tokenizan los documentos nuevos o modificados; los que ya no
+        están en la salida se quitan del índice.
+        
+        Args:
+            forzar (bool): Reconstruir el índice desde cero
+        """
+        inicio = time.time()
+        indice = IndiceBusqueda(SEARCH_INDEX_PATH)
+        try:
+            if forzar:
+                indice.vaciar()
+            totales = indice.actualizar_desde_salida()
+            resumen = indice.estadisticas()
+        finally:
+            indice.cerrar()
+        
+        if totales['errores']:
+            self.estadisticas['errores'].append(f"{totales['errores']} JSON inválidos no se indexaron")
+        
+        print("\n" + "="*60)
+        print("🔎 ÍNDICE DE BÚSQUEDA LOCAL")
+        print("="*60)
+        print(f"✅ Nuevos: {totales['nuevos']} | 🔄 Actualizados: {totales['actualizados']} | "
+              f"⏭️  Sin cambios: {totales['sin_cambios']} | 🗑️  Eliminados: {totales['eliminados']}")
+        print(f"📚 {resumen['documentos']} documentos, {resumen['terminos']:,} términos, "
+              f"{resumen['postings']:,} postings")
+        print(f"⏱️  {time.time() - inicio:.2f} s")
+        print("="*60)
+        return totales
+    
     def verificar_conexion_mongodb(self):
         """Verificar conexión a MongoDB y mostrar información"""
         if not MONGO_AVAILABLE:
@@ -622,7 +1381,16 @@ class MinSaludScraper:
         print(f"🔗 Total de links encontrados: {len(self.todos_los_links)}")
         print(f"📥 PDFs descargados: {self.estadisticas['pdfs_descargados']}")
         print(f"📝 Textos extraídos: {self.estadisticas['textos_extraidos']}")
+        print(f"⏭️  PDFs sin cambios (omitidos): {self.estadisticas['textos_sin_cambios']}")
+        print(f"🔒 Datos personales enmascarados: {self.estadisticas['pii_redactados']}")
         print(f"🗄️  Documentos en MongoDB: {self.estadisticas['documentos_mongo']}")
+        print(f"⏭️  JSON sin cambios (omitidos): {self.estadisticas['documentos_sin_cambios']}")
+        print(f"♻️  Respuestas 304 (sin cambios): {self.cache_http.estadisticas['no_modificados']}")
+        print(f"💾 Bytes ahorrados por revalidación: {self.cache_http.estadisticas['bytes_ahorrados']:,}")
+        cache_paginas = self.estadisticas['cache_paginas']
+        print(f"🖼️  Caché de páginas OCR: {cache_paginas['aciertos']} aciertos, {cache_paginas['fallos']} fallos")
+        cache_ocr = self.estadisticas['cache_ocr']
+        print(f"🔤 Caché de texto OCR: {cache_ocr['aciertos']} aciertos, {cache_ocr['fallos']} fallos")
         print(f"❌ Errores encontrados: {len(self.estadisticas['errores'])}")
         
         if self.estadisticas['errores']:
@@ -634,8 +1402,19 @@ class MinSaludScraper:
         
         print("="*60)
     
-    def ejecutar_pipeline_completo(self):
-        """Ejecutar todo el pipeline de scraping"""
+    def ejecutar_pipeline_completo(self, modo_async=False, reanudar=True, forzar=False, workers=None):
+        """Ejecutar todo el pipeline de scraping
+        
+        Cada etapa omite lo que no cambió desde la ejecución anterior: páginas y
+        PDFs se revalidan con peticiones condicionales, y textos y cargas a
+        MongoDB se saltan según el manifiesto de contenido.
+        
+        Args:
+            modo_async (bool): Usar el motor de crawling asyncio
+            reanudar (bool): Continuar un crawling interrumpido si existe
+            forzar (bool): Reprocesar textos y cargas aunque no hayan cambiado
+            workers (int, optional): Procesos para la extracción de texto
+        """
         inicio = time.time()
         
         try:
@@ -643,16 +1422,20 @@ class MinSaludScraper:
             print("="*60)
             
             # Paso 1: Crawling del sitio web
-            self.crawl_sitio_web()
+            self.crawl_sitio_web(modo_async=modo_async, reanudar=reanudar)
             
             # Paso 2: Descargar PDFs
             self.descargar_pdfs_paralelo()
             
             # Paso 3: Extraer texto de PDFs
-            self.procesar_pdfs_texto()
+            self.procesar_pdfs_texto(forzar=forzar, workers=workers)
             
             # Paso 4: Cargar a MongoDB
-            self.cargar_a_mongodb()
+            self.cargar_a_mongodb(forzar=forzar)
+            
+            # Paso 5: Índice de búsqueda local
+            if BUSQUEDA_BACKEND == "local":
+                self.actualizar_indice_busqueda(forzar=forzar)
             
             # Mostrar estadísticas
             duracion = time.time() - inicio
@@ -0,0 +1,87 @@
+"""
+Canonicalización de URLs de MinSalud
+Produce una única clave por documento para deduplicar links, descargas y cargas a MongoDB
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from urllib.parse import quote, urlsplit, urlunsplit
+
+# Escapes que nunca se decodifican: cambiarían la estructura de la ruta
+_SIEMPRE_CODIFICADOS = frozenset("/%")
+# Caracteres que se dejan tal cual al re-codificar un segmento
+_SEGURO = "!$&'()*+,;=:@-._~%"
+_ESCAPES = re.compile(r'(?:%[0-9A-Fa-f]{2})+')
+_EXTENSIONES = ('.pdf', '.aspx')
+_PUERTOS_DEFECTO = {'http': 80, 'https': 443}
+
+
+def _decodificar_escapes(match):
+    """Decodificar una secuencia de escapes %XX salvo `/` y `%`"""
+    datos = bytes(int(h, 16) for h in match.group(0)[1:].split('%'))
+    texto = datos.decode('utf-8', errors='surrogateescape')
+    return ''.join(
+        f"%{ord(caracter):02X}" if caracter in _SIEMPRE_CODIFICADOS else caracter
+        for caracter in texto
+    )
+
+
+def normalizar_segmento(segmento):
+    """
+    Normalizar un segmento de ruta.
+    
+    - Decodifica y vuelve a codificar con un único criterio: hexadecimales en
+      mayúsculas (`%c3%b3` → `%C3%B3`) y sub-delimitadores literales
+      (`%28` → `(`)
+    - Unifica acentos compuestos y descompuestos en NFC
+      (`Re%cc%81gimen` → `R%C3%A9gimen`)
+    - Pasa a minúsculas las extensiones `.pdf` y `.aspx`
+    """
+    texto = _ESCAPES.sub(_decodificar_escapes, segmento)
+    texto = unicodedata.normalize('NFC', texto)
+    texto = quote(texto, safe=_SEGURO, errors='surrogateescape')
+    
+    minusculas = texto.lower()
+    for extension in _EXTENSIONES:
+        if minusculas.endswith(extension):
+            return texto[:-len(extension)] + extension
+    return texto
+
+
+@lru_cache(maxsize=65536)
+def canonicalizar_url(url):
+    """
+    Obtener la forma canónica de una URL, usada como clave única.
+    
+    Descarta fragmento y query string, normaliza esquema, host y puerto, y
+    normaliza cada segmento de la ruta con `normalizar_segmento`.
+    
+    Args:
+        url (str): URL absoluta
+        
+    Returns:
+        str: URL canónica
+    """
+    partes = urlsplit(url.strip())
+    esquema = partes.scheme.lower()
+    host = (partes.hostname or '').lower()
+    
+    if partes.port and partes.port != _PUERTOS_DEFECTO.get(esquema):
+        host = f"{host}:{partes.port}"
+    
+    ruta = '/'.join(normalizar_segmento(s) for s in (partes.path or '/').split('/'))
+    return urlunsplit((esquema, host, ruta, '', ''))
+
+
+def nombre_archivo_pdf(url):
+    """Nombre de archivo local (canónico) para el PDF de una URL"""
+    nombre = canonicalizar_url(url).rsplit('/', 1)[-1]
+    if not nombre.endswith('.pdf'):
+        nombre += '.pdf'
+    return nombre
+
+
+def clave_archivo(nombre_archivo):
+    """Clave canónica de un archivo PDF descargado (para MongoDB)"""
+    return normalizar_segmento(nombre_archivo)
@@ -0,0 +1,331 @@
+"""
+Pruebas del registro de auditoría en segundo plano (JSON Lines)
+"""
+
+import sys
+import json
+import subprocess
+import tempfile
+import textwrap
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import auditoria
+from auditoria import RegistroAuditoria
+from ethical_compliance import EthicalScrapingValidator
+
+
+def _leer(ruta):
+    return [json.loads(linea) for linea in Path(ruta).read_text(encoding='utf-8').splitlines()]
+
+
+def test_json_lines_en_orden():
+    """Cada evento es una línea JSON válida, en orden y con su timestamp"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Eventos como JSON Lines")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = Path(tmp) / "logs" / "auditoria.log"
+        registro = RegistroAuditoria(ruta)
+        assert not ruta.exists()  # Nada se escribe mientras no haya eventos
+
+        for i in range(500):
+            registro.registrar({'url': f"https://x.example/{i}", 'action': 'extraer', 'status': 'ñandú "ok"'})
+        assert registro.vaciar(timeout=10)
+        eventos = _leer(ruta)
+        registro.cerrar()
+
+    assert [e['url'] for e in eventos] == [f"https://x.example/{i}" for i in range(500)]
+    assert all(e['status'] == 'ñandú "ok"' for e in eventos)
+    assert list(eventos[0]) == ['timestamp', 'url', 'action', 'status']
+    assert eventos[0]['timestamp'] <= eventos[-1]['timestamp']
+    assert registro.lotes < 500  # Escritos por lotes, no uno por uno
+    print(f"✅ PASÓ: 500 eventos en {registro.lotes} escrituras")
+
+
+def test_hilos_concurrentes():
+    """Ningún evento se pierde ni se mezcla cuando registran varios hilos"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Registro desde varios hilos")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = Path(tmp) / "auditoria.log"
+        registro = RegistroAuditoria(ruta, max_lote=64)
+        barrera = threading.Barrier(8)
+
+        def trabajador(n):
+            barrera.wait()
+            for i in range(1000):
+                registro.registrar({'hilo': n, 'i': i})
+
+        hilos = [threading.Thread(target=trabajador, args=(n,)) for n in range(8)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        registro.cerrar()
+        eventos = _leer(ruta)
+
+    assert len(eventos) == 8000
+    for n in range(8):
+        # Cada hilo conserva su propio orden
+        assert [e['i'] for e in eventos if e['hilo'] == n] == list(range(1000))
+    print("✅ PASÓ: 8000 eventos completos desde 8 hilos")
+
+
+def test_rotacion_por_tamano():
+    """Al superar el tamaño máximo se rota sin partir líneas y se conservan los respaldos pedidos"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Rotación por tamaño")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = Path(tmp) / "auditoria.log"
+        registro = RegistroAuditoria(ruta, max_bytes=4096, max_lote=10)
+        for i in range(300):
+            registro.registrar({'i': i, 'relleno': 'x' * 40})
+            if i % 10 == 9:
+                registro.vaciar()
+        registro.cerrar()
+
+        archivos = sorted(Path(tmp).glob("auditoria.log.*")) + [ruta]
+        eventos = [e for archivo in archivos for e in _leer(archivo)]
+        assert [e['i'] for e in eventos] == list(range(300))
+        assert all(archivo.stat().st_size <= 4096 for archivo in archivos)
+        assert registro.rotaciones == len(archivos) - 1 >= 3
+
+        # Con `respaldos` solo quedan los más recientes
+        limitado = RegistroAuditoria(ruta, max_bytes=4096, respaldos=2, max_lote=10)
+        for i in range(300):
+            limitado.registrar({'i': i, 'relleno': 'x' * 40})
+            if i % 10 == 9:
+                limitado.vaciar()
+        limitado.cerrar()
+        assert len(list(Path(tmp).glob("auditoria.log.*"))) == 2
+    print(f"✅ PASÓ: {registro.rotaciones} rotaciones sin perder ni partir eventos")
+
+
+def test_fsync_periodico():
+    """fsync se hace por intervalo (no por evento) y siempre al vaciar o quedar inactivo"""
+    print("\n" + "="*60)
+    print("🧪 TEST: fsync periódico")
+    print("="*60)
+
+    sincronizaciones = []
+    fsync_real = auditoria.os.fsync
+
+    def fsync_contado(fd):
+        sincronizaciones.append(time.monotonic())
+        fsync_real(fd)
+
+    with tempfile.TemporaryDirectory() as tmp, mock.patch.object(auditoria.os, 'fsync', fsync_contado):
+        registro = RegistroAuditoria(Path(tmp) / "auditoria.log", intervalo_fsync=0.2)
+        for i in range(2000):
+            registro.registrar({'i': i})
+        time.sleep(0.5)  # Inactivo: el escritor sincroniza sin que nadie lo pida
+        inactivo = len(sincronizaciones)
+        registro.registrar({'i': 'ultimo'})
+        registro.vaciar()
+        registro.cerrar()
+
+    print(f"   fsync: {len(sincronizaciones)} para 2001 eventos")
+    assert 1 <= inactivo <= 3
+    assert len(sincronizaciones) <= inactivo + 2
+    print("✅ PASÓ: Pocas sincronizaciones, ninguna pendiente al quedar inactivo")
+
+
+def test_vaciado_al_salir():
+    """Lo registrado justo antes de terminar el proceso llega al disco sin cerrar explícitamente"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Vaciado al terminar el proceso")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = Path(tmp) / "auditoria.log"
+        codigo = textwrap.dedent(f"""
+            import sys
+            sys.path.insert(0, {str(Path(__file__).parent / 'src')!r})
+            from auditoria import RegistroAuditoria
+            registro = RegistroAuditoria({str(ruta)!r}, intervalo_fsync=60)
+            for i in range(20000):
+                registro.registrar({{'i': i}})
+        """)
+        subprocess.run([sys.executable, "-c", codigo], check=True, timeout=60)
+        eventos = _leer(ruta)
+
+    assert [e['i'] for e in eventos] == list(range(20000))
+    print("✅ PASÓ: 20000 eventos escritos al salir")
+
+
+def test_registrar_durante_cierre():
+    """Lo registrado mientras (o después de que) se cierra se escribe sin arrancar otro hilo"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Registro concurrente con el cierre")
+    print("="*60)
+
+    arrancados = []
+    hilo_real = threading.Thread
+
+    def hilo_contado(*args, **kwargs):
+        hilo = hilo_real(*args, **kwargs)
+        if kwargs.get('name') == "auditoria":
+            arrancados.append(hilo)
+        return hilo
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = Path(tmp) / "auditoria.log"
+        for ronda in range(20):
+            registro = RegistroAuditoria(ruta, max_bytes=2048, max_lote=8)
+            barrera = threading.Barrier(5)
+
+            def trabajador(n):
+                barrera.wait()
+                for i in range(200):
+                    registro.registrar({'ronda': ronda, 'hilo': n, 'i': i})
+
+            with mock.patch.object(auditoria.threading, 'Thread', hilo_contado):
+                hilos = [hilo_real(target=trabajador, args=(n,)) for n in range(4)]
+                for hilo in hilos:
+                    hilo.start()
+                barrera.wait()
+                registro.cerrar()
+                for hilo in hilos:
+                    hilo.join()
+            assert registro.vaciar(timeout=5)
+            registro.registrar({'ronda': ronda, 'hilo': 'tarde', 'i': 0})
+
+        archivos = sorted(Path(tmp).glob("auditoria.log.*")) + [ruta]
+        eventos = [e for archivo in archivos for e in _leer(archivo)]
+
+    assert len(arrancados) <= 20
+    assert not any(hilo.is_alive() for hilo in arrancados)
+    for ronda in range(20):
+        propios = [e for e in eventos if e['ronda'] == ronda]
+        assert len(propios) == 4 * 200 + 1
+        for n in range(4):
+            assert [e['i'] for e in propios if e['hilo'] == n] == list(range(200))
+    print(f"✅ PASÓ: 20 cierres concurrentes, {len(eventos)} eventos, un escritor por registro")
+
+
+def test_cierre_con_escritor_lento():
+    """Si el escritor no termina dentro del timeout de cerrar, nadie más escribe hasta que termine"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Cierre con disco lento")
+    print("="*60)
+
+    activos = [0, 0]  # (escrituras en curso, máximo)
+    lock = threading.Lock()
+    escribir_real = RegistroAuditoria._escribir_lote
+
+    def escribir_lento(self, lineas):
+        with lock:
+            activos[0] += 1
+            activos[1] = max(activos)
+        if threading.current_thread().name == "auditoria":
+            time.sleep(0.3)  # Solo el hilo escritor va lento
+        escribir_real(self, lineas)
+        with lock:
+            activos[0] -= 1
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            mock.patch.object(RegistroAuditoria, '_escribir_lote', escribir_lento):
+        ruta = Path(tmp) / "auditoria.log"
+        registro = RegistroAuditoria(ruta)
+        for i in range(100):
+            registro.registrar({'i': i})
+        assert registro.cerrar(timeout=0.05) is False
+        for i in range(100, 150):
+            registro.registrar({'i': i})
+        assert registro.cerrar() is True
+        eventos = _leer(ruta)
+
+    assert activos[1] == 1
+    assert sorted(e['i'] for e in eventos) == list(range(150))
+    print("✅ PASÓ: Un solo escritor a la vez aunque el cierre expire")
+
+
+def test_validador_costo_minimo():
+    """log_scraping_activity escribe JSON en segundo plano y cuesta microsegundos"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Auditoría del validador ético")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with mock.patch.object(EthicalScrapingValidator, 'AUDIT_LOG_PATH', Path(tmp) / "ethical_audit.log"):
+            validator = EthicalScrapingValidator()
+        n = 20000
+        inicio = time.perf_counter()
+        for i in range(n):
+            validator.log_scraping_activity(f"https://www.minsalud.gov.co/p{i}.aspx", 'extraer_links', 'iniciado')
+        micros = (time.perf_counter() - inicio) / n * 1e6
+        assert validator.flush_audit_log(timeout=30)
+        eventos = _leer(validator.audit_log.ruta)
+        validator.audit_log.cerrar()
+
+    print(f"   {micros:.2f} µs por evento en el hilo que registra")
+    assert len(eventos) == n
+    assert eventos[-1]['url'].endswith(f"p{n - 1}.aspx") and eventos[-1]['user_agent'] == validator.USER_AGENT
+    assert micros < 50
+    print("✅ PASÓ: Eventos completos con costo mínimo en el crawling")
+
+
+def test_validador_conserva_respaldos():
+    """El validador rota la auditoría y borra los archivos rotados más viejos"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Retención de la auditoría del validador")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = Path(tmp) / "ethical_audit.log"
+        with mock.patch.multiple(EthicalScrapingValidator, AUDIT_LOG_PATH=ruta,
+                                 AUDIT_LOG_MAX_BYTES=2048, AUDIT_LOG_BACKUPS=3):
+            validator = EthicalScrapingValidator()
+        assert validator.audit_log.respaldos == 3
+        for i in range(400):
+            validator.log_scraping_activity(f"https://www.minsalud.gov.co/p{i}.aspx", 'extraer_links', 'iniciado')
+            if i % 10 == 9:
+                validator.flush_audit_log(timeout=10)
+        validator.audit_log.cerrar()
+        rotados = sorted(Path(tmp).glob("ethical_audit.log.*"))
+        ultimos = [e for archivo in rotados + [ruta] for e in _leer(archivo)]
+
+    assert validator.audit_log.rotaciones > 3 and len(rotados) == 3
+    # Se conservan los más recientes, sin huecos hasta el último evento
+    assert ultimos[-1]['url'].endswith("p399.aspx")
+    numeros = [int(e['url'].rsplit('/p', 1)[1][:-5]) for e in ultimos]
+    assert numeros == list(range(numeros[0], 400))
+    print(f"✅ PASÓ: {validator.audit_log.rotaciones} rotaciones, quedan {len(rotados)} respaldos")
+
+
+def run_all_tests():
+    """Ejecutar todos los tests"""
+    tests = [
+        test_json_lines_en_orden,
+        test_hilos_concurrentes,
+        test_rotacion_por_tamano,
+        test_fsync_periodico,
+        test_vaciado_al_salir,
+        test_registrar_durante_cierre,
+        test_cierre_con_escritor_lento,
+        test_validador_costo_minimo,
+        test_validador_conserva_respaldos,
+    ]
+
+    for test in tests:
+        try:
+            test()
+        except Exception as e:
+            print(f"\n❌ ERROR en {test.__name__}: {e}")
+            import traceback
+            traceback.print_exc()
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,239 @@
+"""
+Pruebas del índice de búsqueda local (tokenizador, BM25, frases y actualización incremental)
+No requieren internet ni MongoDB
+"""
+
+import sys
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import indice_busqueda
+from indice_busqueda import (
+    IndiceBusqueda, tokenizar, tokenizar_con_offsets, codificar_posiciones, decodificar_posiciones,
+    codificar_offsets, decodificar_offsets, normalizar_termino, resaltar
+)
+from salida_jsonl import SalidaJSONL
+
+JSON_REPO = sorted((Path(__file__).parent / "data" / "json_output").glob("minsalud_texto_*.json"))
+
+DOCUMENTOS = {
+    "a.pdf": "Resolución sobre la vacunación contra el sarampión en niños y niñas.",
+    "b.pdf": "Las vacunas y la vacunación. Vacunaciones masivas: vacunación, vacunación.",
+    "c.pdf": "Ley de salud pública. La protección social del sistema de salud.",
+    "d.pdf": "Salud y protección; la social es otra cosa.",
+}
+
+
+def _escribir_json(directorio, documentos):
+    rutas = []
+    for i, (nombre, texto) in enumerate(documentos.items(), 1):
+        ruta = Path(directorio) / f"minsalud_texto_{i:03d}.json"
+        ruta.write_text(json.dumps({'file': nombre, 'text': texto}, ensure_ascii=False), encoding='utf-8')
+        rutas.append(ruta)
+    return rutas
+
+
+def test_tokenizador():
+    """Tildes, mayúsculas, plurales y stopwords se normalizan igual en índice y consulta"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Tokenizador para español")
+    print("="*60)
+
+    terminos = [t for t, _ in tokenizar("VACUNACIÓN vacunaciones Vacunacion")]
+    assert len(set(terminos)) == 1, terminos
+    assert [t for t, _ in tokenizar("Niñas niños NIÑO")] == ["nin"] * 3
+    assert [t for t, _ in tokenizar("leyes ley luces luz")] == ["ley", "ley", "luz", "luz"]
+    # Las stopwords no se indexan pero ocupan posición
+    assert list(tokenizar("Ley de la Salud")) == [("ley", 0), ("salud", 3)]
+    # Los números se conservan (resoluciones, años)
+    assert [t for t, _ in tokenizar("Resolución 2025 de 2023")] == ["resolucion", "2025", "2023"]
+
+    for posiciones in ([], [0], [5, 127, 128, 300, 70000], list(range(0, 10**6, 997))):
+        assert decodificar_posiciones(codificar_posiciones(posiciones)) == posiciones
+        offsets = [(p, p + 1 + p % 300) for p in posiciones]
+        assert decodificar_offsets(codificar_offsets(offsets)) == offsets
+
+    # Ubicaciones en bytes UTF-8 del texto original
+    texto = "Niño\fcon   vacunación, año 2025"
+    datos = texto.encode('utf-8')
+    assert [datos[a:b].decode('utf-8') for _, _, a, b in tokenizar_con_offsets(texto)] == \
+        ["Niño", "vacunación", "año", "2025"]
+    print("✅ PASÓ: Plegado de tildes, stemming liviano y codificación de posiciones")
+
+
+def test_bm25_y_frases():
+    """BM25 ordena por frecuencia del término y las frases exigen términos consecutivos"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Ranking BM25 y frases")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        indice = IndiceBusqueda(Path(tmp) / "indice.sqlite3")
+        indice.actualizar(_escribir_json(tmp, DOCUMENTOS))
+
+        resultados = indice.buscar("vacunación")
+        assert [r['file'] for r in resultados] == ["b.pdf", "a.pdf"], resultados
+        assert resultados[0]['score'] > resultados[1]['score'] > 0
+
+        # Sin tildes ni plural se encuentra lo mismo
+        assert [r['file'] for r in indice.buscar("VACUNACIONES")] == ["b.pdf", "a.pdf"]
+
+        # "protección social" aparece seguida solo en c.pdf; en d.pdf los términos están separados
+        assert {r['file'] for r in indice.buscar("protección social")} == {"c.pdf", "d.pdf"}
+        assert [r['file'] for r in indice.buscar('"protección social"')] == ["c.pdf"]
+        # La stopword cuenta: "ley de salud" no coincide con "ley salud"
+        assert [r['file'] for r in indice.buscar('"ley de salud"')] == ["c.pdf"]
+        assert indice.buscar('"ley salud"') == []
+        assert indice.buscar("inexistente") == []
+        indice.cerrar()
+    print("✅ PASÓ: Ranking BM25 y frases posicionales")
+
+
+def test_actualizacion_incremental():
+    """Solo se tokenizan los documentos nuevos o modificados; los borrados salen del índice"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Actualización incremental del índice")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rutas = _escribir_json(tmp, DOCUMENTOS)
+        indice = IndiceBusqueda(Path(tmp) / "indice.sqlite3")
+        assert indice.actualizar(rutas)['nuevos'] == 4
+
+        with mock.patch.object(indice_busqueda, 'tokenizar_con_offsets', side_effect=AssertionError("tokenización innecesaria")):
+            totales = indice.actualizar(rutas)
+        assert totales['sin_cambios'] == 4 and not totales['nuevos'] + totales['actualizados']
+
+        # Mismo contenido con otra fecha: se relee el hash pero no se reindexa
+        os.utime(rutas[0], ns=(0, 0))
+        assert indice.actualizar(rutas)['sin_cambios'] == 4
+
+        rutas[1].write_text(json.dumps({'file': "b.pdf", 'text': "Texto corregido sobre dengue"}), encoding='utf-8')
+        rutas[3].unlink()
+        totales = indice.actualizar(rutas[:3])
+        assert (totales['actualizados'], totales['eliminados'], totales['sin_cambios']) == (1, 1, 2), totales
+        assert [r['file'] for r in indice.buscar("vacunación")] == ["a.pdf"]
+        assert [r['file'] for r in indice.buscar("dengue")] == ["b.pdf"]
+        assert indice.estadisticas()['documentos'] == 3
+        # Un JSON inválido se informa y conserva la versión indexada
+        rutas[2].write_text("{incompleto", encoding='utf-8')
+        assert indice.actualizar(rutas[:3])['errores'] == 1
+        assert [r['file'] for r in indice.buscar('"salud pública"')] == ["c.pdf"]
+        indice.cerrar()
+    print("✅ PASÓ: Cambios, borrados y JSON inválidos")
+
+    # JSONL: la última línea de cada doc_id reemplaza a las anteriores
+    with tempfile.TemporaryDirectory() as tmp:
+        jsonl = Path(tmp) / "textos.jsonl.gz"
+        with SalidaJSONL(jsonl) as salida:
+            for nombre, texto in DOCUMENTOS.items():
+                salida.escribir({'doc_id': nombre, 'file': nombre, 'text': texto})
+        indice = IndiceBusqueda(Path(tmp) / "indice.sqlite3")
+        assert indice.actualizar(jsonl=jsonl)['nuevos'] == 4
+        with SalidaJSONL(jsonl) as salida:
+            salida.escribir({'doc_id': "a.pdf", 'file': "a.pdf", 'text': "Fiebre amarilla"})
+        totales = indice.actualizar(jsonl=jsonl)
+        assert (totales['actualizados'], totales['sin_cambios'], totales['nuevos']) == (1, 3, 0), totales
+        assert [r['file'] for r in indice.buscar("vacunación")] == ["b.pdf"]
+        assert [r['file'] for r in indice.buscar("amarilla")] == ["a.pdf"]
+        assert indice.actualizar(jsonl=jsonl)['sin_cambios'] == 4
+        indice.cerrar()
+    print("✅ PASÓ: JSONL comprimido con versiones repetidas")
+
+
+def test_extractos_resaltados():
+    """Los extractos salen de las ubicaciones indexadas, sin leer el texto completo"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Extractos resaltados")
+    print("="*60)
+
+    relleno = "Texto de relleno sin relación con la consulta. "
+    texto = (relleno * 30 + "La VACUNACIÓN contra el sarampión protege a los niños. "
+             + relleno * 30 + "Campañas de vacunaciones masivas en ñandúes y niñas. " + relleno * 30)
+    with tempfile.TemporaryDirectory() as tmp:
+        indice = IndiceBusqueda(Path(tmp) / "indice.sqlite3")
+        indice.actualizar(_escribir_json(tmp, {"largo.pdf": texto, **DOCUMENTOS}))
+        doc_id = next(r['doc_id'] for r in indice.buscar("vacunacion niño") if r['file'] == "largo.pdf")
+
+        consultas_sql = []
+        indice.conn.set_trace_callback(consultas_sql.append)
+        extractos = indice.extractos(doc_id, "vacunacion niño", maximo=3, ancho=120)
+        indice.conn.set_trace_callback(None)
+
+        # Dos ventanas, en orden, con las formas del texto (tildes, mayúsculas, plural) resaltadas
+        assert len(extractos) == 2, extractos
+        assert extractos[0]['inicio'] < extractos[1]['inicio']
+        resaltados = [[e['texto'][a:b] for a, b in e['coincidencias']] for e in extractos]
+        assert resaltados == [["VACUNACIÓN", "niños"], ["vacunaciones", "niñas"]], resaltados
+        assert "«VACUNACIÓN» contra el sarampión protege a los «niños»" in resaltar(extractos[0])
+        assert all(len(e['texto'].encode('utf-8')) <= 120 for e in extractos)
+        # Del texto solo se leyeron las ventanas
+        lecturas = [sql for sql in consultas_sql if "textos" in sql]
+        assert len(lecturas) == 2 and all("substr(texto" in sql for sql in lecturas), lecturas
+
+        # Una sola ventana si se pide una: la que reúne más términos distintos
+        assert len(indice.extractos(doc_id, "sarampión vacunación", maximo=1)) == 1
+        assert "«sarampión»" in resaltar(indice.extractos(doc_id, "sarampión vacunación", maximo=1)[0])
+        assert indice.extractos(doc_id, "inexistente") == []
+        indice.cerrar()
+    print("✅ PASÓ: Extractos resaltados con ubicaciones precalculadas")
+
+
+def test_indice_json_repo():
+    """El índice construido con los JSON del repositorio encuentra cada documento por su vocabulario"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Índice sobre data/json_output")
+    print("="*60)
+
+    if not JSON_REPO:
+        print("⚠️ No hay JSON en data/json_output, prueba omitida")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        indice = IndiceBusqueda(Path(tmp) / "indice.sqlite3")
+        assert indice.actualizar(JSON_REPO)['nuevos'] == len(JSON_REPO)
+        encontrados = 0
+        for ruta in JSON_REPO:
+            data = json.loads(ruta.read_text(encoding='utf-8'))
+            palabras = [p for p in data['text'].split() if len(p) > 6 and p.isalpha()][:40:4]
+            if not palabras:
+                continue
+            resultados = indice.buscar(" ".join(palabras), 3)
+            assert data['file'] in [r['file'] for r in resultados], (data['file'], palabras)
+            encontrados += 1
+            # Cada término resaltado en los extractos es uno de la consulta
+            terminos = {t for t, _ in tokenizar(" ".join(palabras))}
+            for extracto in indice.extractos(resultados[0]['doc_id'], " ".join(palabras)):
+                for a, b in extracto['coincidencias']:
+                    assert normalizar_termino(extracto['texto'][a:b]) in terminos
+        indice.cerrar()
+    print(f"✅ PASÓ: {encontrados} documentos reales entre los 3 primeros resultados")
+
+
+def run_all_tests():
+    """Ejecutar todos los tests"""
+    tests = [
+        test_tokenizador,
+        test_bm25_y_frases,
+        test_actualizacion_incremental,
+        test_extractos_resaltados,
+        test_indice_json_repo,
+    ]
+
+    for test in tests:
+        try:
+            test()
+        except Exception as e:
+            print(f"\n❌ ERROR en {test.__name__}: {e}")
+            import traceback
+            traceback.print_exc()
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,382 @@
+"""
+Pruebas del control adaptativo de concurrencia y de las descargas de PDFs
+contra un servidor local (sin acceso a internet)
+"""
+
+import sys
+import heapq
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent / "benchmarks"))
+
+import scraper as scraper_mod
+from concurrencia import ControladorAIMD
+from servidor_stub import SitioStub, ValidadorLocal, scraper_contra_stub
+
+
+class ValidadorAuditado(ValidadorLocal):
+    """Validador local que conserva el registro de auditoría en memoria"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.auditoria = []
+        self._lock_auditoria = threading.Lock()
+
+    def log_scraping_activity(self, url, action, status):
+        with self._lock_auditoria:
+            self.auditoria.append((url, action, status))
+
+
+def test_aimd_aumento_y_reduccion():
+    """El límite sube de a uno por ronda sana y se reduce a la mitad ante una sobrecarga"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Aumento aditivo y reducción multiplicativa")
+    print("="*60)
+
+    control = ControladorAIMD(maximo=8)
+    assert control.limite == 1.0 and control.disponible
+
+    # Rondas completas con latencia estable: +1 por ronda hasta el techo
+    for ronda in range(12):
+        epocas = [control.iniciar() for _ in range(int(control.limite))]
+        assert not control.disponible
+        for epoca in epocas:
+            control.registrar(epoca, latencia=0.1)
+    assert control.limite == 8.0 and control.max_en_vuelo == 8
+
+    # Una ráfaga de 429 de peticiones de la misma época reduce una sola vez
+    epocas = [control.iniciar() for _ in range(8)]
+    for epoca in epocas:
+        control.registrar(epoca, latencia=0.1, sobrecarga=True)
+    assert control.limite == 4.0 and control.reducciones == 1
+
+    # Una petición lanzada después de la reducción sí vuelve a reducir
+    control.registrar(control.iniciar(), latencia=0.1, sobrecarga=True)
+    assert control.limite == 2.0 and control.reducciones == 2
+
+    # Nunca por debajo del mínimo
+    for _ in range(5):
+        control.registrar(control.iniciar(), sobrecarga=True)
+    assert control.limite == 1.0 and control.en_vuelo == 0
+    print("✅ PASÓ: +1 por ronda hasta 8, mitad por cada señal de sobrecarga")
+
+
+def test_aimd_latencia():
+    """Una latencia sostenida muy por encima de la base reduce el límite"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Reducción por latencia")
+    print("="*60)
+
+    control = ControladorAIMD(maximo=6, inicial=6)
+    for _ in range(20):
+        control.registrar(control.iniciar(), latencia=0.05)
+    assert control.limite == 6.0 and control.reducciones == 0
+
+    # Un pico aislado no alcanza para mover la media
+    control.registrar(control.iniciar(), latencia=0.15)
+    assert control.reducciones == 0
+
+    for _ in range(10):
+        control.registrar(control.iniciar(), latencia=0.5)
+    assert control.reducciones >= 1 and control.limite <= 3.0
+
+    # Si la lentitud se sostiene más allá de la ventana pasa a ser la base
+    for _ in range(control.ventana_base):
+        control.registrar(control.iniciar(), latencia=0.5)
+    reducciones = control.reducciones
+    assert control.latencia_base == 0.5
+    for _ in range(50):
+        control.registrar(control.iniciar(), latencia=0.5)
+    assert control.reducciones == reducciones and control.limite == 6.0
+    print(f"✅ PASÓ: {reducciones} reducciones por lentitud y recuperación con la nueva base")
+
+
+def test_aimd_hilos():
+    """cupo() bloquea a los hilos que exceden el límite"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Cupos desde varios hilos")
+    print("="*60)
+
+    control = ControladorAIMD(maximo=3, inicial=3)
+    en_curso = []
+    maximo = []
+    lock = threading.Lock()
+
+    def trabajador():
+        for _ in range(10):
+            with control.cupo() as resultado:
+                with lock:
+                    en_curso.append(1)
+                    maximo.append(len(en_curso))
+                time.sleep(0.002)
+                with lock:
+                    en_curso.pop()
+                resultado['latencia'] = 0.002
+
+    hilos = [threading.Thread(target=trabajador) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert max(maximo) <= 3 and control.max_en_vuelo == 3
+    assert control.en_vuelo == 0
+    print(f"✅ PASÓ: 80 cupos con un máximo de {max(maximo)} simultáneos")
+
+
+def test_descargas_por_limitador():
+    """Las descargas pasan por validación, límite de tasa, cabeceras éticas y auditoría"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Descargas con el motor ético")
+    print("="*60)
+
+    validador = ValidadorAuditado()
+    with SitioStub(paginas=10, latencia=0.01) as sitio, tempfile.TemporaryDirectory() as tmp:
+        with scraper_contra_stub(sitio, Path(tmp) / "links.json", validador=validador) as scraper:
+            scraper.crawl_sitio_web()
+            turnos_crawl = validador.limiter.adquisiciones
+            archivos = scraper.descargar_pdfs_paralelo()
+            pool = scraper.session.get_adapter(sitio.base)._pool_maxsize
+
+    maximo = min(validador.MAX_CONCURRENT_CONNECTIONS, scraper_mod.MAX_WORKERS)
+    descargas = [a for a in validador.auditoria if a[1] == 'descargar_pdf']
+    assert len(archivos) == 20
+    assert validador.limiter.adquisiciones - turnos_crawl == 20
+    # Ninguna petición sale con el User-Agent genérico de la sesión
+    assert validador.USER_AGENT in sitio.agentes
+    assert not any(agente.startswith('Mozilla') for agente in sitio.agentes)
+    assert sorted(estado for _, _, estado in descargas) == ['completado'] * 20 + ['iniciado'] * 20
+    assert pool == maximo
+    assert sitio.max_en_curso <= maximo
+    print(f"✅ PASÓ: 20 PDFs con turno, cabeceras y auditoría; pool de {pool} conexiones")
+
+
+def test_descargas_ante_429():
+    """Los 429 reducen la concurrencia y las descargas rechazadas se reintentan"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Descargas con respuestas 429")
+    print("="*60)
+
+    with SitioStub(paginas=12, latencia=0.02) as sitio, tempfile.TemporaryDirectory() as tmp:
+        with scraper_contra_stub(sitio, Path(tmp) / "links.json") as scraper, \
+                mock.patch.object(scraper_mod, 'RETRY_BACKOFF', 0.01):
+            scraper.crawl_sitio_web()
+            # Menos rechazos que intentos: ninguna descarga se pierde
+            sitio.rechazos = scraper_mod.RETRY_ATTEMPTS - 1
+            archivos = scraper.descargar_pdfs_paralelo()
+            control = scraper.control_descargas
+
+            # Un PDF que nunca deja de rechazarse termina en error sin colgar el pool
+            sitio.rechazos = 10 ** 6
+            errores = len(scraper.estadisticas['errores'])
+            assert scraper.descargar_pdf(sitio.base + "/Normativa/Documents/extra.pdf") is None
+            assert len(scraper.estadisticas['errores']) == errores + 1
+
+    print(f"   429: {sitio.respuestas_429 - scraper_mod.RETRY_ATTEMPTS} | Reducciones: {control.reducciones} | "
+          f"Máximo en vuelo: {control.max_en_vuelo}")
+    assert len(archivos) == 24
+    assert control.reducciones >= 1
+    assert control.en_vuelo == 0
+    print("✅ PASÓ: Todas las descargas completadas tras reducir la concurrencia")
+
+
+def test_descargas_alcanzan_el_techo():
+    """Con latencia estable la concurrencia sube hasta el techo sin superarlo"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Concurrencia de descargas hasta el techo")
+    print("="*60)
+
+    with SitioStub(paginas=20, latencia=0.03) as sitio, tempfile.TemporaryDirectory() as tmp:
+        with scraper_contra_stub(sitio, Path(tmp) / "links.json") as scraper:
+            scraper.crawl_sitio_web()
+            sitio.max_en_curso = 0
+            archivos = scraper.descargar_pdfs_paralelo()
+            control = scraper.control_descargas
+
+    print(f"   Máximo en vuelo: {control.max_en_vuelo} (servidor: {sitio.max_en_curso}) | "
+          f"Límite final: {control.limite:.1f}")
+    assert len(archivos) == 40
+    assert control.max_en_vuelo == control.maximo
+    assert sitio.max_en_curso <= control.maximo
+    print("✅ PASÓ: Concurrencia al techo con latencia estable")
+
+
+def test_ritmo_adaptativo():
+    """El validador baja el ritmo del host ante 429/503, respeta Retry-After y vuelve al techo"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Ritmo adaptativo por host")
+    print("="*60)
+
+    url = "https://www.minsalud.gov.co/Normativa/x.aspx"
+    otro = "https://www.datos.gov.co/y"
+    validador = ValidadorLocal(min_interval=0.5)  # Techo: 2 peticiones/s
+    validador.limiter.reloj = lambda: 0.0
+    # Un Crawl-delay de otro host no rebaja el techo de este
+    validador.limiter.fijar_limite(otro, 'crawl_delay', 1 / 10.0)
+
+    assert validador.record_response(url, 200) == 0.0
+    assert validador.limiter.limite(url, 'adaptativo') is None
+    assert validador.record_response(url, 429) == 0.0
+    assert validador.limiter.limite(url, 'adaptativo') == (1.0, 1)
+    assert validador.record_response(url, 503, retry_after="7") == 7.0
+    assert validador.limiter.limite(url, 'adaptativo') == (0.5, 1)
+    assert validador.limiter.limite(otro, 'adaptativo') is None
+    validador.record_response(otro, 429)
+    assert validador.limiter.limite(otro, 'adaptativo') == (0.05, 1)
+
+    # La pausa de Retry-After rige para el próximo turno del host
+    assert validador.limiter.reservar(url) == 7.0
+    assert validador.limiter.reservar(otro) == 0.0
+
+    # Nunca por debajo del piso
+    for _ in range(10):
+        validador.record_response(url, 429)
+    assert validador.rate_fractions['www.minsalud.gov.co'] == validador.MIN_RATE_FRACTION
+
+    # Las respuestas sanas recuperan el ritmo hasta el techo, nunca más
+    ritmos = []
+    for _ in range(15):
+        validador.record_response(url, 200)
+        limite = validador.limiter.limite(url, 'adaptativo')
+        ritmos.append(limite[0] if limite else 2.0)
+    assert ritmos == sorted(ritmos) and max(ritmos) == 2.0
+    assert validador.limiter.limite(url, 'adaptativo') is None
+    print(f"✅ PASÓ: Ritmo {ritmos[0]:.2f} → {ritmos[-1]:.1f} peticiones/s tras recuperarse")
+
+
+def _simular(control, peticiones, latencia, capacidad=None):
+    """
+    Servidor simulado con reloj propio: cada petición tarda `latencia` y,
+    con más de `capacidad` en curso, `latencia * en_curso / capacidad`
+    (el mismo modelo que SitioStub). Devuelve el máximo en curso.
+    """
+    en_curso = []  # (fin, orden, época, latencia)
+    ahora = 0.0
+    lanzadas = 0
+    max_en_curso = 0
+    while lanzadas < peticiones or en_curso:
+        while lanzadas < peticiones and control.disponible:
+            epoca = control.iniciar()
+            demora = latencia
+            if capacidad and len(en_curso) + 1 > capacidad:
+                demora *= (len(en_curso) + 1) / capacidad
+            heapq.heappush(en_curso, (ahora + demora, lanzadas, epoca, demora))
+            lanzadas += 1
+            max_en_curso = max(max_en_curso, len(en_curso))
+        ahora, _, epoca, demora = heapq.heappop(en_curso)
+        control.registrar(epoca, latencia=demora)
+    return max_en_curso
+
+
+def test_simulacion_servidor_saturado():
+    """Contra un servidor que se satura la concurrencia retrocede; sin saturación llega al techo"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Simulación con latencia inyectada")
+    print("="*60)
+
+    sano = ControladorAIMD(maximo=8)
+    max_sano = _simular(sano, 400, latencia=0.02)
+    saturado = ControladorAIMD(maximo=8)
+    max_saturado = _simular(saturado, 400, latencia=0.02, capacidad=1)
+    for nombre, control in (("sano", sano), ("saturado", saturado)):
+        print(f"   {nombre}: máximo en vuelo {control.max_en_vuelo}, "
+              f"{control.reducciones} reducciones, base {control.latencia_base * 1000:.0f}ms")
+
+    assert sano.max_en_vuelo == sano.maximo and sano.reducciones == 0
+    assert saturado.reducciones >= 3 and saturado.limite < saturado.maximo
+    assert max(max_sano, max_saturado) <= sano.maximo
+
+    # Contra el servidor local: el techo rige siempre y el resultado del crawling no cambia
+    resultados = {}
+    for capacidad in (None, 1):
+        with SitioStub(paginas=80, latencia=0.02, capacidad=capacidad) as sitio, \
+                tempfile.TemporaryDirectory() as tmp:
+            with scraper_contra_stub(sitio, Path(tmp) / "links.json") as scraper:
+                scraper.crawl_sitio_web(modo_async=True)
+                maximo = scraper.control_crawl.maximo
+            rutas = sorted(l['url'][len(sitio.base):] for l in scraper.todos_los_links)
+            resultados[capacidad] = (sitio.max_en_curso, rutas)
+    assert max(resultados[None][0], resultados[1][0]) <= maximo
+    assert resultados[None][1] == resultados[1][1]
+    print("✅ PASÓ: La concurrencia sigue la latencia sin pasar del techo")
+
+
+def test_simulacion_retry_after():
+    """Un 429 con Retry-After pausa el host y la página se reintenta sin perderse"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Retry-After durante el crawling")
+    print("="*60)
+
+    with SitioStub(paginas=10, latencia=0.0) as sitio, tempfile.TemporaryDirectory() as tmp:
+        with scraper_contra_stub(sitio, Path(tmp) / "base.json") as scraper:
+            scraper.crawl_sitio_web()
+            links_sin_rechazos = list(scraper.todos_los_links)
+
+        sitio.rechazos = 1
+        sitio.retry_after = 1
+        validador = ValidadorLocal()
+        with scraper_contra_stub(sitio, Path(tmp) / "links.json", validador=validador) as scraper:
+            inicio = time.perf_counter()
+            scraper.crawl_sitio_web()
+            duracion = time.perf_counter() - inicio
+
+    print(f"   Duración con Retry-After: 1: {duracion:.2f}s")
+    assert sitio.respuestas_429 == 1
+    assert scraper.todos_los_links == links_sin_rechazos
+    assert not scraper.estadisticas['errores']
+    assert 1.0 <= duracion < 5.0
+    assert validador.limiter.espera_total >= 1.0
+    print("✅ PASÓ: Pausa de Retry-After respetada y ninguna página perdida")
+
+
+def test_crawl_sin_espera_doble():
+    """El crawling secuencial espera solo lo que exige el límite de tasa"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Crawling secuencial sin espera extra")
+    print("="*60)
+
+    validador = ValidadorLocal(min_interval=0.05)
+    with SitioStub(paginas=12, latencia=0.0) as sitio, tempfile.TemporaryDirectory() as tmp:
+        with scraper_contra_stub(sitio, Path(tmp) / "links.json", validador=validador) as scraper:
+            inicio = time.perf_counter()
+            scraper.crawl_sitio_web()
+            duracion = time.perf_counter() - inicio
+
+    # 12 páginas a 20 por segundo: ~0.55 s (antes, 1 s extra por página)
+    print(f"   12 páginas en {duracion:.2f}s")
+    assert 11 * 0.05 * 0.9 <= duracion < 3.0
+    print("✅ PASÓ: Solo rige el límite de tasa")
+
+
+def run_all_tests():
+    """Ejecutar todos los tests"""
+    tests = [
+        test_aimd_aumento_y_reduccion,
+        test_aimd_latencia,
+        test_aimd_hilos,
+        test_descargas_por_limitador,
+        test_descargas_ante_429,
+        test_descargas_alcanzan_el_techo,
+        test_ritmo_adaptativo,
+        test_simulacion_servidor_saturado,
+        test_simulacion_retry_after,
+        test_crawl_sin_espera_doble,
+    ]
+
+    for test in tests:
+        try:
+            test()
+        except Exception as e:
+            print(f"\n❌ ERROR en {test.__name__}: {e}")
+            import traceback
+            traceback.print_exc()
+
+
+if __name__ == "__main__":
+    run_all_tests()
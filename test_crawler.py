@@ -0,0 +1,272 @@
+"""
+Pruebas del motor de crawling contra un servidor local (sin acceso a internet)
+"""
+
+import sys
+import json
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent / "benchmarks"))
+
+from servidor_stub import SitioStub, ValidadorLocal, scraper_contra_stub
+from frontera import FronteraCrawl
+
+
+def _crawl(sitio, destino, **kwargs):
+    """Ejecutar un crawl contra el sitio local y devolver los links guardados"""
+    modo_async = kwargs.pop('modo_async', False)
+    max_paginas = kwargs.pop('max_paginas', None)
+    with scraper_contra_stub(sitio, destino, **kwargs) as scraper:
+        scraper.crawl_sitio_web(max_paginas=max_paginas, modo_async=modo_async)
+    with open(destino, 'r', encoding='utf-8') as f:
+        return json.load(f)['links']
+
+
+def test_crawl_async_mismo_resultado():
+    """El modo async debe producir el mismo Links_MinSalud.json que el secuencial"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Crawl async vs secuencial")
+    print("="*60)
+
+    with SitioStub(paginas=25, latencia=0.01) as sitio, tempfile.TemporaryDirectory() as tmp:
+        links_serial = _crawl(sitio, Path(tmp) / "serial.json")
+        links_async = _crawl(sitio, Path(tmp) / "async.json", modo_async=True)
+
+    print(f"   Secuencial: {len(links_serial)} links | Async: {len(links_async)} links")
+    assert links_serial == links_async
+    assert len([l for l in links_serial if l['type'] == 'PDF']) == 25 * 2
+    print("✅ PASÓ: Ambos modos generan la misma lista de links")
+
+
+def test_crawl_async_limite_paginas():
+    """El límite de páginas se respeta también en modo async"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Límite de páginas en modo async")
+    print("="*60)
+
+    with SitioStub(paginas=25, latencia=0.01) as sitio, tempfile.TemporaryDirectory() as tmp:
+        links_serial = _crawl(sitio, Path(tmp) / "serial.json", max_paginas=4)
+        links_async = _crawl(sitio, Path(tmp) / "async.json", max_paginas=4, modo_async=True)
+
+    assert links_serial == links_async
+    print(f"✅ PASÓ: {len(links_async)} links con máximo 4 páginas")
+
+
+def test_crawl_async_concurrencia_acotada():
+    """Nunca hay más peticiones en vuelo que MAX_CONCURRENT_CONNECTIONS"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Concurrencia acotada")
+    print("="*60)
+
+    validador = ValidadorLocal()
+    with SitioStub(paginas=40, latencia=0.05) as sitio, tempfile.TemporaryDirectory() as tmp:
+        _crawl(sitio, Path(tmp) / "async.json", validador=validador, modo_async=True)
+        max_en_curso = sitio.max_en_curso
+
+    print(f"   Máximo en vuelo observado: {max_en_curso}")
+    assert 1 < max_en_curso <= validador.MAX_CONCURRENT_CONNECTIONS
+    print("✅ PASÓ: Concurrencia dentro del límite ético")
+
+
+def test_rate_limit_async():
+    """rate_limit_async respeta el intervalo mínimo sin bloquear el event loop"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Límite de tasa asyncio")
+    print("="*60)
+
+    validador = ValidadorLocal(min_interval=0.05)
+    instantes = []
+
+    async def peticion():
+        await validador.rate_limit_async()
+        instantes.append(time.perf_counter())
+
+    async def lanzar():
+        await asyncio.gather(*(peticion() for _ in range(5)))
+
+    asyncio.run(lanzar())
+    intervalos = [b - a for a, b in zip(instantes, instantes[1:])]
+    print(f"   Intervalos: {[round(i, 3) for i in intervalos]}")
+    assert all(i >= 0.04 for i in intervalos)
+    print("✅ PASÓ: Turnos espaciados por el intervalo mínimo")
+
+
+def test_frontera_deduplicacion():
+    """La frontera no encola ni registra dos veces la misma URL"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Deduplicación en la frontera")
+    print("="*60)
+
+    frontera = FronteraCrawl()
+    raiz = {'url': 'https://www.minsalud.gov.co/Normativa/Paginas/a.aspx', 'type': 'ASPX'}
+    otra = {'url': 'https://www.minsalud.gov.co/Normativa/Paginas/b.aspx', 'type': 'ASPX'}
+
+    assert frontera.encolar(raiz)
+    assert not frontera.encolar(dict(raiz))  # ya encolada
+    assert frontera.encolar(otra)
+    assert len(frontera) == 2
+
+    assert frontera.siguiente() == raiz
+    assert frontera.visitada(raiz['url'])
+    assert not frontera.encolar(raiz)  # ya visitada
+    assert not frontera.registrar(raiz['url'])  # visitada: no se registra
+
+    assert frontera.registrar(otra['url'])
+    assert not frontera.registrar(otra['url'])
+    assert frontera.siguiente() == otra
+    assert frontera.siguiente() is None
+    assert frontera.total_visitadas == 2
+    print("✅ PASÓ: Encolado, visitado y registrado se rastrean por URL")
+
+
+def test_crawl_reanudable():
+    """Un crawling interrumpido continúa desde el checkpoint y da el mismo resultado"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Reanudar crawling interrumpido")
+    print("="*60)
+
+    with SitioStub(paginas=25, latencia=0.0) as sitio, tempfile.TemporaryDirectory() as tmp:
+        completo = _crawl(sitio, Path(tmp) / "completo.json")
+
+        destino = Path(tmp) / "interrumpido.json"
+        with scraper_contra_stub(sitio, destino) as scraper:
+            original = scraper.extraer_hipervinculos
+            visitas = []
+
+            def extraer_con_fallo(url):
+                visitas.append(url)
+                if len(visitas) == 7:
+                    raise KeyboardInterrupt()
+                return original(url)
+
+            scraper.extraer_hipervinculos = extraer_con_fallo
+            try:
+                scraper.crawl_sitio_web()
+                assert False, "Se esperaba KeyboardInterrupt"
+            except KeyboardInterrupt:
+                pass
+
+        peticiones_antes = sitio.peticiones
+        with scraper_contra_stub(sitio, destino) as scraper:
+            scraper.crawl_sitio_web()
+            reanudadas = scraper.estadisticas['paginas_procesadas']
+        peticiones_reanudacion = sitio.peticiones - peticiones_antes
+
+        with open(destino, 'r', encoding='utf-8') as f:
+            links = json.load(f)['links']
+
+    print(f"   Páginas al reanudar: {peticiones_reanudacion} peticiones de {reanudadas} páginas")
+    assert links == completo
+    # Solo se piden las 19 páginas restantes (+ robots.txt)
+    assert peticiones_reanudacion <= 25 - 6 + 1
+    print("✅ PASÓ: El crawling reanudado no repite páginas ya procesadas")
+
+
+def test_crawl_reanudable_async_y_reinicio():
+    """El modo async también reanuda; reanudar=False empieza de cero"""
+    with SitioStub(paginas=25, latencia=0.0) as sitio, tempfile.TemporaryDirectory() as tmp:
+        completo = _crawl(sitio, Path(tmp) / "completo.json")
+
+        destino = Path(tmp) / "parcial.json"
+        parcial = _crawl(sitio, destino, max_paginas=5, modo_async=True)
+        assert len(parcial) < len(completo)
+
+        reanudado = _crawl(sitio, destino, modo_async=True)
+        assert reanudado == completo
+
+        with scraper_contra_stub(sitio, destino) as scraper:
+            scraper.crawl_sitio_web(max_paginas=3, reanudar=False)
+            assert scraper.frontera.total_visitadas == 3
+    print("✅ PASÓ: Reanudación async y reinicio explícito")
+
+
+def test_revalidacion_paginas():
+    """Un segundo crawling con páginas sin cambios usa 304 y los links en caché"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Revalidación HTTP de páginas")
+    print("="*60)
+
+    with SitioStub(paginas=15, latencia=0.0) as sitio, tempfile.TemporaryDirectory() as tmp:
+        destino = Path(tmp) / "links.json"
+        with scraper_contra_stub(sitio, destino) as scraper:
+            scraper.crawl_sitio_web()
+            primero = list(scraper.todos_los_links)
+            scraper.crawl_sitio_web(reanudar=False)
+            stats = dict(scraper.cache_http.estadisticas)
+            segundo = list(scraper.todos_los_links)
+
+            sitio.version += 1
+            scraper.crawl_sitio_web(reanudar=False)
+            stats_cambio = dict(scraper.cache_http.estadisticas)
+
+    print(f"   304: {stats['no_modificados']} | Bytes ahorrados: {stats['bytes_ahorrados']}")
+    assert segundo == primero
+    assert stats['no_modificados'] == 15
+    assert stats['bytes_ahorrados'] > 0
+    # Tras el cambio de versión todas las páginas se descargan de nuevo
+    assert stats_cambio['no_modificados'] == 15
+    assert stats_cambio['descargas_completas'] == 30
+    print("✅ PASÓ: Páginas sin cambios no se vuelven a descargar ni parsear")
+
+
+def test_revalidacion_pdfs():
+    """descargar_pdf revalida PDFs existentes y refresca los que cambiaron"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Revalidación HTTP de PDFs")
+    print("="*60)
+
+    with SitioStub(paginas=3, latencia=0.0) as sitio, tempfile.TemporaryDirectory() as tmp:
+        destino = Path(tmp) / "links.json"
+        with scraper_contra_stub(sitio, destino) as scraper:
+            scraper.crawl_sitio_web()
+            archivos = scraper.descargar_pdfs_paralelo()
+            assert len(archivos) == 6
+            assert scraper.estadisticas['pdfs_descargados'] == 6
+
+            scraper.descargar_pdfs_paralelo()
+            stats = dict(scraper.cache_http.estadisticas)
+            assert scraper.estadisticas['pdfs_descargados'] == 6
+
+            sitio.version += 1
+            scraper.descargar_pdfs_paralelo()
+            assert scraper.estadisticas['pdfs_descargados'] == 12
+            contenido = Path(archivos[0]).read_bytes()
+            assert b" v2" in contenido
+            assert not list(Path(archivos[0]).parent.glob("*.part"))
+
+    print(f"   304: {stats['no_modificados']} | Bytes ahorrados: {stats['bytes_ahorrados']}")
+    assert stats['no_modificados'] == 6
+    assert stats['bytes_ahorrados'] >= 6 * 4096
+    print("✅ PASÓ: PDFs sin cambios se conservan y los modificados se actualizan")
+
+
+def run_all_tests():
+    """Ejecutar todos los tests"""
+    tests = [
+        test_crawl_async_mismo_resultado,
+        test_crawl_async_limite_paginas,
+        test_crawl_async_concurrencia_acotada,
+        test_rate_limit_async,
+        test_frontera_deduplicacion,
+        test_crawl_reanudable,
+        test_crawl_reanudable_async_y_reinicio,
+        test_revalidacion_paginas,
+        test_revalidacion_pdfs,
+    ]
+
+    for test in tests:
+        try:
+            test()
+        except Exception as e:
+            print(f"\n❌ ERROR en {test.__name__}: {e}")
+            import traceback
+            traceback.print_exc()
+
+
+if __name__ == "__main__":
+    run_all_tests()
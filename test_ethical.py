@@ -3,6 +3,7 @@ Test del módulo de ética y cumplimiento legal
 """
 
 import sys
+import json
 from pathlib import Path
 
 # Agregar path del proyecto
@@ -180,16 +181,21 @@ def test_audit_log():
         "success"
     )
     
+    # El registro se escribe en segundo plano: esperar a que llegue al disco
+    assert validator.flush_audit_log(timeout=10)
+    
     # Verificar que se creó el archivo
-    audit_file = Path('logs/ethical_audit.log')
+    audit_file = validator.AUDIT_LOG_PATH
     
     if audit_file.exists():
         print(f"✅ PASÓ: Archivo de auditoría creado en {audit_file}")
         
-        # Leer últimas líneas
+        # Leer últimas líneas (una entrada JSON por línea)
         with open(audit_file, 'r', encoding='utf-8') as f:
             lines = f.readlines()
             if lines:
+                entrada = json.loads(lines[-1])
+                assert entrada['action'] == "test_scraping" and entrada['status'] == "success"
                 print(f"   Última entrada: {lines[-1].strip()}")
     else:
         print("❌ FALLÓ: No se creó el archivo de auditoría")
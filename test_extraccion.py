@@ -0,0 +1,377 @@
+"""
+Pruebas de la extracción de texto de PDFs (serie y pool de procesos)
+Usan los PDFs más pequeños de data/pdfs; no requieren internet ni OCR
+(el rasterizado y tesseract se simulan)
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import threading
+import time
+from PIL import Image
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import scraper as scraper_mod
+import backends_pdf
+import extraccion_pdf
+from cache_paginas import CachePaginas
+from cache_ocr import CacheOCR
+
+PDFS_PEQUENOS = sorted((Path(__file__).parent / "data" / "pdfs").glob("*.pdf"),
+                       key=lambda p: p.stat().st_size)[:2]
+
+
+def extraer_directorio(pdf_dir, json_dir, workers):
+    """Procesar pdf_dir con `workers` procesos y devolver (JSON por nombre, errores)"""
+    json_dir.mkdir()
+    with mock.patch.multiple(
+        scraper_mod,
+        PDF_DIR=pdf_dir,
+        JSON_OUTPUT_DIR=json_dir,
+        MANIFEST_PATH=json_dir / "manifiesto.sqlite3",
+    ):
+        scraper = scraper_mod.MinSaludScraper()
+        scraper.procesar_pdfs_texto(workers=workers)
+
+    salidas = {}
+    for json_path in sorted(json_dir.glob("*.json")):
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        # Un backend puede ordenar distinto bloques empatados según el proceso: comparar palabras
+        salidas[json_path.name] = (data['file'], sorted(data['text'].split()), data['method'], data['pages'], data['sha256'])
+    return salidas, scraper.estadisticas['errores']
+
+
+def test_paralelo_igual_a_serie():
+    """El pool de procesos produce los mismos JSON, con los mismos nombres, que la extracción en serie"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Extracción paralela determinista")
+    print("="*60)
+
+    if not backends_pdf.backends_en_orden():
+        print("⚠️  Ningún backend de PDF disponible, se omite")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        pdf_dir = tmp / "pdfs"
+        pdf_dir.mkdir()
+        for pdf in PDFS_PEQUENOS:
+            shutil.copy(pdf, pdf_dir / pdf.name)
+        (pdf_dir / "0_roto.pdf").write_bytes(b"esto no es un PDF")
+
+        serie, errores_serie = extraer_directorio(pdf_dir, tmp / "serie", workers=1)
+        paralelo, errores_paralelo = extraer_directorio(pdf_dir, tmp / "paralelo", workers=2)
+
+    assert len(serie) == len(PDFS_PEQUENOS)
+    assert paralelo == serie
+    # El PDF roto queda registrado como error en ambos modos
+    assert errores_serie == errores_paralelo
+    assert len(errores_paralelo) == 1 and "0_roto.pdf" in errores_paralelo[0]
+    print(f"✅ PASÓ: {len(paralelo)} textos idénticos, {len(errores_paralelo)} error registrado")
+
+
+def test_error_en_worker():
+    """Una excepción dentro del worker vuelve como mensaje y no detiene el proceso"""
+    with mock.patch.object(extraccion_pdf, 'extraer_texto_pdf', side_effect=MemoryError("sin memoria")):
+        texto, metodo, paginas, error = extraccion_pdf.extraer_texto_pdf_en_proceso("x.pdf")
+    assert texto is None and metodo == 'FALLIDO' and paginas == []
+    assert error == "MemoryError: sin memoria"
+    print("✅ PASÓ: Errores del worker capturados")
+
+
+class ImagenFalsa:
+    """Imagen de página que cuenta cuántas siguen vivas en memoria"""
+
+    vivas = 0
+    max_vivas = 0
+    candado = threading.Lock()
+
+    def __init__(self, numero):
+        self.numero = numero
+        with ImagenFalsa.candado:
+            ImagenFalsa.vivas += 1
+            ImagenFalsa.max_vivas = max(ImagenFalsa.max_vivas, ImagenFalsa.vivas)
+
+    def close(self):
+        with ImagenFalsa.candado:
+            ImagenFalsa.vivas -= 1
+
+
+def test_ocr_por_pagina():
+    """El OCR rasteriza una página a la vez, en paralelo, con memoria acotada"""
+    print("\n" + "="*60)
+    print("🧪 TEST: OCR página por página")
+    print("="*60)
+
+    total_paginas = 40
+    llamadas = []
+    ImagenFalsa.vivas = ImagenFalsa.max_vivas = 0
+
+    def rasterizar(pdf_path, dpi, first_page, last_page):
+        llamadas.append((first_page, last_page))
+        return [ImagenFalsa(first_page)]
+
+    def ocr(imagen, lang, config):
+        # Páginas impares más lentas para desordenar la terminación
+        time.sleep(0.01 if imagen.numero % 2 else 0.001)
+        return f"texto de la página {imagen.numero}" if imagen.numero != 7 else "  "
+
+    with mock.patch.object(extraccion_pdf, 'OCR_AVAILABLE', True), \
+            mock.patch.object(extraccion_pdf, 'cache_paginas', return_value=None), \
+            mock.patch.object(extraccion_pdf, 'cache_ocr', return_value=None), \
+            mock.patch.object(extraccion_pdf, 'pdfinfo_from_path', return_value={"Pages": total_paginas}, create=True), \
+            mock.patch.object(extraccion_pdf, 'convert_from_path', side_effect=rasterizar, create=True), \
+            mock.patch.object(extraccion_pdf, 'pytesseract', mock.Mock(image_to_string=ocr), create=True):
+        texto = extraccion_pdf.extraer_texto_pdf_ocr("escaneado.pdf", workers=4)
+
+    # Una página por rasterizado, nunca el documento completo
+    assert sorted(llamadas) == [(n, n) for n in range(1, total_paginas + 1)]
+    # A lo sumo `workers` imágenes vivas y todas liberadas al final
+    assert 1 < ImagenFalsa.max_vivas <= 4, ImagenFalsa.max_vivas
+    assert ImagenFalsa.vivas == 0
+    # Texto en orden de página; las páginas vacías se omiten
+    paginas = [int(bloque.split()[2]) for bloque in texto.split("\n\n")]
+    assert paginas == [n for n in range(1, total_paginas + 1) if n != 7]
+    print(f"✅ PASÓ: {total_paginas} páginas, máximo {ImagenFalsa.max_vivas} imágenes en memoria")
+
+
+def test_extraccion_hibrida_por_pagina():
+    """Solo las páginas vacías o escaneadas pasan por OCR; el método se registra por página"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Extracción híbrida por página")
+    print("="*60)
+
+    capa_texto = [
+        (1, "Texto normal de la primera página " * 5, 0.0),
+        (2, "   ", 0.0),                                  # vacía
+        (3, "Sello escaneado " * 2, 0.95),                # imagen con poco texto
+        (4, "Informe con una figura grande " * 20, 0.95),  # imagen, pero con capa de texto
+    ]
+    ocr_llamadas = []
+
+    def ocr_falso(pdf_path, numero, huella=None):
+        ocr_llamadas.append(numero)
+        return f"Texto OCR de la página {numero} " * 3
+
+    with mock.patch.object(extraccion_pdf, 'OCR_AVAILABLE', True), \
+            mock.patch.object(extraccion_pdf, 'cache_paginas', return_value=None), \
+            mock.patch.object(extraccion_pdf, 'extraer_capa_texto', return_value=('pdfminer', capa_texto)), \
+            mock.patch.object(extraccion_pdf, 'ocr_pagina', side_effect=ocr_falso):
+        texto, metodo, paginas = extraccion_pdf.extraer_texto_pdf("mixto.pdf", ocr_workers=2)
+
+    assert sorted(ocr_llamadas) == [2, 3]
+    assert metodo == 'HIBRIDO'
+    assert [p['method'] for p in paginas] == ['PDFMINER', 'OCR', 'OCR', 'PDFMINER']
+    assert [p['page'] for p in paginas] == [1, 2, 3, 4]
+    bloques = texto.split("\f")
+    assert len(bloques) == 4 and bloques[1].startswith("Texto OCR de la página 2")
+    print(f"✅ PASÓ: OCR en {len(ocr_llamadas)}/{len(capa_texto)} páginas")
+
+    # Sin capa de texto legible se hace OCR de todas las páginas
+    ocr_llamadas.clear()
+    with mock.patch.object(extraccion_pdf, 'OCR_AVAILABLE', True), \
+            mock.patch.object(extraccion_pdf, 'cache_paginas', return_value=None), \
+            mock.patch.object(extraccion_pdf, 'extraer_capa_texto', side_effect=ValueError("PDF dañado")), \
+            mock.patch.object(extraccion_pdf, 'pdfinfo_from_path', return_value={"Pages": 3}, create=True), \
+            mock.patch.object(extraccion_pdf, 'ocr_pagina', side_effect=ocr_falso):
+        texto, metodo, paginas = extraccion_pdf.extraer_texto_pdf("escaneado.pdf", ocr_workers=2)
+    assert sorted(ocr_llamadas) == [1, 2, 3] and metodo == 'OCR'
+    print("✅ PASÓ: PDF sin capa de texto procesado completo con OCR")
+
+
+def test_backends_respaldo():
+    """Se usa el backend configurado y, si falla o no está instalado, el siguiente"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Backends de PDF con respaldo")
+    print("="*60)
+
+    def roto(pdf_path):
+        raise ValueError("xref dañada")
+        yield
+
+    def bueno(pdf_path):
+        yield 1, "texto del respaldo", 0.0
+
+    backends = {
+        'pymupdf': (True, roto),
+        'pdfminer': (False, bueno),    # no instalado
+        'pdfplumber': (True, bueno),
+    }
+    with mock.patch.object(backends_pdf, 'BACKENDS', backends), \
+            mock.patch.object(backends_pdf, 'PDF_BACKEND', 'pymupdf'), \
+            mock.patch.object(backends_pdf, 'PDF_BACKENDS_RESPALDO', ['pdfminer', 'pdfplumber']):
+        assert backends_pdf.backends_en_orden() == ['pymupdf', 'pdfplumber']
+        assert backends_pdf.backends_en_orden('pdfplumber') == ['pdfplumber', 'pymupdf']
+        assert backends_pdf.extraer_capa_texto("x.pdf") == ('pdfplumber', [(1, "texto del respaldo", 0.0)])
+        try:
+            backends_pdf.backends_en_orden('acrobat')
+            assert False, "debió rechazar un backend desconocido"
+        except ValueError:
+            pass
+    print("✅ PASÓ: Orden y respaldo de backends")
+
+    # Los backends instalados extraen las mismas páginas de un PDF real
+    resultados = {
+        nombre: list(funcion(PDFS_PEQUENOS[0]))
+        for nombre, (disponible, funcion) in backends_pdf.BACKENDS.items() if disponible
+    }
+    for nombre, paginas in resultados.items():
+        palabras = set(" ".join(texto for _, texto, _ in paginas).split())
+        assert len(palabras) > 100, nombre
+        assert [numero for numero, _, _ in paginas] == list(range(1, len(paginas) + 1)), nombre
+        assert all(0.0 <= cobertura <= 1.0 for _, _, cobertura in paginas), nombre
+    assert len({len(paginas) for paginas in resultados.values()}) == 1
+    print(f"✅ PASÓ: {', '.join(resultados)} coinciden en número de páginas")
+
+
+def test_cache_paginas_lru():
+    """La caché de páginas devuelve la misma imagen y expulsa la usada hace más tiempo"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Caché de páginas rasterizadas")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Ruido aleatorio: los PNG no se comprimen y ocupan lo mismo
+        imagenes = [Image.frombytes("L", (120, 120), os.urandom(120 * 120)) for _ in range(3)]
+        cache = CachePaginas(Path(tmp) / "cache", max_bytes=10 * 1024 * 1024)
+        cache.guardar("abc", 1, 200, imagenes[0])
+        tamano = cache.contadores()['bytes']
+        cache.cerrar()
+
+        # Espacio para dos páginas
+        cache = CachePaginas(Path(tmp) / "cache", max_bytes=int(tamano * 2.5))
+        cache.guardar("abc", 1, 200, imagenes[0])
+        cache.guardar("abc", 2, 200, imagenes[1])
+        leida = cache.obtener("abc", 1, 200)          # la página 1 pasa a ser la más reciente
+        assert leida.tobytes() == imagenes[0].tobytes()
+        assert cache.obtener("abc", 1, 300) is None    # otro DPI es otra entrada
+        cache.guardar("abc", 3, 200, imagenes[2])      # expulsa la página 2
+
+        assert cache.obtener("abc", 2, 200) is None
+        assert cache.obtener("abc", 3, 200) is not None
+        contadores = cache.contadores()
+        assert contadores['entradas'] == 2 and contadores['bytes'] <= cache.max_bytes
+        assert (contadores['aciertos'], contadores['fallos']) == (2, 2)
+        assert contadores['expulsiones'] == 1
+        cache.cerrar()
+    print(f"✅ PASÓ: {contadores}")
+
+    # Repetir el OCR de un PDF no vuelve a rasterizar
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = Path(tmp) / "escaneado.pdf"
+        pdf.write_bytes(b"%PDF-1.4 contenido de prueba")
+        cache = CachePaginas(Path(tmp) / "cache", max_bytes=10 * 1024 * 1024)
+        rasterizados = []
+
+        def rasterizar(pdf_path, dpi, first_page, last_page):
+            rasterizados.append(first_page)
+            return [Image.new("L", (60, 60), color=first_page)]
+
+        with mock.patch.object(extraccion_pdf, 'cache_paginas', return_value=cache), \
+                mock.patch.object(extraccion_pdf, 'cache_ocr', return_value=None), \
+                mock.patch.object(extraccion_pdf, 'convert_from_path', side_effect=rasterizar, create=True), \
+                mock.patch.object(extraccion_pdf, 'pytesseract',
+                                  mock.Mock(image_to_string=lambda imagen, lang, config: str(imagen.getpixel((0, 0)))),
+                                  create=True):
+            primera = list(extraccion_pdf.ocr_paginas(pdf, [1, 2, 3], workers=2))
+            segunda = list(extraccion_pdf.ocr_paginas(pdf, [1, 2, 3], workers=2))
+
+        assert primera == segunda == [(1, "1"), (2, "2"), (3, "3")]
+        assert sorted(rasterizados) == [1, 2, 3]
+        assert cache.contadores()['aciertos'] == 3
+        cache.cerrar()
+    print("✅ PASÓ: Segunda pasada de OCR sin rasterizar")
+
+    # Un PNG truncado se olvida y se borra del disco
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CachePaginas(Path(tmp) / "cache", max_bytes=10 * 1024 * 1024)
+        cache.guardar("abc", 1, 200, Image.frombytes("L", (120, 120), os.urandom(120 * 120)))
+        png = next(cache.directorio.rglob("*.png"))
+        png.write_bytes(png.read_bytes()[:100])
+
+        assert cache.obtener("abc", 1, 200) is None
+        assert not png.exists()
+        contadores = cache.contadores()
+        assert (contadores['entradas'], contadores['bytes'], contadores['fallos']) == (0, 0, 1)
+        cache.cerrar()
+    print("✅ PASÓ: PNG ilegible borrado de la caché")
+
+
+def test_cache_ocr():
+    """Las páginas repetidas entre PDFs no vuelven a pasar por Tesseract"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Caché de resultados de OCR")
+    print("="*60)
+
+    portada = Image.new("L", (80, 80), color=200)
+    paginas = {
+        ("a.pdf", 1): portada, ("a.pdf", 2): Image.new("L", (80, 80), color=10),
+        ("b.pdf", 1): portada.copy(), ("b.pdf", 2): Image.new("L", (80, 80), color=20),
+    }
+    llamadas = []
+
+    def tesseract(imagen, lang, config):
+        llamadas.append(imagen.getpixel((0, 0)))
+        return f"texto {imagen.getpixel((0, 0))} {config}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CacheOCR(Path(tmp) / "ocr.sqlite3", max_bytes=10 * 1024 * 1024)
+        with mock.patch.object(extraccion_pdf, 'cache_ocr', return_value=cache), \
+                mock.patch.object(extraccion_pdf, 'rasterizar_pagina',
+                                  side_effect=lambda pdf, numero, huella: paginas[(pdf, numero)].copy()), \
+                mock.patch.object(extraccion_pdf, 'pytesseract', mock.Mock(image_to_string=tesseract), create=True):
+            textos = [extraccion_pdf.ocr_pagina(pdf, numero) for pdf, numero in paginas]
+            assert textos[0] == textos[2]
+            assert sorted(llamadas) == [10, 20, 200]          # la portada solo una vez
+
+            # Otra configuración de Tesseract no reutiliza resultados
+            with mock.patch.object(extraccion_pdf, 'OCR_CONFIG', "--psm 4"):
+                extraccion_pdf.ocr_pagina("a.pdf", 1)
+            assert len(llamadas) == 4
+
+        contadores = cache.contadores()
+        assert (contadores['aciertos'], contadores['fallos']) == (1, 4)
+        assert contadores['entradas'] == 4
+
+        # LRU: con espacio para un solo texto se conserva el último
+        pequena = CacheOCR(Path(tmp) / "pequena.sqlite3", max_bytes=10)
+        pequena.guardar("x", "0123456789")
+        pequena.guardar("y", "abcdefghij")
+        assert pequena.obtener("x") is None and pequena.obtener("y") == "abcdefghij"
+        assert pequena.contadores()['expulsiones'] == 1
+        cache.cerrar()
+        pequena.cerrar()
+    print(f"✅ PASÓ: {contadores}")
+
+
+def run_all_tests():
+    """Ejecutar todos los tests"""
+    tests = [
+        test_paralelo_igual_a_serie,
+        test_error_en_worker,
+        test_ocr_por_pagina,
+        test_extraccion_hibrida_por_pagina,
+        test_backends_respaldo,
+        test_cache_paginas_lru,
+        test_cache_ocr,
+    ]
+
+    for test in tests:
+        try:
+            test()
+        except Exception as e:
+            print(f"\n❌ ERROR en {test.__name__}: {e}")
+            import traceback
+            traceback.print_exc()
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,490 @@
+"""
+Pruebas del pipeline incremental (manifiesto de contenido por etapa)
+No requieren internet, OCR ni un servidor MongoDB
+"""
+
+import sys
+import json
+import shutil
+import tempfile
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import scraper as scraper_mod
+from manifiesto import ManifiestoPipeline, huella_ajustes
+from salida_jsonl import leer_registros
+from fragmentos import dividir_en_fragmentos
+
+try:
+    import mongomock
+    MONGOMOCK_AVAILABLE = True
+except ImportError:
+    MONGOMOCK_AVAILABLE = False
+
+PDFS_REPO = sorted((Path(__file__).parent / "data" / "pdfs").glob("*.pdf"))
+
+
+@contextmanager
+def mongomock_compatible():
+    """
+    mongomock 4.x no acepta el argumento `sort` que PyMongo >= 4.11 pasa al
+    construir operaciones UpdateOne para bulk_write; se descarta si es None.
+    """
+    from mongomock.collection import BulkOperationBuilder
+    original = BulkOperationBuilder.add_update
+
+    def add_update(self, *args, sort=None, **kwargs):
+        assert sort is None
+        return original(self, *args, **kwargs)
+
+    with mock.patch.object(BulkOperationBuilder, 'add_update', add_update):
+        yield
+
+
+@contextmanager
+def contar_llamadas(*metodos):
+    """Contar las llamadas a métodos de las colecciones de mongomock (ida y vuelta al servidor)"""
+    conteo = Counter()
+    parches = []
+    for nombre in metodos:
+        original = getattr(mongomock.collection.Collection, nombre)
+
+        def envoltura(self, *args, _nombre=nombre, _original=original, **kwargs):
+            conteo[_nombre] += 1
+            return _original(self, *args, **kwargs)
+
+        parches.append(mock.patch.object(mongomock.collection.Collection, nombre, envoltura))
+    for parche in parches:
+        parche.start()
+    try:
+        yield conteo
+    finally:
+        for parche in parches:
+            parche.stop()
+
+
+@contextmanager
+def entorno_datos(tmp, n_pdfs=3):
+    """Scraper con PDF_DIR, JSON_OUTPUT_DIR y manifiesto en un directorio temporal"""
+    tmp = Path(tmp)
+    pdf_dir = tmp / "pdfs"
+    json_dir = tmp / "json_output"
+    pdf_dir.mkdir()
+    json_dir.mkdir()
+    for pdf in PDFS_REPO[:n_pdfs]:
+        shutil.copy(pdf, pdf_dir / pdf.name)
+
+    with mock.patch.multiple(
+        scraper_mod,
+        PDF_DIR=pdf_dir,
+        JSON_OUTPUT_DIR=json_dir,
+        MANIFEST_PATH=tmp / "manifiesto.sqlite3",
+    ):
+        scraper = scraper_mod.MinSaludScraper()
+        llamadas = []
+
+        def extraer_falso(pdf_path):
+            llamadas.append(Path(pdf_path).name)
+            texto = f"Texto de {Path(pdf_path).name} " * 10
+            return texto, 'PDFMINER', [{'page': 1, 'method': 'PDFMINER', 'char_count': len(texto)}]
+
+        scraper.extraer_texto_pdf = extraer_falso
+        yield scraper, llamadas, pdf_dir, json_dir
+
+
+def test_manifiesto_huella():
+    """El manifiesto reconoce entradas sin cambios y detecta modificaciones"""
+    with tempfile.TemporaryDirectory() as tmp:
+        archivo = Path(tmp) / "a.pdf"
+        archivo.write_bytes(b"contenido 1")
+        manifiesto = ManifiestoPipeline(Path(tmp) / "m.sqlite3")
+
+        huella = manifiesto.huella('texto', archivo)
+        assert manifiesto.salida_vigente('texto', archivo, huella) is None
+        manifiesto.registrar('texto', archivo, huella, 'salida.json')
+        assert manifiesto.salida_vigente('texto', archivo, manifiesto.huella('texto', archivo)) == 'salida.json'
+
+        archivo.write_bytes(b"contenido 2")
+        assert manifiesto.salida_vigente('texto', archivo, manifiesto.huella('texto', archivo)) is None
+
+        # Mismo contenido con otros ajustes: no está vigente
+        huella = manifiesto.huella('texto', archivo)
+        ajustes = huella_ajustes(ocr_dpi=200, pii_redaccion=True)
+        manifiesto.registrar('texto', archivo, huella, 'salida.json', ajustes)
+        assert manifiesto.salida_vigente('texto', archivo, huella, ajustes) == 'salida.json'
+        assert manifiesto.salida_vigente('texto', archivo, huella, huella_ajustes(ocr_dpi=300, pii_redaccion=True)) is None
+        assert manifiesto.salida_vigente('texto', archivo, huella) is None
+        manifiesto.cerrar()
+    print("✅ PASÓ: Huellas del manifiesto")
+
+
+def test_texto_incremental():
+    """procesar_pdfs_texto solo extrae PDFs nuevos o modificados"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Extracción de texto incremental")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp, entorno_datos(tmp) as (scraper, llamadas, pdf_dir, json_dir):
+        scraper.procesar_pdfs_texto()
+        assert len(llamadas) == 3
+        nombres = sorted(p.name for p in json_dir.glob("*.json"))
+
+        # Segunda ejecución: nada cambió
+        scraper.procesar_pdfs_texto()
+        assert len(llamadas) == 3
+        assert scraper.estadisticas['textos_sin_cambios'] == 3
+
+        # Modificar un PDF y agregar uno nuevo al inicio del orden alfabético
+        modificado = sorted(pdf_dir.glob("*.pdf"))[1]
+        with open(modificado, 'ab') as f:
+            f.write(b"\n% cambio\n")
+        shutil.copy(PDFS_REPO[-1], pdf_dir / ("000_" + PDFS_REPO[-1].name))
+
+        scraper.procesar_pdfs_texto()
+        assert sorted(llamadas[3:]) == sorted([modificado.name, "000_" + PDFS_REPO[-1].name])
+
+        # El PDF modificado conserva su JSON y el nuevo no pisa ninguno existente
+        nombres_final = sorted(p.name for p in json_dir.glob("*.json"))
+        assert set(nombres) < set(nombres_final) and len(nombres_final) == 4
+        archivos = {json.load(open(p, encoding='utf-8'))['file'] for p in json_dir.glob("*.json")}
+        assert len(archivos) == 4
+
+        # forzar=True reprocesa todo
+        scraper.procesar_pdfs_texto(forzar=True)
+        assert len(llamadas) == 5 + 4
+
+        # Cambiar la configuración de extracción invalida los textos guardados
+        for ajuste in ({'OCR_DPI': 300}, {'PDF_BACKEND': 'pdfminer'}, {'PII_REDACCION': False},
+                       {'PII_CATEGORIAS_REDACCION': ['email']}):
+            with mock.patch.multiple(scraper_mod, **ajuste):
+                antes = len(llamadas)
+                scraper.procesar_pdfs_texto()
+                assert len(llamadas) == antes + 4, ajuste
+                scraper.procesar_pdfs_texto()
+                assert len(llamadas) == antes + 4, ajuste
+
+    print("✅ PASÓ: Solo se reprocesan entradas modificadas")
+
+
+def test_mongo_incremental():
+    """cargar_a_mongodb omite los JSON ya cargados sin cambios"""
+    if not MONGOMOCK_AVAILABLE:
+        print("⚠️ mongomock no disponible, prueba omitida")
+        return
+
+    print("\n" + "="*60)
+    print("🧪 TEST: Carga incremental a MongoDB")
+    print("="*60)
+
+    cliente = mongomock.MongoClient()
+    with tempfile.TemporaryDirectory() as tmp, entorno_datos(tmp) as (scraper, llamadas, pdf_dir, json_dir), \
+            mock.patch.object(scraper_mod, 'MongoClient', lambda *a, **k: cliente), \
+            mock.patch.object(scraper_mod, 'MONGO_AVAILABLE', True), \
+            mock.patch.object(cliente, 'close', lambda: None), \
+            mongomock_compatible():
+        scraper.procesar_pdfs_texto()
+        coleccion = cliente[scraper_mod.DB_NAME][scraper_mod.COLLECTION_NAME]
+
+        scraper.cargar_a_mongodb(crear_indices=False)
+        assert coleccion.count_documents({}) == 3
+
+        # Segunda carga: los JSON no se leen ni se consultan en MongoDB
+        with mock.patch.object(scraper_mod.json, 'load', side_effect=AssertionError("lectura innecesaria")):
+            scraper.cargar_a_mongodb(crear_indices=False)
+        assert scraper.estadisticas['documentos_sin_cambios'] == 3
+
+        # Si la colección se vacía, el manifiesto deja de ser válido
+        coleccion.delete_many({})
+        scraper.cargar_a_mongodb(crear_indices=False)
+        assert coleccion.count_documents({}) == 3
+
+    print("✅ PASÓ: Los JSON sin cambios no se vuelven a cargar")
+
+
+def test_mongo_bulk_upsert():
+    """cargar_a_mongodb hace un bulk_write por lote en vez de consultas por documento"""
+    if not MONGOMOCK_AVAILABLE:
+        print("⚠️ mongomock no disponible, prueba omitida")
+        return
+
+    print("\n" + "="*60)
+    print("🧪 TEST: Carga a MongoDB con bulk upsert")
+    print("="*60)
+
+    n_documentos, lote = 25, 10
+    cliente = mongomock.MongoClient()
+    with tempfile.TemporaryDirectory() as tmp, entorno_datos(tmp, n_pdfs=0) as (scraper, _, _, json_dir), \
+            mock.patch.object(scraper_mod, 'MongoClient', lambda *a, **k: cliente), \
+            mock.patch.object(scraper_mod, 'MONGO_AVAILABLE', True), \
+            mock.patch.object(cliente, 'close', lambda: None), \
+            mongomock_compatible():
+        for i in range(1, n_documentos + 1):
+            with open(json_dir / f"minsalud_texto_{i:03d}.json", 'w', encoding='utf-8') as f:
+                json.dump({'file': f"doc{i}.pdf", 'text': f"texto {i} " * 20, 'method': 'PYMUPDF'}, f)
+        coleccion = cliente[scraper_mod.DB_NAME][scraper_mod.COLLECTION_NAME]
+        # Documento cargado por una versión anterior, sin file_key ni content_hash
+        coleccion.insert_one({'file': "doc1.pdf", 'text': "versión anterior"})
+
+        with contar_llamadas('bulk_write', 'find_one', 'update_one', 'insert_many') as llamadas:
+            scraper.cargar_a_mongodb(batch_size=lote, crear_indices=False)
+        resultado = scraper.estadisticas['mongo_bulk']
+        assert coleccion.count_documents({}) == n_documentos
+        assert (resultado['upserted'], resultado['matched'], resultado['modified']) == (24, 1, 1)
+        # O(N/lote) idas y vueltas: 3 lotes + 1 para completar file_key, y un find_one de la colección vacía
+        assert llamadas['bulk_write'] == 3 + 1, llamadas
+        assert llamadas['find_one'] <= 1 and not llamadas['update_one'] and not llamadas['insert_many']
+        print(f"✅ PASÓ: {n_documentos} documentos en {llamadas['bulk_write']} bulk_write ({dict(llamadas)})")
+
+        # Sin manifiesto, el content_hash evita reenviar lo que no cambió
+        scraper_mod.MANIFEST_PATH.unlink()
+        (json_dir / "minsalud_texto_007.json").write_text(
+            json.dumps({'file': "doc7.pdf", 'text': "texto corregido " * 20, 'method': 'OCR'}), encoding='utf-8'
+        )
+        with contar_llamadas('bulk_write') as llamadas:
+            scraper.cargar_a_mongodb(batch_size=lote, crear_indices=False)
+        resultado = scraper.estadisticas['mongo_bulk']
+        assert llamadas['bulk_write'] == 1
+        assert (resultado['upserted'], resultado['matched'], resultado['modified']) == (0, 1, 1)
+        assert coleccion.find_one({'file_key': 'doc7.pdf'})['method'] == 'OCR'
+        assert coleccion.count_documents({}) == n_documentos
+    print("✅ PASÓ: Solo el documento modificado se reenvía")
+
+
+def test_salida_jsonl():
+    """Salida JSONL de solo-anexado (plana y gzip) y carga a MongoDB desde la última posición"""
+    if not MONGOMOCK_AVAILABLE:
+        print("⚠️ mongomock no disponible, prueba omitida")
+        return
+
+    print("\n" + "="*60)
+    print("🧪 TEST: Salida JSONL y carga en streaming")
+    print("="*60)
+
+    for nombre in ("textos.jsonl", "textos.jsonl.gz"):
+        cliente = mongomock.MongoClient()
+        with tempfile.TemporaryDirectory() as tmp, entorno_datos(tmp) as (scraper, llamadas, pdf_dir, json_dir), \
+                mock.patch.multiple(scraper_mod, OUTPUT_FORMAT="jsonl", JSONL_OUTPUT_PATH=json_dir / nombre), \
+                mock.patch.object(scraper_mod, 'MongoClient', lambda *a, **k: cliente), \
+                mock.patch.object(scraper_mod, 'MONGO_AVAILABLE', True), \
+                mock.patch.object(cliente, 'close', lambda: None), \
+                mongomock_compatible():
+            ruta = json_dir / nombre
+            coleccion = cliente[scraper_mod.DB_NAME][scraper_mod.COLLECTION_NAME]
+
+            scraper.procesar_pdfs_texto()
+            registros = [registro for registro, _ in leer_registros(ruta)]
+            assert len(registros) == 3 and not list(json_dir.glob("*.json"))
+            assert {r['doc_id'] for r in registros} == {scraper_mod.clave_archivo(pdf.name) for pdf in pdf_dir.iterdir()}
+
+            scraper.cargar_a_mongodb(batch_size=2, crear_indices=False)
+            assert coleccion.count_documents({}) == 3
+
+            # Sin cambios no se anexa nada; un PDF modificado agrega una línea nueva
+            scraper.procesar_pdfs_texto()
+            assert len(llamadas) == 3
+            modificado = sorted(pdf_dir.iterdir())[0]
+            with open(modificado, 'ab') as f:
+                f.write(b"\n% cambio")
+            scraper.procesar_pdfs_texto()
+            registros = [registro for registro, _ in leer_registros(ruta)]
+            assert len(registros) == 4 and registros[-1]['file'] == modificado.name
+
+            # La segunda carga solo lee desde donde terminó la primera
+            with mock.patch.object(scraper_mod, 'leer_registros', wraps=leer_registros) as lector:
+                scraper.cargar_a_mongodb(batch_size=2, crear_indices=False)
+            assert lector.call_args.args[1] > 0
+            resultado = scraper.estadisticas['mongo_bulk']
+            assert (resultado['upserted'], resultado['modified']) == (0, 1)
+            assert coleccion.count_documents({}) == 3
+            doc = coleccion.find_one({'file_key': scraper_mod.clave_archivo(modificado.name)})
+            assert doc['content_hash'] == scraper_mod.hashlib.sha256(
+                list(leer_registros(ruta))[-1][1]
+            ).hexdigest()
+        print(f"✅ PASÓ: {nombre}")
+
+
+def test_mongo_fragmentos():
+    """Con MONGO_FRAGMENTOS el texto va en fragmentos por páginas enlazados a un padre sin texto"""
+    if not MONGOMOCK_AVAILABLE:
+        print("⚠️ mongomock no disponible, prueba omitida")
+        return
+
+    print("\n" + "="*60)
+    print("🧪 TEST: Modelo fragmentado en MongoDB")
+    print("="*60)
+
+    # Páginas completas mientras quepan; una página demasiado larga se corta
+    paginas = [f"página {n} " + "palabra " * 20 for n in range(1, 6)] + ["x" * 500]
+    texto = "\f".join(paginas)
+    fragmentos = dividir_en_fragmentos(texto, 200)
+    assert "".join(f['text'] for f in fragmentos) == texto
+    assert all(len(f['text']) <= 200 for f in fragmentos)
+    assert [(f['page_start'], f['page_end']) for f in fragmentos[:3]] == [(1, 1), (2, 2), (3, 3)]
+    assert {(f['page_start'], f['page_end']) for f in fragmentos[5:]} == {(6, 6)}
+    assert all(texto[f['char_start']:].startswith(f['text']) for f in fragmentos)
+    print(f"✅ PASÓ: {len(texto)} caracteres en {len(fragmentos)} fragmentos que reconstruyen el texto")
+
+    import consulta_mongodb
+    cliente = mongomock.MongoClient()
+    with tempfile.TemporaryDirectory() as tmp, entorno_datos(tmp, n_pdfs=0) as (scraper, _, _, json_dir), \
+            mock.patch.multiple(scraper_mod, MONGO_FRAGMENTOS=True, MONGO_FRAGMENTO_MAX_CARACTERES=400), \
+            mock.patch.object(scraper_mod, 'MongoClient', lambda *a, **k: cliente), \
+            mock.patch.object(scraper_mod, 'MONGO_AVAILABLE', True), \
+            mock.patch.object(cliente, 'close', lambda: None), \
+            mongomock_compatible():
+        largo = "\f".join(f"página {n} " + "informe " * 40 for n in range(1, 21))
+        for i, texto_doc in enumerate([largo, "documento corto"], 1):
+            with open(json_dir / f"minsalud_texto_{i:03d}.json", 'w', encoding='utf-8') as f:
+                json.dump({'file': f"doc{i}.pdf", 'text': texto_doc, 'method': 'PYMUPDF'}, f)
+
+        scraper.cargar_a_mongodb(crear_indices=False)
+        db = cliente[scraper_mod.DB_NAME]
+        coleccion = db[scraper_mod.COLLECTION_NAME]
+        fragmentos_db = db[scraper_mod.FRAGMENTOS_COLLECTION_NAME]
+        padre = coleccion.find_one({'file_key': 'doc1.pdf'})
+        assert 'text' not in padre and padre['char_count'] == len(largo)
+        assert padre['chunk_count'] == fragmentos_db.count_documents({'file_key': 'doc1.pdf'}) > 1
+        assert coleccion.find_one({'file_key': 'doc2.pdf'})['chunk_count'] == 1
+        assert scraper.estadisticas['mongo_bulk']['fragmentos'] == padre['chunk_count'] + 1
+
+        # La consulta reconstruye el texto, o lee solo los fragmentos de las páginas pedidas
+        assert consulta_mongodb.texto_documento(coleccion, padre) == largo
+        with contar_llamadas('find') as llamadas:
+            pagina_7 = consulta_mongodb.texto_documento(coleccion, padre, paginas=(7, 7))
+        assert llamadas['find'] == 1
+        assert largo.split("\f")[6] in pagina_7 and len(pagina_7) < len(largo) // 4
+        print(f"✅ PASÓ: Padre sin texto y {padre['chunk_count']} fragmentos; la página 7 lee {len(pagina_7)} caracteres")
+
+        # Una versión más corta borra los fragmentos que sobran
+        (json_dir / "minsalud_texto_001.json").write_text(
+            json.dumps({'file': "doc1.pdf", 'text': "resumen\fcorto", 'method': 'OCR'}), encoding='utf-8'
+        )
+        scraper.cargar_a_mongodb(crear_indices=False)
+        padre = coleccion.find_one({'file_key': 'doc1.pdf'})
+        assert padre['chunk_count'] == 1 and padre['method'] == 'OCR'
+        assert fragmentos_db.count_documents({'file_key': 'doc1.pdf'}) == 1
+        assert consulta_mongodb.texto_documento(coleccion, padre) == "resumen\fcorto"
+    print("✅ PASÓ: Los fragmentos de la versión anterior se reemplazan")
+
+
+def test_busqueda_sin_fragmentos():
+    """Sin MONGO_FRAGMENTOS ni índice de texto en los fragmentos, la búsqueda solo consulta la colección principal"""
+    if not MONGOMOCK_AVAILABLE:
+        print("⚠️ mongomock no disponible, prueba omitida")
+        return
+
+    print("\n" + "="*60)
+    print("🧪 TEST: Búsqueda de texto sin fragmentos")
+    print("="*60)
+
+    import consulta_mongodb
+    cliente = mongomock.MongoClient()
+    coleccion = cliente[scraper_mod.DB_NAME][scraper_mod.COLLECTION_NAME]
+    coleccion.insert_one({'file': "doc1.pdf", 'file_key': "doc1.pdf", 'text': "Resolución sobre vacunas"})
+    coleccion.create_index([('text', 'text')])
+    fragmentos = consulta_mongodb.coleccion_fragmentos(coleccion)
+
+    consultadas = []
+
+    def aggregate(self, pipeline, *args, **kwargs):
+        # mongomock no implementa $text: basta saber qué colecciones se consultan
+        consultadas.append(self.name)
+        return iter([])
+
+    with mock.patch.object(mongomock.collection.Collection, 'aggregate', aggregate), \
+            mock.patch.object(consulta_mongodb, 'MONGO_FRAGMENTOS', False):
+        consulta_mongodb.buscar_por_texto(coleccion, "vacunas")
+        assert consultadas == [coleccion.name]
+
+        # Una base cargada con fragmentos (índice de texto) sí los consulta
+        fragmentos.create_index([('text', 'text')])
+        consultadas.clear()
+        consulta_mongodb.buscar_por_texto(coleccion, "vacunas")
+        assert consultadas == [coleccion.name, fragmentos.name]
+    print("✅ PASÓ: La colección de fragmentos solo se consulta si tiene índice de texto")
+
+
+def test_consulta_paginada():
+    """Listar documentos lee solo char_count y la vista previa, por páginas de rango"""
+    if not MONGOMOCK_AVAILABLE:
+        print("⚠️ mongomock no disponible, prueba omitida")
+        return
+
+    print("\n" + "="*60)
+    print("🧪 TEST: Consultas con proyección y paginación por rango")
+    print("="*60)
+
+    import consulta_mongodb
+    cliente = mongomock.MongoClient()
+    with tempfile.TemporaryDirectory() as tmp, entorno_datos(tmp, n_pdfs=0) as (scraper, _, _, json_dir), \
+            mock.patch.object(scraper_mod, 'MongoClient', lambda *a, **k: cliente), \
+            mock.patch.object(scraper_mod, 'MONGO_AVAILABLE', True), \
+            mock.patch.object(cliente, 'close', lambda: None), \
+            mongomock_compatible():
+        for i in range(1, 26):
+            with open(json_dir / f"minsalud_texto_{i:03d}.json", 'w', encoding='utf-8') as f:
+                json.dump({'file': f"doc{i:02d}.pdf", 'text': f"Resolución {i}\n\n" + "artículo " * 5000}, f)
+        coleccion = cliente[scraper_mod.DB_NAME][scraper_mod.COLLECTION_NAME]
+        # Documento cargado antes de que existieran char_count y preview, sin JSON de origen
+        coleccion.insert_one({'file': "antiguo.pdf", 'file_key': "antiguo.pdf", 'text': "texto   antiguo\ncompleto"})
+
+        scraper.cargar_a_mongodb(batch_size=10, crear_indices=False)
+        antiguo = coleccion.find_one({'file_key': "antiguo.pdf"})
+        assert (antiguo['char_count'], antiguo['preview']) == (24, "texto antiguo completo")
+        print("✅ PASÓ: char_count y preview agregados a un documento cargado antes")
+
+        # Documentos que comparten file_key justo en el borde de una página
+        for copia in range(3):
+            coleccion.insert_one({'file': f"doc10 ({copia}).pdf", 'file_key': "doc10.pdf",
+                                  'char_count': 1, 'preview': "copia"})
+
+        ids = []
+        siguiente = None
+        while True:
+            pagina = consulta_mongodb.pagina_documentos(coleccion, 10, siguiente)
+            assert all('text' not in doc and len(doc['preview']) <= scraper_mod.MONGO_PREVIEW_CARACTERES
+                       for doc in pagina)
+            ids.extend(doc['_id'] for doc in pagina)
+            if len(pagina) < 10:
+                break
+            siguiente = (pagina[-1]['file_key'], pagina[-1]['_id'])
+        esperados = [doc['_id'] for doc in coleccion.find({}, {'_id': 1}).sort([('file_key', 1), ('_id', 1)])]
+        assert ids == esperados and len(ids) == 29
+        doc = coleccion.find_one({'file_key': "doc03.pdf"})
+        assert doc['preview'].startswith("Resolución 3 artículo") and doc['char_count'] == len(doc['text'])
+
+        # El listado no transfiere el texto: cada documento pesa menos de 1 KB
+        tamano = sum(len(json.dumps(d, default=str)) for d in consulta_mongodb.pagina_documentos(coleccion, 100))
+        assert tamano < 29 * 1024, tamano
+    print(f"✅ PASÓ: 26 documentos en 3 páginas ({tamano:,} bytes listados)")
+
+
+def run_all_tests():
+    """Ejecutar todos los tests"""
+    tests = [
+        test_manifiesto_huella,
+        test_texto_incremental,
+        test_mongo_incremental,
+        test_mongo_bulk_upsert,
+        test_salida_jsonl,
+        test_mongo_fragmentos,
+        test_busqueda_sin_fragmentos,
+        test_consulta_paginada,
+    ]
+
+    for test in tests:
+        try:
+            test()
+        except Exception as e:
+            print(f"\n❌ ERROR en {test.__name__}: {e}")
+            import traceback
+            traceback.print_exc()
+
+
+if __name__ == "__main__":
+    run_all_tests()
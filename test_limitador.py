@@ -0,0 +1,274 @@
+"""
+Pruebas del limitador de tasa por host (cubetas de tokens)
+Usan un reloj falso: no esperan en tiempo real salvo la prueba asyncio
+"""
+
+import sys
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from limitador import LimitadorHosts, CubetaTokens, host_de
+from ethical_compliance import EthicalScrapingValidator
+
+HOST_A = "https://www.minsalud.gov.co/Normativa/a.aspx"
+HOST_B = "https://www.datos.gov.co/x"
+
+
+class RelojFalso:
+    """Reloj manual: dormir() avanza el tiempo en lugar de esperar"""
+
+    def __init__(self):
+        self.ahora = 0.0
+        self.esperas = []
+
+    def __call__(self):
+        return self.ahora
+
+    def dormir(self, segundos):
+        self.esperas.append(segundos)
+        self.ahora += segundos
+
+    async def dormir_async(self, segundos):
+        # Las tareas esperan a la vez: el reloj no avanza por cada una
+        self.esperas.append(segundos)
+        await asyncio.sleep(0)
+
+
+def _max_en_ventana(instantes, ventana):
+    """Máximo de instantes dentro de cualquier ventana semiabierta [t, t + ventana)"""
+    instantes = sorted(instantes)
+    maximo = 0
+    inicio = 0
+    for fin, t in enumerate(instantes):
+        while instantes[inicio] <= t - ventana + 1e-9:
+            inicio += 1
+        maximo = max(maximo, fin - inicio + 1)
+    return maximo
+
+
+def test_techo_de_tasa():
+    """Con demanda continua el ritmo llega al techo configurado y nunca lo supera"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Techo de tasa con reloj falso")
+    print("="*60)
+
+    reloj = RelojFalso()
+    limitador = LimitadorHosts({'ritmo': (10.0, 5)}, reloj=reloj, dormir=reloj.dormir)
+    instantes = []
+    for _ in range(1000):
+        limitador.adquirir(HOST_A)
+        instantes.append(reloj())
+        reloj.ahora += 0.01  # Duración de la petición
+
+    # Ráfaga inicial de `capacidad` turnos y luego exactamente 10 por segundo
+    assert instantes[:5] == [0.0, 0.01, 0.02, 0.03, 0.04]
+    assert abs(instantes[-1] - (1000 - 5) / 10.0) < 1e-6, instantes[-1]
+    for ventana in (0.1, 1.0, 10.0, 60.0):
+        assert _max_en_ventana(instantes, ventana) <= 5 + 10.0 * ventana, ventana
+    assert _max_en_ventana(instantes, 10.0) >= 100  # Se alcanza el techo
+    assert limitador.adquisiciones == 1000
+
+    # Tras un período inactivo la cubeta se rellena solo hasta su capacidad
+    reloj.ahora += 3600
+    esperas = [limitador.reservar(HOST_A) for _ in range(7)]
+    assert esperas[:5] == [0.0] * 5 and abs(esperas[5] - 0.1) < 1e-9 and abs(esperas[6] - 0.2) < 1e-9
+    print("✅ PASÓ: 10 peticiones/s sostenidas con ráfaga de 5")
+
+
+def test_hosts_independientes():
+    """Cada host tiene sus cubetas; un límite extra de un host no frena a los demás"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Cubetas por host")
+    print("="*60)
+
+    assert host_de(HOST_A) == "www.minsalud.gov.co" == host_de("WWW.MinSalud.gov.co")
+    reloj = RelojFalso()
+    limitador = LimitadorHosts({'intervalo': (1.0, 1)}, reloj=reloj, dormir=reloj.dormir)
+
+    assert [limitador.reservar(HOST_A), limitador.reservar(HOST_B)] == [0.0, 0.0]
+    assert [limitador.reservar(HOST_A), limitador.reservar(HOST_B)] == [1.0, 1.0]
+    assert len(limitador) == 2
+
+    # Un límite más estricto (p. ej. Crawl-delay: 5) rige solo en su host y
+    # respeta el turno ya reservado
+    limitador.fijar_limite(HOST_A, 'crawl_delay', 1 / 5.0)
+    assert limitador.limite(HOST_A, 'crawl_delay') == (0.2, 1)
+    assert limitador.limite(HOST_B, 'crawl_delay') is None
+    assert limitador.tasa_efectiva(HOST_A) == 0.2 and limitador.tasa_efectiva(HOST_B) == 1.0
+    assert limitador.tasa_efectiva(HOST_A, excepto=('crawl_delay',)) == 1.0
+    assert limitador.reservar(HOST_A) == 2.0
+    assert limitador.reservar(HOST_A) == 7.0
+    assert limitador.reservar(HOST_B) == 2.0
+    limitador.fijar_limite(HOST_A, 'crawl_delay', None)
+    reloj.ahora = 100.0
+    assert [limitador.reservar(HOST_A) for _ in range(2)] == [0.0, 1.0]
+
+    # Sin límites no se espera nunca
+    libre = LimitadorHosts({}, reloj=reloj)
+    assert libre.tasa_efectiva(HOST_A) is None
+    assert all(libre.reservar(HOST_A) == 0 for _ in range(100))
+    print("✅ PASÓ: Límites independientes por host")
+
+
+def test_intentar_sin_bloquear():
+    """intentar() toma el turno solo si está disponible y no deja reservas"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Adquisición sin bloqueo")
+    print("="*60)
+
+    reloj = RelojFalso()
+    limitador = LimitadorHosts({'ritmo': (2.0, 2)}, reloj=reloj, dormir=reloj.dormir)
+    assert [limitador.intentar(HOST_A) for _ in range(3)] == [True, True, False]
+    reloj.ahora = 0.4
+    assert not limitador.intentar(HOST_A)
+    reloj.ahora = 0.5
+    assert limitador.intentar(HOST_A) and not limitador.intentar(HOST_A)
+    # Un intento fallido no retrasa a quien sí espera
+    assert limitador.reservar(HOST_A) == 0.5
+    assert reloj.esperas == []
+    print("✅ PASÓ: Turnos inmediatos o rechazo sin espera")
+
+
+def test_hilos_concurrentes():
+    """Varios hilos reservan turnos distintos: la fila resultante es exactamente el ritmo configurado"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Reservas desde varios hilos")
+    print("="*60)
+
+    reloj = RelojFalso()  # Congelado: todas las reservas compiten por el mismo instante
+    limitador = LimitadorHosts({'intervalo': (4.0, 1), 'rafaga': (100.0, 3)}, reloj=reloj)
+    turnos = []
+    lock = threading.Lock()
+    barrera = threading.Barrier(8)
+
+    def trabajador():
+        barrera.wait()
+        for _ in range(250):
+            espera = limitador.reservar(HOST_A)
+            with lock:
+                turnos.append(espera)
+
+    hilos = [threading.Thread(target=trabajador) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    # Ningún turno repetido ni perdido: 0, 0.25, 0.5, ... (la cubeta más estricta manda)
+    assert sorted(turnos) == [i * 0.25 for i in range(2000)]
+    assert limitador.adquisiciones == 2000
+    print("✅ PASÓ: 2000 turnos únicos desde 8 hilos")
+
+
+def test_adquirir_async():
+    """adquirir_async espera en el event loop sin bloquear otras tareas"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Adquisición asyncio")
+    print("="*60)
+
+    reloj = RelojFalso()
+    limitador = LimitadorHosts({'ritmo': (5.0, 1)}, reloj=reloj, dormir_async=reloj.dormir_async)
+
+    async def lanzar():
+        return await asyncio.gather(*(limitador.adquirir_async(HOST_A) for _ in range(5)))
+
+    assert [round(e, 9) for e in asyncio.run(lanzar())] == [0.0, 0.2, 0.4, 0.6, 0.8]
+
+    # Con el reloj real: mientras las tareas esperan turno el loop sigue atendiendo
+    limitador = LimitadorHosts({'ritmo': (50.0, 1)})
+    latidos = []
+
+    async def latido():
+        for _ in range(10):
+            latidos.append(time.perf_counter())
+            await asyncio.sleep(0.005)
+
+    async def con_latido():
+        inicio = time.perf_counter()
+        await asyncio.gather(latido(), *(limitador.adquirir_async(HOST_B) for _ in range(6)))
+        return time.perf_counter() - inicio
+
+    duracion = asyncio.run(con_latido())
+    assert 0.09 <= duracion < 0.5, duracion
+    assert max(b - a for a, b in zip(latidos, latidos[1:])) < 0.05
+    print(f"✅ PASÓ: 6 turnos a 50/s en {duracion:.3f}s sin bloquear el loop")
+
+
+def test_pausa_host():
+    """pausar() retrasa los turnos de un host (Retry-After) sin afectar a los demás"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Pausa de un host")
+    print("="*60)
+
+    reloj = RelojFalso()
+    limitador = LimitadorHosts({'ritmo': (1.0, 1)}, reloj=reloj, dormir=reloj.dormir)
+    assert limitador.reservar(HOST_A) == 0.0
+    limitador.pausar(HOST_A, 30)
+    limitador.pausar(HOST_A, 5)  # Una pausa más corta no acorta la vigente
+    assert not limitador.intentar(HOST_A)
+    assert limitador.reservar(HOST_A) == 30.0
+    # Tras la pausa el ritmo continúa desde el turno concedido
+    assert limitador.reservar(HOST_A) == 31.0
+    assert limitador.reservar(HOST_B) == 0.0
+
+    # También rige en un host sin límites de tasa
+    libre = LimitadorHosts({}, reloj=reloj)
+    assert libre.tasa_efectiva(HOST_A) is None
+    libre.pausar(HOST_B, 2)
+    assert libre.reservar(HOST_B) == 2.0
+    reloj.ahora += 2
+    assert libre.intentar(HOST_B)
+    print("✅ PASÓ: Pausa respetada por host")
+
+
+def test_validador_por_host():
+    """rate_limit del validador aplica los límites éticos por host"""
+    print("\n" + "="*60)
+    print("🧪 TEST: rate_limit por host")
+    print("="*60)
+
+    validator = EthicalScrapingValidator()
+    reloj = RelojFalso()
+    validator.limiter.reloj = reloj
+    validator.limiter.dormir = reloj.dormir
+
+    for _ in range(3):
+        validator.rate_limit(HOST_A)
+        validator.rate_limit(HOST_B)
+    # 20 por minuto sin ráfaga = una cada 3 s (más estricto que el intervalo de 2 s)
+    assert reloj.esperas == [3.0, 3.0], reloj.esperas
+
+    ritmo = min(tasa for tasa, _ in validator.limiter.limites.values())
+    assert ritmo * 60 == validator.MAX_REQUESTS_PER_MINUTE
+    assert isinstance(CubetaTokens(ritmo), CubetaTokens)
+    print("✅ PASÓ: Límite ético independiente por host")
+
+
+def run_all_tests():
+    """Ejecutar todos los tests"""
+    tests = [
+        test_techo_de_tasa,
+        test_hosts_independientes,
+        test_intentar_sin_bloquear,
+        test_hilos_concurrentes,
+        test_adquirir_async,
+        test_pausa_host,
+        test_validador_por_host,
+    ]
+
+    for test in tests:
+        try:
+            test()
+        except Exception as e:
+            print(f"\n❌ ERROR en {test.__name__}: {e}")
+            import traceback
+            traceback.print_exc()
+
+
+if __name__ == "__main__":
+    run_all_tests()
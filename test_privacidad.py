@@ -0,0 +1,190 @@
+"""
+Pruebas del escáner de datos personales (Ley 1581 de 2012)
+No requieren internet ni MongoDB
+"""
+
+import re
+import sys
+import json
+import random
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+import scraper as scraper_mod
+from escaner_pii import CATEGORIAS_PII, PATRON_PII, coincidencias, coincidencias_en_trozos, escanear, enmascarar
+from ethical_compliance import EthicalScrapingValidator
+
+PDFS_REPO = sorted((Path(__file__).parent / "data" / "pdfs").glob("*.pdf"))
+JSON_REPO = sorted((Path(__file__).parent / "data" / "json_output").glob("minsalud_texto_*.json"))
+
+TEXTO = ("Resolución 1234 de 2025. Contacto: Juan.Perez@Example.com, Tel: 123-456-7890; "
+         "cédula 1020304050. Campo PASSWORD y token de acceso; tokens no cuenta. "
+         "Radicado 20251234567 (11 dígitos) y teléfono 601.555.1234.")
+
+
+def test_categorias_y_posiciones():
+    """Una pasada informa cada coincidencia con su categoría y su posición"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Categorías y posiciones")
+    print("="*60)
+
+    hallazgos = list(coincidencias(TEXTO))
+    assert [(c, TEXTO[a:b]) for c, a, b in hallazgos] == [
+        ('email', "Juan.Perez@Example.com"),
+        ('telefono', "123-456-7890"),
+        ('cedula', "1020304050"),
+        ('password', "PASSWORD"),
+        ('token', "token"),
+        ('telefono', "601.555.1234"),
+    ], hallazgos
+
+    resultado = escanear(TEXTO)
+    assert resultado['total'] == 6
+    assert resultado['conteos'] == {'cedula': 1, 'telefono': 2, 'email': 1, 'password': 1, 'token': 1}
+    assert resultado['posiciones']['telefono'][1] == (TEXTO.index("601"), TEXTO.index("601") + 12)
+    assert escanear("Resolución 1234 de 2025 - Normativa sanitaria")['total'] == 0
+    assert escanear(TEXTO, max_posiciones=1)['posiciones']['telefono'] == [resultado['posiciones']['telefono'][0]]
+    print("✅ PASÓ: Conteos y posiciones por categoría")
+
+
+def test_equivalencia_con_patrones_separados():
+    """Sobre los mismos textos se detectan las mismas categorías que con una búsqueda por patrón"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Equivalencia con PROHIBITED_PATTERNS")
+    print("="*60)
+
+    textos = [TEXTO, "", "sin datos", "mail: a@b.co", "31234567", "3123456789012"]
+    textos += [json.loads(ruta.read_text(encoding='utf-8')).get('text') or "" for ruta in JSON_REPO]
+    for texto in textos:
+        esperadas = {categoria for categoria, patron in CATEGORIAS_PII.items()
+                     if re.search(rf'\b{patron}\b', texto, re.IGNORECASE)}
+        encontradas = {c for c, _, _ in coincidencias(texto)}
+        # Un número de 10 dígitos también es un teléfono, pero se informa como cédula
+        assert encontradas <= esperadas and esperadas - encontradas <= {'telefono'}, (esperadas, encontradas)
+
+    # La búsqueda rápida (sin la alternativa email fuera de las rachas con "@")
+    # da exactamente lo mismo que la expresión combinada, también desde una
+    # posición intermedia
+    azar = random.Random(2012)
+    piezas = ["1234", "5678", "90", "-", ".", "@", "a", "Ñ", "_", " ", "co", "PassWord", "TOKEN", "tó", "x@y.org", "\n",
+              "paſſword", "to\u212aen", "\u0663\u0664\u0665"]
+    for _ in range(3000):
+        texto = "".join(azar.choice(piezas) for _ in range(azar.randint(0, 25)))
+        inicio = azar.randint(0, len(texto))
+        esperado = [(m.lastgroup, m.start(), m.end()) for m in PATRON_PII.finditer(texto, inicio)]
+        assert list(coincidencias(texto, inicio)) == esperado, (texto, inicio)
+    print(f"✅ PASÓ: {len(textos)} textos y 3000 textos aleatorios")
+
+
+def test_escaneo_por_trozos():
+    """Cortar el texto en trozos, incluso en medio de una coincidencia, no cambia el resultado"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Escaneo por trozos")
+    print("="*60)
+
+    texto = TEXTO * 50
+    esperado = list(coincidencias(texto))
+    azar = random.Random(1581)
+    for tamano in (1, 2, 7, 13, 64, 1000, len(texto)):
+        trozos = [texto[i:i + tamano] for i in range(0, len(texto), tamano)]
+        assert list(coincidencias_en_trozos(trozos, margen=40)) == esperado, tamano
+    for _ in range(20):
+        cortes = sorted(azar.sample(range(1, len(texto)), 30))
+        trozos = [texto[a:b] for a, b in zip([0] + cortes, cortes + [len(texto)])]
+        assert list(coincidencias_en_trozos(trozos, margen=40)) == esperado
+    assert list(coincidencias_en_trozos([])) == []
+    print("✅ PASÓ: Mismas coincidencias con cualquier partición")
+
+
+def test_validador_etico():
+    """validate_data_privacy no bloquea y deja el detalle del escaneo"""
+    print("\n" + "="*60)
+    print("🧪 TEST: validate_data_privacy")
+    print("="*60)
+
+    validator = EthicalScrapingValidator()
+    assert validator.validate_data_privacy(TEXTO) is True
+    assert validator.last_privacy_scan['conteos']['telefono'] == 2
+    assert validator.validate_data_privacy("Normativa sanitaria") is True
+    assert validator.last_privacy_scan['total'] == 0
+    print("✅ PASÓ: Advertencias con conteos por categoría")
+
+
+def test_enmascarar():
+    """Las categorías elegidas se reemplazan por su máscara y se cuentan"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Enmascarado de datos personales")
+    print("="*60)
+
+    texto, conteos = enmascarar(TEXTO, ["cedula", "telefono", "email"])
+    assert texto == ("Resolución 1234 de 2025. Contacto: [EMAIL], Tel: [TELEFONO]; "
+                     "cédula [CEDULA]. Campo PASSWORD y token de acceso; tokens no cuenta. "
+                     "Radicado 20251234567 (11 dígitos) y teléfono [TELEFONO].")
+    assert conteos == {'cedula': 1, 'telefono': 2, 'email': 1}
+    assert escanear(texto)['conteos'] == {'cedula': 0, 'telefono': 0, 'email': 0, 'password': 1, 'token': 1}
+
+    # Sin coincidencias se devuelve el mismo objeto, sin copiar el texto
+    limpio = "Normativa sanitaria\fpágina 2"
+    assert enmascarar(limpio)[0] is limpio
+    assert enmascarar(TEXTO, mascara="***")[0].count("***") == 6
+    print("✅ PASÓ: Máscaras y conteos por categoría")
+
+
+def test_redaccion_en_pipeline():
+    """procesar_pdfs_texto guarda el texto enmascarado y los conteos en los metadatos"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Redacción antes de escribir el JSON")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / "pdfs").mkdir()
+        (tmp / "json_output").mkdir()
+        shutil.copy(PDFS_REPO[0], tmp / "pdfs" / PDFS_REPO[0].name)
+        with mock.patch.multiple(scraper_mod, PDF_DIR=tmp / "pdfs", JSON_OUTPUT_DIR=tmp / "json_output",
+                                 MANIFEST_PATH=tmp / "manifiesto.sqlite3"):
+            scraper = scraper_mod.MinSaludScraper()
+            scraper.extraer_texto_pdf = lambda pdf_path: (TEXTO, 'PDFMINER', [])
+            scraper.procesar_pdfs_texto()
+
+            data = json.loads(next((tmp / "json_output").glob("*.json")).read_text(encoding='utf-8'))
+            assert "123-456-7890" not in data['text'] and "[TELEFONO]" in data['text']
+            assert data['pii_redactions'] == {'cedula': 1, 'telefono': 2, 'email': 1}
+            assert data['char_count'] == len(data['text'])
+            assert scraper.estadisticas['pii_redactados'] == 4
+
+            # Con la redacción desactivada el texto se guarda tal cual
+            with mock.patch.object(scraper_mod, 'PII_REDACCION', False):
+                scraper.procesar_pdfs_texto(forzar=True)
+            data = json.loads(next((tmp / "json_output").glob("*.json")).read_text(encoding='utf-8'))
+            assert data['text'] == TEXTO and 'pii_redactions' not in data
+    print("✅ PASÓ: JSON sin datos personales y con conteos de redacción")
+
+
+def run_all_tests():
+    """Ejecutar todos los tests"""
+    tests = [
+        test_categorias_y_posiciones,
+        test_equivalencia_con_patrones_separados,
+        test_escaneo_por_trozos,
+        test_validador_etico,
+        test_enmascarar,
+        test_redaccion_en_pipeline,
+    ]
+
+    for test in tests:
+        try:
+            test()
+        except Exception as e:
+            print(f"\n❌ ERROR en {test.__name__}: {e}")
+            import traceback
+            traceback.print_exc()
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,243 @@
+"""
+Pruebas del intérprete de robots.txt (RFC 9309) y su caché por sitio
+"""
+
+import sys
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent / "benchmarks"))
+
+from robots import ReglasRobots, CacheRobots, ruta_de
+from servidor_stub import SitioStub, ValidadorLocal, scraper_contra_stub
+
+AGENTE = "MinSaludScraper/1.0 (Educational/Research)"
+
+
+def _robots(*reglas, agente="*"):
+    return f"User-agent: {agente}\n" + "\n".join(reglas) + "\n"
+
+
+def test_regla_mas_larga():
+    """Gana la regla más específica; en empate, Allow"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Coincidencia por regla más larga")
+    print("="*60)
+
+    casos = [
+        (["Allow: /p", "Disallow: /"], "/page", True),
+        (["Allow: /folder", "Disallow: /folder"], "/folder/page", True),
+        (["Allow: /page", "Disallow: /*.htm"], "/page.htm", False),
+        (["Allow: /$", "Disallow: /"], "/", True),
+        (["Allow: /$", "Disallow: /"], "/page.htm", False),
+        (["Disallow: /*.php$"], "/index.php", False),
+        (["Disallow: /*.php$"], "/index.php?x=1", True),
+        (["Disallow: /*.php$"], "/index.php5", True),
+        (["Disallow: /*?sessionid"], "/a/b?sessionid=9", False),
+        (["Disallow: /Normativa/"], "/normativa/x", True),  # Distingue mayúsculas
+        (["Disallow: /fish*"], "/fish.html", False),
+        (["Disallow: /"], "/robots.txt", True),
+        (["Disallow:"], "/cualquiera", True),
+    ]
+    for reglas, ruta, esperado in casos:
+        assert ReglasRobots(_robots(*reglas), AGENTE).permite(ruta) is esperado, (reglas, ruta)
+
+    reglas = ReglasRobots(_robots("Disallow: /Normativa/*.pdf$"), AGENTE)
+    assert not reglas.permite("https://www.minsalud.gov.co/Normativa/Documents/a.pdf")
+    assert reglas.permite("https://www.minsalud.gov.co/Normativa/Documents/a.pdf?v=2")
+    assert ruta_de("https://x.example") == "/"
+    print(f"✅ PASÓ: {len(casos)} casos de RFC 9309")
+
+
+def test_grupos_por_agente():
+    """Se usa el grupo del agente (o el de *), con Crawl-delay y formato tolerante"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Grupos de User-agent")
+    print("="*60)
+
+    contenido = """
+    # Comentario
+    USER-AGENT: *
+    disallow: /privado   # comentario al final
+    Crawl-delay: 10
+
+    User-agent: Googlebot
+    User-agent: MinSaludScraper
+    Disallow: /Normativa/Borradores/
+    Crawl-delay: 2.5
+    Sitemap: https://www.minsalud.gov.co/sitemap.xml
+
+    User-agent: minsalud
+    Disallow: /
+
+    User-agent: minsaludscraper/2.0
+    Allow: /Normativa/Borradores/publicos/
+    """
+    reglas = ReglasRobots(contenido, AGENTE)
+    # Los grupos propios se combinan y el de * deja de aplicar; "minsalud"
+    # es otro token de producto aunque sea parte del nombre
+    assert reglas.permite("/privado")
+    assert not reglas.permite("/Normativa/Borradores/x.aspx")
+    assert reglas.permite("/Normativa/Borradores/publicos/x.aspx")
+    assert reglas.crawl_delay == 2.5
+    assert not ReglasRobots(contenido, "MinSalud/1.0").permite("/privado")
+    assert ReglasRobots(_robots("Disallow: /", agente="bot"), "MinSaludBot/1.0").permite("/a")
+
+    otro = ReglasRobots(contenido, "OtroBot/2.0")
+    assert not otro.permite("/privado") and otro.permite("/Normativa/Borradores/x.aspx")
+    assert otro.crawl_delay == 10.0
+
+    # Reglas antes de cualquier User-agent, Crawl-delay inválido y archivo vacío
+    assert ReglasRobots("Disallow: /\nUser-agent: *\nCrawl-delay: x", AGENTE).permite("/a")
+    assert ReglasRobots("", AGENTE).permite("/a") and ReglasRobots(None, AGENTE).crawl_delay is None
+    print("✅ PASÓ: Selección y combinación de grupos")
+
+
+def _referencia(reglas, ruta):
+    """Implementación directa: evaluar todas las reglas y quedarse con la más larga"""
+    mejor = None
+    for permitir, patron in reglas:
+        anclado = patron.endswith('$')
+        cuerpo = patron[:-1] if anclado else patron
+        expresion = '.*'.join(re.escape(p) for p in cuerpo.split('*')) + ('$' if anclado else '')
+        if re.match(expresion, ruta, re.S):
+            clave = (len(patron), permitir)
+            if mejor is None or clave > mejor:
+                mejor = clave
+    return True if mejor is None else mejor[1]
+
+
+def test_equivalencia_aleatoria():
+    """El intérprete compilado coincide con la evaluación directa de todas las reglas"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Equivalencia con la implementación directa")
+    print("="*60)
+
+    rng = random.Random(9309)
+    piezas = ["/", "a", "b", "ab", ".pdf", "?", "=", "*", "$", "-"]
+    total = 0
+    for _ in range(300):
+        reglas = []
+        for _ in range(rng.randint(1, 8)):
+            patron = "/" + "".join(rng.choice(piezas) for _ in range(rng.randint(0, 4)))
+            patron = patron.replace("$", "") + ("$" if rng.random() < 0.2 else "")
+            reglas.append((rng.random() < 0.5, patron))
+        texto = _robots(*(f"{'Allow' if p else 'Disallow'}: {patron}" for p, patron in reglas))
+        compiladas = ReglasRobots(texto, AGENTE)
+        for _ in range(30):
+            ruta = "/" + "".join(rng.choice(piezas[:-2]) for _ in range(rng.randint(0, 6)))
+            if ruta == "/robots.txt":
+                continue
+            assert compiladas.permite(ruta) == _referencia(reglas, ruta), (reglas, ruta)
+            total += 1
+    print(f"✅ PASÓ: {total} evaluaciones idénticas")
+
+
+def test_velocidad():
+    """Evaluar una URL contra un robots.txt compilado toma microsegundos"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Velocidad de evaluación")
+    print("="*60)
+
+    reglas = [f"Disallow: /Normativa/seccion{i}/" for i in range(40)]
+    reglas += [f"Allow: /Normativa/seccion{i}/publico*.pdf$" for i in range(10)]
+    compiladas = ReglasRobots(_robots(*reglas), AGENTE)
+    urls = [f"https://www.minsalud.gov.co/Normativa/Paginas/p{i}.aspx" for i in range(2000)]
+
+    inicio = time.perf_counter()
+    for url in urls:
+        compiladas.permite(url)
+    micros = (time.perf_counter() - inicio) / len(urls) * 1e6
+    print(f"   {micros:.1f} µs por URL con {len(reglas)} reglas")
+    assert micros < 50
+    print("✅ PASÓ: Evaluación en microsegundos")
+
+
+def test_cache_persistente():
+    """La caché sobrevive entre instancias y respeta el vencimiento"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Caché de robots.txt en disco")
+    print("="*60)
+
+    ahora = [1_000_000.0]
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = Path(tmp) / "robots.sqlite3"
+        cache = CacheRobots(ruta, AGENTE, reloj=lambda: ahora[0])
+        assert cache.obtener("https://a.example") is None
+        cache.guardar("https://a.example", _robots("Disallow: /x", "Crawl-delay: 3"), ttl=3600)
+        cache.guardar("https://b.example", None, ttl=60)
+        cache.cerrar()
+
+        otra = CacheRobots(ruta, AGENTE, reloj=lambda: ahora[0])
+        reglas = otra.obtener("https://a.example")
+        assert reglas is not None and not reglas.permite("/x/1") and reglas.crawl_delay == 3.0
+        assert otra.obtener("https://b.example").permite("/x/1")
+        assert len(otra) == 2
+
+        ahora[0] += 61
+        assert otra.obtener("https://b.example") is None
+        assert otra.obtener("https://a.example") is not None
+        ahora[0] += 3600
+        assert otra.obtener("https://a.example") is None
+        otra.cerrar()
+    print("✅ PASÓ: Entradas persistidas y vencidas a tiempo")
+
+
+def test_robots_en_crawling():
+    """El crawling descarga el robots.txt una vez, respeta sus reglas y aplica el Crawl-delay"""
+    print("\n" + "="*60)
+    print("🧪 TEST: robots.txt durante el crawling")
+    print("="*60)
+
+    validador = ValidadorLocal()
+    with SitioStub(paginas=13, latencia=0.0) as sitio, tempfile.TemporaryDirectory() as tmp:
+        sitio.robots = _robots("Disallow: /Normativa/Paginas/p3.aspx", "Crawl-delay: 0.02",
+                               agente="minsaludscraper")
+        with scraper_contra_stub(sitio, Path(tmp) / "links.json", validador=validador) as scraper:
+            inicio = time.perf_counter()
+            scraper.crawl_sitio_web()
+            duracion = time.perf_counter() - inicio
+            urls = {link['url'] for link in scraper.todos_los_links}
+            visitadas = scraper.estadisticas['paginas_procesadas']
+
+        base = sitio.base
+        limite = validador.limiter.limite(base, 'crawl_delay')
+
+    # p3 se descubre pero no se visita, así que sus hijas (p10-p12) no aparecen
+    assert f"{base}/Normativa/Paginas/p3.aspx" in urls
+    assert not any(f"/p{i}.aspx" in url for url in urls for i in (10, 11, 12))
+    # Una sola descarga de robots.txt, con el User-Agent ético y el pool de la sesión
+    assert sitio.peticiones == (visitadas - 1) + 1
+    assert sitio.agentes == {validador.USER_AGENT}
+    assert limite == (50.0, 1)
+    assert duracion >= (visitadas - 1) * 0.02 * 0.9
+    print(f"✅ PASÓ: {visitadas} páginas ({sitio.peticiones} peticiones) con Crawl-delay de 0.02s")
+
+
+def run_all_tests():
+    """Ejecutar todos los tests"""
+    tests = [
+        test_regla_mas_larga,
+        test_grupos_por_agente,
+        test_equivalencia_aleatoria,
+        test_velocidad,
+        test_cache_persistente,
+        test_robots_en_crawling,
+    ]
+
+    for test in tests:
+        try:
+            test()
+        except Exception as e:
+            print(f"\n❌ ERROR en {test.__name__}: {e}")
+            import traceback
+            traceback.print_exc()
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,145 @@
+"""
+Pruebas de canonicalización de URLs con links reales del sitio
+(copia fija en tests/fixtures: data/Links_MinSalud.json lo reescribe el crawler)
+"""
+
+import sys
+import json
+import unicodedata
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from url_canonica import canonicalizar_url, nombre_archivo_pdf, clave_archivo
+from frontera import FronteraCrawl
+
+URLS_JSON = Path(__file__).parent / "tests" / "fixtures" / "urls_minsalud.json"
+PDF_DIR = Path(__file__).parent / "data" / "pdfs"
+
+
+def _urls_repo():
+    with open(URLS_JSON, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _invertir_hex(url):
+    """Variante con los escapes %XX en el caso contrario"""
+    partes = url.split('%')
+    return partes[0] + ''.join(
+        '%' + p[:2].swapcase() + p[2:] for p in partes[1:]
+    )
+
+
+def _variante_unicode(url, forma):
+    """Variante con los acentos re-codificados en NFC o NFD"""
+    base, nombre = url.rsplit('/', 1)
+    texto = unicodedata.normalize(forma, unquote(nombre))
+    return f"{base}/{quote(texto, safe='+,()')}"
+
+
+def test_urls_repo_distintas():
+    """Canonicalizar no fusiona links distintos del repositorio"""
+    print("\n" + "="*60)
+    print("🧪 TEST: URLs del repositorio siguen siendo distintas")
+    print("="*60)
+
+    urls = _urls_repo()
+    claves = {canonicalizar_url(u) for u in urls}
+    print(f"   {len(urls)} URLs → {len(claves)} claves")
+    assert len(claves) == len(urls)
+    print("✅ PASÓ: Sin colisiones")
+
+
+def test_idempotencia():
+    """canonicalizar_url(canonicalizar_url(u)) == canonicalizar_url(u)"""
+    for url in _urls_repo():
+        clave = canonicalizar_url(url)
+        assert canonicalizar_url(clave) == clave
+    print("✅ PASÓ: Canonicalización idempotente")
+
+
+def test_variantes_misma_clave():
+    """Fragmento, query, hex, NFC/NFD, .PDF y host en mayúsculas dan la misma clave"""
+    print("\n" + "="*60)
+    print("🧪 TEST: Variantes de la misma URL")
+    print("="*60)
+
+    for url in _urls_repo():
+        clave = canonicalizar_url(url)
+        variantes = [
+            url + "#pagina=2",
+            url + "?web=1",
+            _invertir_hex(url),
+            _variante_unicode(url, 'NFC'),
+            _variante_unicode(url, 'NFD'),
+            url.replace("https://www.minsalud.gov.co", "HTTPS://WWW.MinSalud.gov.co:443"),
+        ]
+        if url.endswith('.pdf'):
+            variantes.append(url[:-4] + '.PDF')
+        for variante in variantes:
+            assert canonicalizar_url(variante) == clave, (variante, clave)
+
+    print("✅ PASÓ: Todas las variantes comparten clave")
+
+
+def test_formas_nfd_y_nfc_del_repo():
+    """Los nombres NFD (Re%cc%81gimen) se codifican como NFC (%C3%A9)"""
+    url = next(u for u in _urls_repo() if 'Re%cc%81gimen' in u)
+    clave = canonicalizar_url(url)
+    assert 'R%C3%A9gimen' in clave
+    assert canonicalizar_url(url.replace('Re%cc%81gimen', 'R%c3%a9gimen')) == clave
+    # Los sub-delimitadores codificados y literales también convergen
+    url_coma = next(u for u in _urls_repo() if '%2c' in u)
+    assert canonicalizar_url(url_coma) == canonicalizar_url(url_coma.replace('%2c', ','))
+    assert canonicalizar_url('https://x.co/a%2Fb.pdf') != canonicalizar_url('https://x.co/a/b.pdf')
+    print("✅ PASÓ: NFD y NFC convergen")
+
+
+def test_nombres_archivo():
+    """Nombres de archivo locales y claves de MongoDB coinciden con la URL"""
+    for url in _urls_repo():
+        if url.endswith('.pdf'):
+            nombre = nombre_archivo_pdf(url)
+            assert nombre == canonicalizar_url(url).rsplit('/', 1)[-1]
+            assert nombre == nombre_archivo_pdf(url[:-4] + '.PDF')
+            assert clave_archivo(url.rsplit('/', 1)[-1]) == nombre
+
+    # Los PDFs ya descargados (nombre crudo) tienen claves únicas
+    nombres = [p.name for p in PDF_DIR.glob("*.pdf")]
+    assert len({clave_archivo(n) for n in nombres}) == len(nombres)
+    print("✅ PASÓ: Nombres de archivo canónicos")
+
+
+def test_frontera_usa_clave_canonica():
+    """La frontera trata las variantes como la misma URL"""
+    url = next(u for u in _urls_repo() if 'Re%cc%81gimen' in u)
+    frontera = FronteraCrawl()
+    assert frontera.registrar(url)
+    assert not frontera.registrar(_invertir_hex(url) + '#x')
+    assert not frontera.registrar(url.replace('Re%cc%81gimen', 'R%C3%A9gimen'))
+    print("✅ PASÓ: Deduplicación por clave canónica")
+
+
+def run_all_tests():
+    """Ejecutar todos los tests"""
+    tests = [
+        test_urls_repo_distintas,
+        test_idempotencia,
+        test_variantes_misma_clave,
+        test_formas_nfd_y_nfc_del_repo,
+        test_nombres_archivo,
+        test_frontera_usa_clave_canonica,
+    ]
+
+    for test in tests:
+        try:
+            test()
+        except Exception as e:
+            print(f"\n❌ ERROR en {test.__name__}: {e}")
+            import traceback
+            traceback.print_exc()
+
+
+if __name__ == "__main__":
+    run_all_tests()